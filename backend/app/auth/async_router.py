@@ -0,0 +1,84 @@
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+    Cookie,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.database import get_async_db
+from backend.app.core.dependencies import get_access_token
+
+from . import service, schemas
+
+# router.py와 같은 API를 async로 처리 (API_MODE=async)
+router = APIRouter(prefix="/auth", tags=["auth"])
+
+
+def set_refresh_cookie(response: Response, refresh_token: str):
+    response.set_cookie(
+        key="refresh_token",
+        value=refresh_token,
+        httponly=True,
+        secure=True,
+        samesite="strict",
+    )
+
+
+@router.post("/login", response_model=schemas.Token)
+async def login(
+    user: schemas.UserLogin,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        tokens = await service.alogin(
+            db, user, request.headers.get("user-agent"), request.client.host
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+
+    set_refresh_cookie(response, tokens["refresh_token"])
+    return {"access_token": tokens["access_token"], "token_type": "bearer"}
+
+
+@router.post("/refresh", response_model=schemas.Token)
+async def refresh_token(
+    request: Request,
+    response: Response,
+    refresh_token: str = Cookie(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if not refresh_token:
+        raise HTTPException(status_code=401, detail="Refresh token missing")
+
+    try:
+        tokens = await service.aregenerate_token(
+            db,
+            refresh_token,
+            request.headers.get("user-agent"),
+            request.client.host,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+
+    set_refresh_cookie(response, tokens["refresh_token"])
+    return {"access_token": tokens["access_token"], "token_type": "bearer"}
+
+
+@router.post("/logout")
+async def logout(
+    response: Response,
+    access_token: str = Depends(get_access_token),
+    refresh_token: str = Cookie(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if not refresh_token:
+        raise HTTPException(status_code=401, detail="Refresh token missing")
+
+    await service.alogout(db, refresh_token, access_token)
+    response.delete_cookie(key="refresh_token")
+    return {"detail": "Logged out successfully"}
@@ -6,16 +6,14 @@ from fastapi import (
     Response,
     Cookie,
 )
-from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
 
 from backend.app.core.database import get_db
-from backend.app.core.security import verify_token
+from backend.app.core.dependencies import get_access_token
 
 from . import service, schemas
 
 router = APIRouter(prefix="/auth", tags=["auth"])
-security = HTTPBearer()
 
 
 @router.post("/login", response_model=schemas.Token)
@@ -42,7 +40,7 @@ def login(
         )
 
         return {"access_token": access_token, "token_type": "bearer"}
-    except HTTPException as e:
+    except ValueError as e:
         raise HTTPException(status_code=401, detail=str(e))
 
 
@@ -60,40 +58,38 @@ def refresh_token(
         user_agent = request.headers.get("user-agent")
         ip_address = request.client.host
 
-        access_token, new_refresh_token = service.regenerate_token(
+        tokens = service.regenerate_token(
             db, refresh_token, user_agent, ip_address
         )
 
         response.set_cookie(
             key="refresh_token",
-            value=new_refresh_token,
+            value=tokens["refresh_token"],
             httponly=True,
             secure=True,
             samesite="strict",
         )
 
-        return {"access_token": access_token, "token_type": "bearer"}
-    except HTTPException as e:
+        return {"access_token": tokens["access_token"], "token_type": "bearer"}
+    except ValueError as e:
         raise HTTPException(status_code=401, detail=str(e))
 
 
 @router.post("/logout")
 def logout(
     db: Session = Depends(get_db),
-    credentials=Depends(security),
+    access_token: str = Depends(get_access_token),
     refresh_token: str = Cookie(None),
     response: Response = None,
 ):
-    verify_token(credentials.credentials)
-
     if not refresh_token:
         raise HTTPException(status_code=401, detail="Refresh token missing")
 
     try:
-        service.logout(db, refresh_token)
+        service.logout(db, refresh_token, access_token)
 
         response.delete_cookie(key="refresh_token")
 
         return {"detail": "Logged out successfully"}
-    except HTTPException as e:
+    except ValueError as e:
         raise HTTPException(status_code=401, detail=str(e))
@@ -1,12 +1,26 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from backend.app.core.security import create_access_token, verify_password
+from backend.app.core.cache import invalidate_token, invalidate_user
+from backend.app.core.security import (
+    averify_password,
+    create_access_token,
+    verify_password,
+    verify_token,
+)
 from backend.app.refresh_token.service import create_refresh_token
-from backend.app.user.service import get_user_by_username
+from backend.app.user.service import (
+    aget_user_by_username,
+    get_user_by_username,
+)
 from backend.app.refresh_token.service import (
     verify_refresh_token,
     regenerate_refresh_token,
     revoke_refresh_token,
+    acreate_refresh_token,
+    averify_refresh_token,
+    aregenerate_refresh_token,
+    arevoke_refresh_token,
 )
 
 from . import schemas
@@ -28,8 +42,16 @@ def login(
     return {"access_token": access_token, "refresh_token": refresh_token}
 
 
-def logout(db: Session, refresh_token: str):
+def forget_session(access_token: str):
+    # logout한 사용자의 cache를 지움 (다음 요청은 token 검증과 user 조회를 다시 함)
+    invalidate_user(verify_token(access_token)["user_id"])
+    invalidate_token(access_token)
+
+
+def logout(db: Session, refresh_token: str, access_token: str = None):
     revoke_refresh_token(db, token=refresh_token)
+    if access_token:
+        forget_session(access_token)
 
 
 def regenerate_token(
@@ -38,6 +60,47 @@ def regenerate_token(
     refresh_token = verify_refresh_token(
         db, refresh_token, user_agent, ip_address
     )
-    new_refresh_token = regenerate_refresh_token(refresh_token)
+    new_refresh_token = regenerate_refresh_token(db, refresh_token)
+    access_token = create_access_token(data={"user_id": refresh_token.user_id})
+    return {"access_token": access_token, "refresh_token": new_refresh_token}
+
+
+### async (API_MODE=async)
+async def alogin(
+    db: AsyncSession,
+    user: schemas.UserLogin,
+    user_agent: str,
+    ip_address: str,
+):
+    auth_user = await aget_user_by_username(db, user.username)
+    if not auth_user or not await averify_password(
+        user.password, auth_user.password
+    ):
+        raise ValueError("Invalid credentials")
+    access_token = create_access_token(data={"user_id": auth_user.id})
+    refresh_token = await acreate_refresh_token(
+        db,
+        auth_user.id,
+        user_agent,
+        ip_address,
+    )
+    return {"access_token": access_token, "refresh_token": refresh_token}
+
+
+async def alogout(
+    db: AsyncSession, refresh_token: str, access_token: str = None
+):
+    await arevoke_refresh_token(db, token=refresh_token)
+    if access_token:
+        forget_session(access_token)
+
+
+async def aregenerate_token(
+    db: AsyncSession, refresh_token: str, user_agent: str, ip_address: str
+):
+    refresh_token = await averify_refresh_token(
+        db, refresh_token, user_agent, ip_address
+    )
+    new_refresh_token = await aregenerate_refresh_token(db, refresh_token)
     access_token = create_access_token(data={"user_id": refresh_token.user_id})
     return {"access_token": access_token, "refresh_token": new_refresh_token}
@@ -0,0 +1,63 @@
+import os
+import time
+import threading
+
+from cachetools import TLRUCache, TTLCache
+
+# process 안에서만 쓰는 cache (worker process마다 따로 가짐)
+# 다른 process에서 바꾼 내용은 TTL이 지나야 반영되므로 TTL은 짧게 둠
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+# user cache에는 password hash 없이 조회용 값만 보관하고,
+# 이 process에서 user row를 바꾸면 바로 지움
+# 다른 worker에서 바꾼 내용(이름, email 등)은 최대 USER_CACHE_TTL 동안 반영되지 않을 수 있음
+# (login은 cache를 사용하지 않으므로 password 변경은 모든 worker에 바로 반영됨)
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))  # seconds
+
+
+class LockedCache:
+    # cachetools의 cache는 thread-safe하지 않으므로 lock으로 감쌈 (sync router는 여러 thread에서 실행됨)
+    def __init__(self, cache):
+        self._cache = cache
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            try:
+                self._cache[key] = value
+            except ValueError:
+                # cache 크기가 0이면 (cache 사용 안 함) 저장하지 않음
+                pass
+
+    def pop(self, key):
+        with self._lock:
+            return self._cache.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+def _claims_expire_at(_token, claims, now):
+    # 검증한 JWT claims는 token의 만료 시각(exp)까지만 보관
+    return claims.get("exp", now)
+
+
+# {access token: 검증한 claims}
+token_cache = LockedCache(
+    TLRUCache(TOKEN_CACHE_SIZE, ttu=_claims_expire_at, timer=time.time)
+)
+# {user id: user 정보(schemas.CachedUser)}
+user_cache = LockedCache(TTLCache(USER_CACHE_SIZE, ttl=USER_CACHE_TTL))
+
+
+def invalidate_token(token: str):
+    token_cache.pop(token)
+
+
+def invalidate_user(user_id: int):
+    user_cache.pop(user_id)
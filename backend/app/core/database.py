@@ -1,12 +1,11 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from dotenv import load_dotenv
 import os
 
-# SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-
 load_dotenv()
 user = os.getenv("DB_USER")
 password = os.getenv("DB_PASSWORD")
@@ -14,11 +13,66 @@ host = os.getenv("DB_HOST", "localhost")
 port = os.getenv("DB_PORT", "3306")
 database = os.getenv("DB_NAME", "mydb")
 
-DB_URL = f"mysql+pymysql://{user}:{password}@{host}:{port}/{database}"
-print(DB_URL)
+# DATABASE_URL로 직접 지정할 수 있음 (ex. 로컬: sqlite:///./test.db)
+DB_URL = os.getenv(
+    "DATABASE_URL",
+    f"mysql+pymysql://{user}:{password}@{host}:{port}/{database}",
+)
+
+# "sync": def router + Session, "async": async def router + AsyncSession
+API_MODE = os.getenv("API_MODE", "sync")
+
+# connection pool 설정
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds
+# 사용하기 전에 connection이 살아있는지 확인 (DB가 끊은 connection으로 요청이 실패하지 않도록)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# MySQL wait_timeout(기본 8시간)보다 먼저 connection을 새로 만듦
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+
+# 같은 DB에 async driver로 연결
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_url(url: str):
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
 
-engine = create_engine(DB_URL, echo=True)
+def engine_options(url: str):
+    options = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+    if url.startswith("sqlite"):
+        # sqlite connection을 FastAPI의 여러 thread에서 사용할 수 있도록 함
+        options["connect_args"] = {"check_same_thread": False}
+        # in-memory DB는 connection 하나만 사용하는 pool이라 크기 설정이 없음
+        if ":memory:" in url or url.endswith("://"):
+            return options
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+
+engine = create_engine(DB_URL, **engine_options(DB_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+ASYNC_DB_URL = async_url(DB_URL)
+async_engine = create_async_engine(
+    ASYNC_DB_URL, **engine_options(ASYNC_DB_URL)
+)
+# commit 후에도 객체의 값을 다시 읽지 않도록 (async에서는 lazy load를 할 수 없음)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
 Base = declarative_base()
 
 
@@ -28,3 +82,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
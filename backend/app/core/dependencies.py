@@ -0,0 +1,24 @@
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPBearer
+
+from backend.app.core.security import verify_token
+
+security = HTTPBearer()
+
+
+async def get_current_user_id(credentials=Depends(security)):
+    # Authorization: Bearer <access token>의 user_id
+    # JWT 확인은 가벼운 작업이라 threadpool을 거치지 않도록 async로 둠
+    try:
+        return verify_token(credentials.credentials)["user_id"]
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=401, detail=str(e))
+
+
+async def get_access_token(credentials=Depends(security)):
+    # 검증한 access token 원문 (logout에서 token cache를 지울 때 사용)
+    try:
+        verify_token(credentials.credentials)
+    except ValueError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    return credentials.credentials
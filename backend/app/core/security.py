@@ -1,5 +1,14 @@
+import os
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from backend.app.core.cache import token_cache
+
 from passlib.context import CryptContext
-from jose import JWTError, jwt
+from jose import ExpiredSignatureError, JWTError, jwt
 from datetime import datetime, timedelta
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -7,15 +16,106 @@ SECRET_KEY = "your_secret_key"  # TODO: Change this to a secure random key
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# bcrypt(요청 하나에 100~300ms CPU)를 처리할 process 수, 0이면 요청 thread에서 바로 실행
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(os.cpu_count() or 1)))
+# worker가 모두 바쁠 때 기다릴 수 있는 요청 수, 넘으면 기다리지 않고 바로 실패(503)
+PASSWORD_QUEUE_LIMIT = int(
+    os.getenv("PASSWORD_QUEUE_LIMIT", str(PASSWORD_WORKERS * 4))
+)
 
-def get_password_hash(password: str):
+
+class ServerBusyError(RuntimeError):
+    pass
+
+
+def _hash_password(password: str):
     return pwd_context.hash(password)
 
 
-def verify_password(plain_password: str, hashed_password: str):
+def _verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+class PasswordPool:
+    # bcrypt 작업을 별도 process pool에서 실행
+    # - 로그인이 몰려도 API의 threadpool/event loop가 bcrypt로 모두 막히지 않음
+    # - 처리 중 + 대기 중인 작업이 max_workers + queue_limit개를 넘으면 ServerBusyError
+    def __init__(
+        self,
+        max_workers: int = PASSWORD_WORKERS,
+        queue_limit: int = PASSWORD_QUEUE_LIMIT,
+    ):
+        self.max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(max_workers + queue_limit)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _new_executor(self):
+        # uvicorn은 여러 thread를 사용하므로 fork 대신 spawn으로 worker process를 만듦
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def submit(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            raise ServerBusyError("Too many password requests, try again")
+        try:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = self._new_executor()
+                try:
+                    future = self._executor.submit(function, *args)
+                except BrokenProcessPool:
+                    # worker process가 비정상 종료되면 pool 전체를 쓸 수 없으므로 새로 만듦
+                    self._executor = self._new_executor()
+                    future = self._executor.submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, function, *args):
+        # sync router(threadpool)에서 사용: 결과가 나올 때까지 기다림
+        if self.max_workers == 0:
+            return function(*args)
+        return self.submit(function, *args).result()
+
+    async def arun(self, function, *args):
+        # async router에서 사용: 기다리는 동안 event loop는 다른 요청을 처리
+        if self.max_workers == 0:
+            return await asyncio.to_thread(function, *args)
+        return await asyncio.wrap_future(self.submit(function, *args))
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+
+password_pool = PasswordPool()
+
+
+def get_password_hash(password: str):
+    return password_pool.run(_hash_password, password)
+
+
+def verify_password(plain_password: str, hashed_password: str):
+    return password_pool.run(_verify_password, plain_password, hashed_password)
+
+
+async def aget_password_hash(password: str):
+    return await password_pool.arun(_hash_password, password)
+
+
+async def averify_password(plain_password: str, hashed_password: str):
+    return await password_pool.arun(
+        _verify_password, plain_password, hashed_password
+    )
+
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (
@@ -26,10 +126,15 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
 
 
 def verify_token(token: str):
+    # 한 번 검증한 token은 만료될 때까지 다시 decode하지 않음 (잘못된 token은 저장하지 않음)
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        token_cache.set(token, payload)
         return payload
-    except jwt.ExpiredSignatureError:
+    except ExpiredSignatureError:
         raise ValueError("Token has expired")
-    except jwt.InvalidTokenError:
+    except JWTError:
         raise ValueError("Invalid token")
@@ -0,0 +1,91 @@
+from fastapi import APIRouter, Depends, HTTPException, Path
+from fastapi.security import HTTPBearer
+
+from backend.app.core.security import verify_token
+
+from . import schemas
+from .service import index_manager
+
+router = APIRouter(prefix="/index", tags=["index"])
+security = HTTPBearer()
+
+IndexName = Path(
+    pattern=schemas.NAME_PATTERN, max_length=schemas.NAME_MAX_LENGTH
+)
+
+
+def get_user_id(credentials=Depends(security)):
+    # 모든 index는 token의 user_id 아래에 저장되므로 다른 사용자의 index에는 접근할 수 없음
+    try:
+        return verify_token(credentials.credentials)["user_id"]
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=401, detail=str(e))
+
+
+def handle_errors(function, *args, **kwargs):
+    try:
+        return function(*args, **kwargs)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("", response_model=list[schemas.IndexInfo])
+def list_indexes(user_id: int = Depends(get_user_id)):
+    return index_manager.list(user_id)
+
+
+@router.get("/{name}", response_model=schemas.IndexInfo)
+def get_index(name: str = IndexName, user_id: int = Depends(get_user_id)):
+    return handle_errors(index_manager.info, user_id, name)
+
+
+@router.delete("/{name}")
+def drop_index(name: str = IndexName, user_id: int = Depends(get_user_id)):
+    handle_errors(index_manager.drop, user_id, name)
+    return {"detail": "Index deleted successfully"}
+
+
+@router.post("/{name}/documents", response_model=schemas.DocumentsUpdated)
+def add_documents(
+    documents: schemas.DocumentsAdd,
+    name: str = IndexName,
+    user_id: int = Depends(get_user_id),
+):
+    return handle_errors(
+        index_manager.add,
+        user_id,
+        name,
+        documents.ids,
+        documents.texts,
+        documents.metadatas,
+        documents.vectors,
+        version=documents.version,
+        total=documents.total,
+    )
+
+
+@router.post("/{name}/delete", response_model=schemas.DocumentsUpdated)
+def delete_documents(
+    documents: schemas.DocumentsDelete,
+    name: str = IndexName,
+    user_id: int = Depends(get_user_id),
+):
+    return handle_errors(index_manager.delete, user_id, name, documents.ids)
+
+
+@router.post("/{name}/query", response_model=list[schemas.QueryResult])
+def query_index(
+    query: schemas.Query,
+    name: str = IndexName,
+    user_id: int = Depends(get_user_id),
+):
+    return handle_errors(
+        index_manager.query,
+        user_id,
+        name,
+        query.vector,
+        query.k,
+        text=query.text,
+    )
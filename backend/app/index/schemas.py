@@ -0,0 +1,48 @@
+from pydantic import BaseModel, Field
+
+# index 이름은 파일 경로로 사용되므로 영문, 숫자, "-", "_", "."만 허용
+# ".", ".."처럼 "."로만 된 이름은 상위 folder를 가리키므로 허용하지 않음
+# (pydantic의 regex는 look-ahead를 지원하지 않아서 "." 아닌 문자가 하나 이상 있는지로 확인)
+NAME_PATTERN = r"^[A-Za-z0-9_.-]*[A-Za-z0-9_-][A-Za-z0-9_.-]*$"
+NAME_MAX_LENGTH = 128
+
+
+class DocumentsAdd(BaseModel):
+    ids: list[str]
+    texts: list[str]
+    metadatas: list[dict]
+    vectors: list[list[float]]
+    # client가 관리하는 index 버전 (ex. 원본 index manifest의 hash)
+    version: str | None = None
+    # 마지막 batch에 같이 보내는 전체 chunk 수 (중간 batch가 빠지지 않았는지 확인)
+    total: int | None = Field(default=None, ge=0)
+
+
+class DocumentsDelete(BaseModel):
+    ids: list[str]
+
+
+class Query(BaseModel):
+    vector: list[float]
+    k: int = Field(default=4, ge=1, le=100)
+    # query 원문을 보내면 BM25 검색 결과도 함께 사용 (hybrid)
+    text: str | None = None
+
+
+class QueryResult(BaseModel):
+    id: str
+    page_content: str
+    metadata: dict
+    score: float
+
+
+class IndexInfo(BaseModel):
+    name: str
+    count: int
+    dimension: int
+    version: str | None = None
+
+
+class DocumentsUpdated(BaseModel):
+    updated: int
+    count: int
@@ -0,0 +1,314 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.faiss import dependable_faiss_import
+
+from utils import ann_index, index_store
+from utils.hybrid_retriever import hybrid_search_by_vector
+from utils.sparse_index import SparseIndex
+
+INDEX_SERVICE_FOLDER = os.getenv(
+    "INDEX_SERVICE_FOLDER", "./.cache/index_service"
+)
+# 메모리에 올려둘 index 수
+# (넘으면 가장 오래 사용하지 않은 index부터 내림)
+MAX_LOADED_INDEXES = int(os.getenv("MAX_LOADED_INDEXES", "32"))
+# 마지막 batch가 오지 않은 채로 이 시간이 지난 업로드는 메모리에서 버림
+PENDING_UPLOAD_TTL = int(os.getenv("PENDING_UPLOAD_TTL", "600"))  # seconds
+
+
+class VectorsRequiredError(ValueError):
+    # ValueError이므로 router에서 400으로 응답함
+    pass
+
+
+class VectorOnlyEmbeddings(Embeddings):
+    # service는 client가 보낸 vector만 저장/검색하고,
+    # text를 직접 embedding하지 않음
+    def embed_documents(self, texts):
+        raise VectorsRequiredError(
+            "Index service only accepts vectors, send embedded texts."
+        )
+
+    def embed_query(self, text):
+        raise VectorsRequiredError(
+            "Index service only accepts vectors, send an embedded query."
+        )
+
+
+class IndexManager:
+    # 사용자별 index를 {folder}/{user_id}/{name}에 저장하고,
+    # 최근에 사용한 index만 메모리에 둠
+    # _indexes: {(user_id, name): (vector_store, sparse index, writable)}
+    # 같은 index에 대한 요청은 lock으로 순서대로 처리
+    # (FAISS는 쓰는 도중에 검색하면 안전하지 않음)
+    # 여러 batch로 나눠서 추가 중인 index는 마지막 batch까지 저장하지 않고
+    # 이 process의 메모리(writable)에만 둠 (_pending: {key: 마지막 batch 시각})
+    # 그래서 index service는 worker 하나로 실행해야 함 (index_main.py 참고)
+    def __init__(
+        self,
+        folder: str = INDEX_SERVICE_FOLDER,
+        max_loaded: int = MAX_LOADED_INDEXES,
+    ):
+        self.folder = folder
+        self.max_loaded = max_loaded
+        self.embeddings = VectorOnlyEmbeddings()
+        self._indexes = OrderedDict()
+        self._pending = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _path(self, user_id: int, name: str):
+        # ".." 등을 정리한 경로가 {folder}/{user_id} 바로 아래인지 확인
+        # (다른 사용자의 index를 읽거나 지우지 않도록)
+        # index 경로는 symlink이므로 realpath가 아닌 abspath로 확인
+        folder = os.path.abspath(f"{self.folder}/{user_id}")
+        path = os.path.abspath(f"{folder}/{name}")
+        if os.path.dirname(path) != folder:
+            raise ValueError(f"Invalid index name: {name}")
+        return path
+
+    def _index_lock(self, user_id: int, name: str):
+        with self._lock:
+            return self._locks.setdefault((user_id, name), threading.Lock())
+
+    def _load(
+        self,
+        user_id: int,
+        name: str,
+        writable: bool = False,
+        missing_ok: bool = False,
+    ):
+        # 검색: 검색용 ANN index(있으면)를 memory-map으로,
+        # BM25 index와 같이 불러옴
+        # 추가/삭제: flat index를 메모리에 불러옴
+        # (ANN/BM25 index는 저장할 때 다시 만듦)
+        # 반환값: (vector_store, sparse index)
+        key = (user_id, name)
+        path = self._path(user_id, name)
+        with self._lock:
+            cached = self._indexes.get(key)
+        if cached is not None:
+            vector_store, sparse, cached_writable = cached
+            if cached_writable or not writable:
+                # 추가 중인 index는 BM25 index를 마지막 batch에서 만들므로,
+                # 그 전까지는 vector 검색만 함
+                self._cache(
+                    user_id, name, vector_store, sparse, cached_writable
+                )
+                return vector_store, sparse
+
+        if not index_store.index_exists(path):
+            if missing_ok:
+                return None, None
+            raise LookupError(f"Index not found: {name}")
+
+        if writable:
+            vector_store = index_store.load_index(
+                path, self.embeddings, mmap=False
+            )
+            sparse = None
+        else:
+            version_path = index_store.resolve_index(path)
+            vector_store = index_store.load_index(
+                version_path, self.embeddings, ann=True
+            )
+            sparse = SparseIndex.load(version_path)
+        self._cache(user_id, name, vector_store, sparse, writable)
+        return vector_store, sparse
+
+    def _cache(
+        self,
+        user_id: int,
+        name: str,
+        vector_store: FAISS,
+        sparse: SparseIndex,
+        writable: bool,
+    ):
+        key = (user_id, name)
+        with self._lock:
+            self._indexes[key] = (vector_store, sparse, writable)
+            self._indexes.move_to_end(key)
+            # 마지막 batch 없이 PENDING_UPLOAD_TTL이 지난 업로드는 버림
+            now = time.monotonic()
+            for pending_key, updated_at in list(self._pending.items()):
+                if now - updated_at > PENDING_UPLOAD_TTL:
+                    self._pending.pop(pending_key)
+                    self._indexes.pop(pending_key, None)
+            while len(self._indexes) > self.max_loaded:
+                evicted, _ = self._indexes.popitem(last=False)
+                self._pending.pop(evicted, None)
+
+    def _evict(self, user_id: int, name: str):
+        with self._lock:
+            self._indexes.pop((user_id, name), None)
+            self._pending.pop((user_id, name), None)
+
+    def _save(
+        self,
+        user_id: int,
+        name: str,
+        vector_store: FAISS,
+        index_type: str = ann_index.INDEX_TYPE,
+        **fields,
+    ):
+        path = self._path(user_id, name)
+        manifest = index_store.read_manifest(path)
+        manifest.update(fields)
+        index_store.save_index(vector_store, path, manifest, index_type)
+
+    def info(self, user_id: int, name: str):
+        with self._index_lock(user_id, name):
+            vector_store, _ = self._load(user_id, name)
+            manifest = index_store.read_manifest(self._path(user_id, name))
+        return {
+            "name": name,
+            "count": vector_store.index.ntotal,
+            "dimension": vector_store.index.d,
+            "version": manifest.get("version"),
+        }
+
+    def list(self, user_id: int):
+        folder = f"{self.folder}/{user_id}"
+        if not os.path.exists(folder):
+            return []
+        return [
+            self.info(user_id, name)
+            for name in sorted(os.listdir(folder))
+            if index_store.index_exists(f"{folder}/{name}")
+        ]
+
+    def add(
+        self,
+        user_id: int,
+        name: str,
+        ids,
+        texts,
+        metadatas,
+        vectors,
+        version: str = None,
+        total: int = None,
+    ):
+        if not (len(ids) == len(texts) == len(metadatas) == len(vectors)):
+            raise ValueError("ids, texts, metadatas, vectors must match.")
+
+        with self._index_lock(user_id, name):
+            vector_store, _ = self._load(
+                user_id, name, writable=True, missing_ok=True
+            )
+            if vector_store is None and not vectors:
+                raise ValueError("No documents to index.")
+
+            dimension = (
+                vector_store.index.d if vector_store else len(vectors[0])
+            )
+            if any(len(vector) != dimension for vector in vectors):
+                raise ValueError(f"Vectors must have dimension {dimension}.")
+
+            # 이미 있는 id는 건너뜀 (같은 batch를 다시 보내도 중복되지 않음)
+            existing = (
+                set(vector_store.index_to_docstore_id.values())
+                if vector_store
+                else set()
+            )
+            new = {}
+            for i, id_ in enumerate(ids):
+                if id_ not in existing and id_ not in new:
+                    new[id_] = i
+
+            if vector_store is None:
+                faiss = dependable_faiss_import()
+                vector_store = FAISS(
+                    self.embeddings,
+                    faiss.IndexFlatL2(dimension),
+                    InMemoryDocstore(),
+                    {},
+                )
+            if new:
+                vector_store.add_embeddings(
+                    [(texts[i], vectors[i]) for i in new.values()],
+                    metadatas=[metadatas[i] for i in new.values()],
+                    ids=list(new.keys()),
+                )
+
+            # 여러 batch로 나눠서 올리는 동안에는 메모리에만 추가하고
+            # (batch마다 저장하면 전체를 매번 다시 씀),
+            # 마지막 batch(version이 있는 요청)에서
+            # ANN/BM25 index와 같이 한 번만 저장
+            if version is None:
+                with self._lock:
+                    self._pending[(user_id, name)] = time.monotonic()
+                self._cache(user_id, name, vector_store, None, writable=True)
+            elif total is not None and vector_store.index.ntotal != total:
+                # server가 재시작되거나 메모리에서 내려가서
+                # 앞의 batch가 빠진 경우는 저장하지 않음
+                # (client가 처음부터 다시 올림)
+                self._evict(user_id, name)
+                raise ValueError(
+                    f"Index has {vector_store.index.ntotal} documents,"
+                    f" expected {total}. Upload all batches again."
+                )
+            else:
+                self._save(user_id, name, vector_store, version=version)
+                self._evict(user_id, name)
+
+        return {"updated": len(new), "count": vector_store.index.ntotal}
+
+    def delete(self, user_id: int, name: str, ids):
+        with self._index_lock(user_id, name):
+            vector_store, _ = self._load(user_id, name, writable=True)
+            existing = set(vector_store.index_to_docstore_id.values())
+            removed = [id_ for id_ in set(ids) if id_ in existing]
+            if removed:
+                vector_store.delete(removed)
+                self._save(user_id, name, vector_store)
+                self._evict(user_id, name)
+
+        return {"updated": len(removed), "count": vector_store.index.ntotal}
+
+    def query(
+        self, user_id: int, name: str, vector, k: int = 4, text: str = None
+    ):
+        # text가 있으면 vector 검색과 BM25 검색 결과를 RRF로 합침
+        # (score는 RRF score)
+        # 없으면 vector 검색만 함 (score는 거리)
+        with self._index_lock(user_id, name):
+            vector_store, sparse = self._load(user_id, name)
+            if len(vector) != vector_store.index.d:
+                raise ValueError(
+                    f"Vector must have dimension {vector_store.index.d}."
+                )
+            if text:
+                results = hybrid_search_by_vector(
+                    vector_store, sparse, vector, text, k=k
+                )
+            else:
+                results = vector_store.similarity_search_with_score_by_vector(
+                    vector, k=k
+                )
+
+        return [
+            {
+                "id": doc.id,
+                "page_content": doc.page_content,
+                "metadata": doc.metadata,
+                "score": float(score),
+            }
+            for doc, score in results
+        ]
+
+    def drop(self, user_id: int, name: str):
+        with self._index_lock(user_id, name):
+            self._evict(user_id, name)
+            path = self._path(user_id, name)
+            if not os.path.exists(path):
+                raise LookupError(f"Index not found: {name}")
+            index_store.remove_index(path)
+
+
+index_manager = IndexManager()
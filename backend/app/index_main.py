@@ -0,0 +1,23 @@
+from fastapi import FastAPI
+
+from backend.app.index.router import router as index_router
+
+# FAISS index를 한 process에서만 들고 있도록 main API와 분리된 index service
+# streamlit worker가 여러 개여도 index는 문서당 한 번만 메모리에 올라감
+app = FastAPI(title="Index API", version="1.0.0")
+
+# 라우터 등록
+app.include_router(index_router)
+
+
+def main():
+    import uvicorn
+
+    # index를 process 메모리에 들고 있으므로 worker는 하나만 사용
+    # (여러 batch로 나눠서 올리는 중인 index도 이 process에만 있으므로,
+    # worker가 여러 개면 batch가 다른 worker로 가서 업로드가 실패함)
+    uvicorn.run(app, host="127.0.0.1", port=8001, workers=1)
+
+
+if __name__ == "__main__":
+    main()
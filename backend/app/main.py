@@ -1,19 +1,50 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
 
-from backend.app.core.database import engine, Base
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 
-from backend.app.user.router import router as user_router
-from backend.app.auth.router import router as auth_router
+from backend.app.core.database import API_MODE, Base, async_engine, engine
+from backend.app.core.security import ServerBusyError, password_pool
+
+if API_MODE == "async":
+    from backend.app.user.async_router import router as user_router
+    from backend.app.auth.async_router import router as auth_router
+else:
+    from backend.app.user.router import router as user_router
+    from backend.app.auth.router import router as auth_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # DB 테이블 생성 (async mode에서는 sync driver 없이 async engine으로 생성)
+    if API_MODE == "async":
+        async with async_engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+    else:
+        Base.metadata.create_all(bind=engine)
+    yield
+    await async_engine.dispose()
+    engine.dispose()
+    password_pool.shutdown()
+
+
+app = FastAPI(title="My API", version="1.0.0", lifespan=lifespan)
+
+
+# bcrypt worker가 모두 바쁘고 대기열도 가득 찬 경우, 기다리지 않고 바로 503
+@app.exception_handler(ServerBusyError)
+async def server_busy_handler(request: Request, exc: ServerBusyError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
 
-app = FastAPI(title="My API", version="1.0.0")
 
 # 라우터 등록
 app.include_router(user_router)
 app.include_router(auth_router)
 
-# DB 테이블 생성
-Base.metadata.create_all(bind=engine)
-
 
 def main():
     import uvicorn
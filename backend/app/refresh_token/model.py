@@ -1,5 +1,13 @@
 import enum
-from sqlalchemy import Column, ForeignKey, Enum, Integer, String, DateTime
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Enum,
+    Index,
+    Integer,
+    String,
+    DateTime,
+)
 from datetime import datetime
 from backend.app.core.database import Base
 
@@ -15,7 +23,9 @@ class RefreshToken(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
-    token = Column(String(255), nullable=False)
+    # token 원문 대신 SHA-256 hash(hex 64자)를 저장하고, (hash, status) index로 찾음
+    # (기존 DB는 python -m backend.migrations.refresh_token_hash로 변경)
+    token_hash = Column(String(64), nullable=False)
     user_agent = Column(String(255), nullable=True)
     ip_address = Column(String(45), nullable=True)
     status = Column(Enum(StatusEnum), default=StatusEnum.active)
@@ -24,3 +34,7 @@ class RefreshToken(Base):
     updated_at = Column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
+
+    __table_args__ = (
+        Index("ix_refresh_token_token_hash_status", "token_hash", "status"),
+    )
@@ -1,41 +1,94 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from . import model, schemas
+from . import model
 
+# commit=False: 호출하는 쪽에서 다른 작업과 한 transaction으로 묶어서 commit함
 
-def save_refresh_token(db: Session, refresh_token: model.RefreshToken):
-    db_refresh_token = model.RefreshToken(
-        user_id=refresh_token.user_id,
-        token=refresh_token.token,
-        user_agent=refresh_token.user_agent,
-        ip_address=refresh_token.ip_address,
-        expires_at=refresh_token.expires_at,
+
+def add_refresh_token(
+    db: Session, refresh_token: model.RefreshToken, commit: bool = True
+):
+    db.add(refresh_token)
+    if commit:
+        db.commit()
+    return refresh_token
+
+
+def get_active_refresh_token(db: Session, token_hash: str):
+    # (token_hash, status) index로 찾음
+    return db.scalars(
+        select(model.RefreshToken).where(
+            model.RefreshToken.token_hash == token_hash,
+            model.RefreshToken.status == model.StatusEnum.active,
+        )
+    ).first()
+
+
+def deactivate_refresh_token(
+    db: Session,
+    status: model.StatusEnum,
+    token_id: int = None,
+    token_hash: str = None,
+    commit: bool = True,
+):
+    # active인 token만 status를 바꾸는 UPDATE 한 번 (다시 조회하지 않음)
+    # 반환값: 바뀐 row 수 (0이면 이미 사용/폐기된 token)
+    condition = (
+        model.RefreshToken.id == token_id
+        if token_id is not None
+        else model.RefreshToken.token_hash == token_hash
+    )
+    result = db.execute(
+        update(model.RefreshToken)
+        .where(condition, model.RefreshToken.status == model.StatusEnum.active)
+        .values(status=status)
+        .execution_options(synchronize_session=False)
     )
-    db.add(db_refresh_token)
-    db.commit()
-    db.refresh(db_refresh_token)
-    return db_refresh_token
-
-
-def get_refresh_token_by_token(db: Session, refresh_token: str):
-    return (
-        db.query(model.RefreshToken)
-        .filter(
-            model.RefreshToken.token == refresh_token,
-            model.RefreshToken.status == "active",
+    if commit:
+        db.commit()
+    return result.rowcount
+
+
+### async (API_MODE=async)
+async def aadd_refresh_token(
+    db: AsyncSession, refresh_token: model.RefreshToken, commit: bool = True
+):
+    db.add(refresh_token)
+    if commit:
+        await db.commit()
+    return refresh_token
+
+
+async def aget_active_refresh_token(db: AsyncSession, token_hash: str):
+    result = await db.scalars(
+        select(model.RefreshToken).where(
+            model.RefreshToken.token_hash == token_hash,
+            model.RefreshToken.status == model.StatusEnum.active,
         )
-        .first()
     )
+    return result.first()
 
 
-def update_refresh_token(db: Session, token_id: int, status: str):
-    token = (
-        db.query(model.RefreshToken)
-        .filter(model.RefreshToken.id == token_id)
-        .first()
+async def adeactivate_refresh_token(
+    db: AsyncSession,
+    status: model.StatusEnum,
+    token_id: int = None,
+    token_hash: str = None,
+    commit: bool = True,
+):
+    condition = (
+        model.RefreshToken.id == token_id
+        if token_id is not None
+        else model.RefreshToken.token_hash == token_hash
     )
-    if token:
-        token.status = status
-        db.commit()
-        db.refresh(token)
-    return token
+    result = await db.execute(
+        update(model.RefreshToken)
+        .where(condition, model.RefreshToken.status == model.StatusEnum.active)
+        .values(status=status)
+        .execution_options(synchronize_session=False)
+    )
+    if commit:
+        await db.commit()
+    return result.rowcount
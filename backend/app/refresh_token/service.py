@@ -1,4 +1,6 @@
+import hashlib
 import secrets
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
@@ -7,6 +9,28 @@ from . import model, repository
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
 
+def hash_token(refresh_token: str):
+    # token은 32 byte 난수라 salt 없이 SHA-256으로 충분함 (DB에는 원문이 남지 않음)
+    return hashlib.sha256(refresh_token.encode("utf-8")).hexdigest()
+
+
+def new_refresh_token(
+    user_id, user_agent, ip_address, expires_delta: timedelta = None
+):
+    # 반환값: (client에 보낼 token 원문, DB에 저장할 RefreshToken)
+    refresh_token = secrets.token_urlsafe(32)
+    expire = datetime.utcnow() + (
+        expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+    return refresh_token, model.RefreshToken(
+        user_id=user_id,
+        token_hash=hash_token(refresh_token),
+        user_agent=user_agent,
+        ip_address=ip_address,
+        expires_at=expire,
+    )
+
+
 def create_refresh_token(
     db: Session,
     user_id,
@@ -14,27 +38,19 @@ def create_refresh_token(
     ip_address,
     expires_delta: timedelta = None,
 ):
-    print(f"user_id: {user_id}")
-    refresh_token = secrets.token_urlsafe(32)
-    expire = datetime.utcnow() + (
-        expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    refresh_token, db_refresh_token = new_refresh_token(
+        user_id, user_agent, ip_address, expires_delta
     )
-    return repository.save_refresh_token(
-        db,
-        model.RefreshToken(
-            user_id=user_id,
-            token=refresh_token,
-            user_agent=user_agent,
-            ip_address=ip_address,
-            expires_at=expire,
-        ),
-    ).token
+    repository.add_refresh_token(db, db_refresh_token)
+    return refresh_token
 
 
 def verify_refresh_token(
     db: Session, refresh_token: str, user_agent: str, ip_address: str
 ):
-    refresh_token = repository.get_refresh_token_by_token(db, refresh_token)
+    refresh_token = repository.get_active_refresh_token(
+        db, hash_token(refresh_token)
+    )
 
     if not refresh_token:
         raise ValueError("Invalid refresh token")
@@ -43,29 +59,108 @@ def verify_refresh_token(
     elif refresh_token.ip_address != ip_address:
         raise ValueError("IP address does not match")
     elif refresh_token.expires_at < datetime.utcnow():
-        repository.update_refresh_token(db, refresh_token.id, "expired")
+        repository.deactivate_refresh_token(
+            db, model.StatusEnum.expired, token_id=refresh_token.id
+        )
         raise ValueError("Refresh token has expired")
     else:
         return refresh_token
 
 
 def regenerate_refresh_token(db: Session, refresh_token: model.RefreshToken):
-    revoke_refresh_token(db, token_id=refresh_token.id)
-    new_refresh_token = create_refresh_token(
-        db,
-        {
-            "user_id": refresh_token.user_id,
-            "user_agent": refresh_token.user_agent,
-            "ip_address": refresh_token.ip_address,
-        },
+    # 기존 token 폐기(UPDATE)와 새 token 저장(INSERT)을 한 transaction으로 처리 (commit 한 번)
+    # 같은 token으로 동시에 요청이 와도 active인 row를 바꾼 요청 하나만 성공함
+    if not repository.deactivate_refresh_token(
+        db, model.StatusEnum.revoked, token_id=refresh_token.id, commit=False
+    ):
+        db.rollback()
+        raise ValueError("Refresh token has already been used")
+
+    new_token, db_refresh_token = new_refresh_token(
+        refresh_token.user_id,
+        refresh_token.user_agent,
+        refresh_token.ip_address,
     )
-    return new_refresh_token
+    repository.add_refresh_token(db, db_refresh_token, commit=False)
+    db.commit()
+    return new_token
 
 
 def revoke_refresh_token(db: Session, token_id: int = None, token: str = None):
     if token_id:
-        repository.update_refresh_token(db, token_id, "revoked")
+        repository.deactivate_refresh_token(
+            db, model.StatusEnum.revoked, token_id=token_id
+        )
+    elif token:
+        repository.deactivate_refresh_token(
+            db, model.StatusEnum.revoked, token_hash=hash_token(token)
+        )
+
+
+### async (API_MODE=async)
+async def acreate_refresh_token(
+    db: AsyncSession,
+    user_id,
+    user_agent,
+    ip_address,
+    expires_delta: timedelta = None,
+):
+    refresh_token, db_refresh_token = new_refresh_token(
+        user_id, user_agent, ip_address, expires_delta
+    )
+    await repository.aadd_refresh_token(db, db_refresh_token)
+    return refresh_token
+
+
+async def averify_refresh_token(
+    db: AsyncSession, refresh_token: str, user_agent: str, ip_address: str
+):
+    refresh_token = await repository.aget_active_refresh_token(
+        db, hash_token(refresh_token)
+    )
+
+    if not refresh_token:
+        raise ValueError("Invalid refresh token")
+    elif refresh_token.user_agent != user_agent:
+        raise ValueError("User agent does not match")
+    elif refresh_token.ip_address != ip_address:
+        raise ValueError("IP address does not match")
+    elif refresh_token.expires_at < datetime.utcnow():
+        await repository.adeactivate_refresh_token(
+            db, model.StatusEnum.expired, token_id=refresh_token.id
+        )
+        raise ValueError("Refresh token has expired")
+    else:
+        return refresh_token
+
+
+async def aregenerate_refresh_token(
+    db: AsyncSession, refresh_token: model.RefreshToken
+):
+    if not await repository.adeactivate_refresh_token(
+        db, model.StatusEnum.revoked, token_id=refresh_token.id, commit=False
+    ):
+        await db.rollback()
+        raise ValueError("Refresh token has already been used")
+
+    new_token, db_refresh_token = new_refresh_token(
+        refresh_token.user_id,
+        refresh_token.user_agent,
+        refresh_token.ip_address,
+    )
+    await repository.aadd_refresh_token(db, db_refresh_token, commit=False)
+    await db.commit()
+    return new_token
+
+
+async def arevoke_refresh_token(
+    db: AsyncSession, token_id: int = None, token: str = None
+):
+    if token_id:
+        await repository.adeactivate_refresh_token(
+            db, model.StatusEnum.revoked, token_id=token_id
+        )
     elif token:
-        refresh_token = repository.get_refresh_token_by_token(db, token)
-        if refresh_token:
-            repository.update_refresh_token(db, refresh_token.id, "revoked")
+        await repository.adeactivate_refresh_token(
+            db, model.StatusEnum.revoked, token_hash=hash_token(token)
+        )
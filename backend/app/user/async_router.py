@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.database import get_async_db
+from backend.app.core.dependencies import get_current_user_id
+
+from . import service, schemas
+
+# router.py와 같은 API를 async로 처리 (API_MODE=async)
+router = APIRouter(prefix="/user", tags=["user"])
+
+
+@router.post("/sign_up", response_model=schemas.UserRead)
+async def signup(
+    user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        return await service.aregister_user(db, user)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/me", response_model=schemas.UserRead)
+async def me(
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        return await service.aget_user(db, user_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -1,12 +1,22 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from . import model, schemas
 
 
+def get_user_by_id(db: Session, user_id: int):
+    return db.get(model.User, user_id)
+
+
 def get_user_by_username(db: Session, username: str):
     return db.query(model.User).filter(model.User.username == username).first()
 
 
+def get_user_by_email(db: Session, email: str):
+    return db.query(model.User).filter(model.User.email == email).first()
+
+
 def create_user(db: Session, user: schemas.UserCreate, hashed_pw: str):
     db_user = model.User(
         username=user.username,
@@ -18,3 +28,37 @@ def create_user(db: Session, user: schemas.UserCreate, hashed_pw: str):
     db.commit()
     db.refresh(db_user)
     return db_user
+
+
+### async (API_MODE=async)
+async def aget_user_by_id(db: AsyncSession, user_id: int):
+    return await db.get(model.User, user_id)
+
+
+async def aget_user_by_username(db: AsyncSession, username: str):
+    result = await db.execute(
+        select(model.User).where(model.User.username == username)
+    )
+    return result.scalars().first()
+
+
+async def aget_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(
+        select(model.User).where(model.User.email == email)
+    )
+    return result.scalars().first()
+
+
+async def acreate_user(
+    db: AsyncSession, user: schemas.UserCreate, hashed_pw: str
+):
+    db_user = model.User(
+        username=user.username,
+        email=user.email,
+        password=hashed_pw,
+        full_name=user.full_name,
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
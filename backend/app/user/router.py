@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from backend.app.core.database import get_db
+from backend.app.core.dependencies import get_current_user_id
 
 from . import service, schemas
 
@@ -14,3 +15,14 @@ def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
         return service.register_user(db, user)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/me", response_model=schemas.UserRead)
+def me(
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    try:
+        return service.get_user(db, user_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -14,3 +14,14 @@ class UserRead(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class CachedUser(BaseModel):
+    # user_cache에 보관하는 값 (password hash는 보관하지 않음)
+    id: int
+    username: str
+    email: EmailStr
+    full_name: str | None = None
+
+    class Config:
+        from_attributes = True
@@ -1,7 +1,24 @@
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from backend.app.core.security import get_password_hash
-from . import repository, schemas
+from backend.app.core.cache import invalidate_user, user_cache
+from backend.app.core.security import aget_password_hash, get_password_hash
+from . import model, repository, schemas
+
+
+def _cache_user(user):
+    # row가 아닌 필요한 값만 복사해서 보관 (password hash는 제외)
+    cached = schemas.CachedUser.model_validate(user)
+    user_cache.set(user.id, cached)
+    return cached
+
+
+# user row가 바뀌거나(password 변경, 비활성화 등) 지워지면 cache에서도 지움
+@event.listens_for(model.User, "after_update")
+@event.listens_for(model.User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    invalidate_user(target.id)
 
 
 def register_user(db: Session, user: schemas.UserCreate):
@@ -12,5 +29,39 @@ def register_user(db: Session, user: schemas.UserCreate):
     return repository.create_user(db, user, hashed_pw)
 
 
+def get_user(db: Session, user_id: int):
+    user = user_cache.get(user_id)
+    if user is None:
+        user = repository.get_user_by_id(db, user_id)
+        if not user:
+            raise LookupError("User not found")
+        user = _cache_user(user)
+    return user
+
+
+# login에서 password hash를 확인하므로 cache를 사용하지 않고 항상 DB에서 읽음
 def get_user_by_username(db: Session, username: str):
     return repository.get_user_by_username(db, username)
+
+
+### async (API_MODE=async)
+async def aregister_user(db: AsyncSession, user: schemas.UserCreate):
+    db_user = await repository.aget_user_by_email(db, email=user.email)
+    if db_user:
+        raise ValueError("Email already registered")
+    hashed_pw = await aget_password_hash(user.password)
+    return await repository.acreate_user(db, user, hashed_pw)
+
+
+async def aget_user(db: AsyncSession, user_id: int):
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await repository.aget_user_by_id(db, user_id)
+        if not user:
+            raise LookupError("User not found")
+        user = _cache_user(user)
+    return user
+
+
+async def aget_user_by_username(db: AsyncSession, username: str):
+    return await repository.aget_user_by_username(db, username)
@@ -0,0 +1,93 @@
+# usage: python -m backend.migrations.refresh_token_hash
+# refresh_token.token(원문) -> refresh_token.token_hash(SHA-256) 변경을 기존 DB에 반영
+# 1. token_hash column 추가
+# 2. 기존 token 원문을 hash로 바꿔서 채움 (이미 발급된 token은 그대로 사용할 수 있음)
+# 3. token column 삭제 (DB에 원문이 남지 않도록)
+# 4. (token_hash, status) index 생성
+# 여러 번 실행해도 됨 (이미 반영된 단계는 건너뜀)
+# 실행하는 동안에는 backend를 멈춰야 함 (이전 code는 token column을, 새 code는 token_hash column을 사용)
+from sqlalchemy import inspect, text
+
+from backend.app.core.database import Base, engine
+from backend.app.refresh_token import model
+from backend.app.refresh_token.service import hash_token
+
+# user 테이블 등 다른 model도 metadata에 등록 (refresh_token이 없을 때 create_all에서 foreign key로 필요)
+from backend.app.user import model as user_model  # noqa: F401
+
+TABLE = model.RefreshToken.__tablename__
+BATCH_SIZE = 1000
+
+
+def columns(connection):
+    return {
+        column["name"] for column in inspect(connection).get_columns(TABLE)
+    }
+
+
+def backfill(connection):
+    # id 순서대로 BATCH_SIZE개씩 hash를 계산해서 채움 (MySQL/SQLite 모두 같은 방식으로 처리)
+    last_id, count = 0, 0
+    while True:
+        rows = connection.execute(
+            text(
+                f"SELECT id, token FROM {TABLE}"
+                " WHERE id > :last_id AND token_hash IS NULL"
+                " ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            return count
+        connection.execute(
+            text(
+                f"UPDATE {TABLE} SET token_hash = :token_hash WHERE id = :id"
+            ),
+            [
+                {"id": id_, "token_hash": hash_token(token)}
+                for id_, token in rows
+            ],
+        )
+        last_id, count = rows[-1][0], count + len(rows)
+
+
+def main():
+    if not inspect(engine).has_table(TABLE):
+        Base.metadata.create_all(bind=engine)
+        print(f"{TABLE}: created")
+        return
+
+    with engine.begin() as connection:
+        if "token_hash" not in columns(connection):
+            connection.execute(
+                text(f"ALTER TABLE {TABLE} ADD COLUMN token_hash VARCHAR(64)")
+            )
+            print(f"{TABLE}.token_hash: added")
+
+    with engine.begin() as connection:
+        if "token" in columns(connection):
+            print(f"{TABLE}.token_hash: {backfill(connection)} rows hashed")
+            connection.execute(text(f"ALTER TABLE {TABLE} DROP COLUMN token"))
+            print(f"{TABLE}.token: dropped")
+
+    with engine.begin() as connection:
+        # SQLite는 column 속성을 바꿀 수 없으므로 MySQL에서만 NOT NULL로 바꿈
+        if connection.dialect.name == "mysql":
+            connection.execute(
+                text(
+                    f"ALTER TABLE {TABLE}"
+                    " MODIFY token_hash VARCHAR(64) NOT NULL"
+                )
+            )
+
+        existing = {
+            index["name"] for index in inspect(connection).get_indexes(TABLE)
+        }
+        for index in model.RefreshToken.__table__.indexes:
+            if index.name not in existing:
+                index.create(connection)
+                print(f"{index.name}: created")
+
+
+if __name__ == "__main__":
+    main()
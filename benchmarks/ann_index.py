@@ -0,0 +1,116 @@
+# usage: python -m benchmarks.ann_index [count] [dimension]
+import sys
+import time
+
+import numpy as np
+
+from utils import ann_index
+from langchain_community.vectorstores.faiss import dependable_faiss_import
+
+COUNT = 100_000
+DIMENSION = 128
+CLUSTERS = 500  # 실제 embedding처럼 vector들이 주제별로 모여있도록 만듦
+LATENT_DIMENSION = (
+    32  # embedding은 차원 수에 비해 실제 정보가 담긴 차원이 적음
+)
+QUERY_COUNT = 200
+K = 10
+
+# (이름, index type, build params, search params 목록)
+CONFIGS = [
+    ("flat", "flat", {}, [{}]),
+    (
+        "hnsw M=32",
+        "hnsw",
+        {"m": 32},
+        [{"ef_search": ef} for ef in (16, 32, 64, 128)],
+    ),
+    (
+        "ivf",
+        "ivf",
+        {},
+        [{"nprobe": nprobe} for nprobe in (1, 4, 16, 64)],
+    ),
+    *(
+        (
+            f"ivfpq m={m}",
+            "ivfpq",
+            {"m": m},
+            [{"nprobe": nprobe} for nprobe in (4, 16, 64)],
+        )
+        for m in (8, 16, 32)
+    ),
+]
+
+
+def make_vectors(count, dimension, seed=0):
+    # 저차원 공간의 cluster들을 dimension 차원으로 투영 (projection은 항상 같음)
+    projection = np.random.default_rng(42).normal(
+        size=(LATENT_DIMENSION, dimension)
+    )
+    rng = np.random.default_rng(seed)
+    centers = np.random.default_rng(43).normal(
+        size=(CLUSTERS, LATENT_DIMENSION)
+    )
+    labels = rng.integers(0, CLUSTERS, size=count)
+    latent = centers[labels] + rng.normal(
+        scale=0.5, size=(count, LATENT_DIMENSION)
+    )
+    noise = rng.normal(scale=0.05, size=(count, dimension))
+    return (latent @ projection + noise).astype("float32")
+
+
+def recall(found, truth):
+    return np.mean(
+        [len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]
+    )
+
+
+def search_latency(index, queries):
+    # retriever처럼 query를 하나씩 검색
+    start = time.perf_counter()
+    results = [index.search(query[None, :], K)[1][0] for query in queries]
+    elapsed = time.perf_counter() - start
+    return results, elapsed / len(queries) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else COUNT
+    dimension = int(sys.argv[2]) if len(sys.argv) > 2 else DIMENSION
+    faiss = dependable_faiss_import()
+    faiss.omp_set_num_threads(1)
+
+    vectors = make_vectors(count, dimension)
+    queries = make_vectors(QUERY_COUNT, dimension, seed=1)
+
+    flat = faiss.IndexFlatL2(dimension)
+    flat.add(vectors)
+    truth = flat.search(queries, K)[1]
+
+    print(f"{count} vectors, dimension {dimension}, recall@{K}")
+    print(f"auto -> {ann_index.choose_index_type(count)}")
+    print(
+        f"{'index':<12} {'search':<16} {'build s':>8} {'MB':>8}"
+        f" {'recall':>7} {'ms/query':>9}"
+    )
+    for name, index_type, build_params, search_params in CONFIGS:
+        start = time.perf_counter()
+        index, settings = ann_index.build(flat, index_type, **build_params)
+        build_seconds = time.perf_counter() - start
+        if index is None:
+            index = flat
+        size_mb = len(faiss.serialize_index(index)) / 1024 / 1024
+
+        for params in search_params:
+            ann_index.configure(index, settings["type"], params)
+            found, latency = search_latency(index, queries)
+            label = ", ".join(f"{k}={v}" for k, v in params.items()) or "-"
+            print(
+                f"{name:<12} {label:<16} {build_seconds:>8.2f}"
+                f" {size_mb:>8.1f} {recall(found, truth):>7.3f}"
+                f" {latency:>9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# usage: python -m benchmarks.audio_segmentation
+import time
+
+import numpy as np
+
+from utils.audio import (
+    FRAME_MS,
+    SAMPLE_RATE,
+    find_silences,
+    frame_energies,
+    plan_cuts,
+)
+
+DURATION = 60 * 60  # 1시간
+TARGETS = [30, 120, 300, 600]
+
+
+def synthetic_speech(duration, seed=0):
+    # 1~8초 길이의 "발화"(noise)와 0.2~1.5초 길이의 무음(약한 noise)이 번갈아 나오는 오디오
+    rng = np.random.default_rng(seed)
+    samples = np.empty(duration * SAMPLE_RATE, dtype=np.int16)
+    speech = []
+    position = 0
+    while position < len(samples):
+        length = int(rng.uniform(1, 8) * SAMPLE_RATE)
+        end = min(position + length, len(samples))
+        samples[position:end] = rng.normal(0, 4000, end - position)
+        speech.append((position / SAMPLE_RATE, end / SAMPLE_RATE))
+        position = end
+
+        length = int(rng.uniform(0.2, 1.5) * SAMPLE_RATE)
+        end = min(position + length, len(samples))
+        samples[position:end] = rng.normal(0, 30, end - position)
+        position = end
+    return samples, np.array(speech)
+
+
+def cuts_inside_speech(cuts, speech):
+    cuts = np.asarray(cuts)
+    inside = (cuts[:, None] > speech[:, 0]) & (cuts[:, None] < speech[:, 1])
+    return int(inside.any(axis=1).sum())
+
+
+def main():
+    samples, speech = synthetic_speech(DURATION)
+    print(f"synthetic audio: {DURATION}s, {len(speech)} utterances\n")
+
+    # 실제로는 ffmpeg에서 READ_FRAMES 단위로 읽으면서 계산하지만, 여기서는 계산 시간만 측정
+    start = time.perf_counter()
+    energies = frame_energies(samples)
+    silences = find_silences(energies)
+    analysis = time.perf_counter() - start
+    print(
+        f"energy + silence detection: {analysis * 1000:.0f}ms"
+        f" ({len(energies)} frames of {FRAME_MS}ms,"
+        f" {len(silences)} silences)\n"
+    )
+
+    print(
+        f"{'target':>6} {'mode':<14} {'segments':>8}"
+        f" {'cuts in speech':>14} {'plan ms':>8}"
+    )
+    for target in TARGETS:
+        fixed = list(np.arange(target, DURATION, target, dtype=float))
+        print(
+            f"{target:>6} {'fixed':<14} {len(fixed) + 1:>8}"
+            f" {cuts_inside_speech(fixed, speech):>14} {'-':>8}"
+        )
+
+        start = time.perf_counter()
+        cuts = plan_cuts(silences, DURATION, target, target * 2)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(
+            f"{target:>6} {'silence-aware':<14} {len(cuts) + 1:>8}"
+            f" {cuts_inside_speech(cuts, speech):>14} {elapsed:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
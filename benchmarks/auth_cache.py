@@ -0,0 +1,62 @@
+# usage: python -m benchmarks.auth_cache
+# 인증이 필요한 요청마다 하는 작업(JWT 검증 + user 조회)을 cache가 있을 때와 없을 때 비교
+import os
+import time
+import tempfile
+
+RUNS = 2000
+
+
+def measure(function, runs=RUNS):
+    start = time.perf_counter()
+    for _ in range(runs):
+        function()
+    return (time.perf_counter() - start) / runs * 1_000_000
+
+
+def main():
+    folder = tempfile.mkdtemp()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{folder}/cache.db")
+    os.environ.setdefault("PASSWORD_WORKERS", "0")
+
+    from backend.app.core.cache import token_cache, user_cache
+    from backend.app.core.database import Base, SessionLocal, engine
+    from backend.app.core.security import create_access_token, verify_token
+    from backend.app.user import schemas, service
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = service.register_user(
+            db,
+            schemas.UserCreate(
+                username="cache", email="cache@example.com", password="pw"
+            ),
+        )
+        user_id = user.id
+    token = create_access_token({"user_id": user_id})
+
+    def authenticate():
+        # /user/me와 같은 작업: token 검증 후 user 조회
+        with SessionLocal() as db:
+            claims = verify_token(token)
+            return service.get_user(db, claims["user_id"])
+
+    def uncached():
+        token_cache.clear()
+        user_cache.clear()
+        return authenticate()
+
+    print(f"{'step':<22} {'no cache us':>12} {'cached us':>10}")
+    token_cache.clear()
+    cold = measure(lambda: (token_cache.clear(), verify_token(token)))
+    warm = measure(lambda: verify_token(token))
+    print(f"{'verify_token':<22} {cold:>12.1f} {warm:>10.1f}")
+
+    cold = measure(uncached)
+    authenticate()
+    warm = measure(authenticate)
+    print(f"{'verify + get_user':<22} {cold:>12.1f} {warm:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# usage: python -m benchmarks.backend_load
+# backend(main.py)를 API_MODE=sync/async로 각각 띄운 뒤 같은 부하를 주고 requests/sec를 비교
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import subprocess
+
+import httpx
+import numpy as np
+
+PORT = 8765
+BASE = f"http://127.0.0.1:{PORT}"
+CONCURRENCY = 50
+DURATION = 5  # seconds
+USER = {"username": "load", "email": "load@example.com", "password": "pw"}
+
+
+def start_server(mode, folder, **env):
+    env = {
+        **os.environ,
+        "API_MODE": mode,
+        "DATABASE_URL": f"sqlite:///{folder}/{mode}.db",
+        **env,
+    }
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "backend.app.main:app",
+            "--port",
+            str(PORT),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"{BASE}/docs", timeout=1)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("Server did not start")
+
+
+async def worker(client, headers, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get("/user/me", headers=headers)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            errors.append(1)
+
+
+async def load(access_token):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=CONCURRENCY)
+    async with httpx.AsyncClient(
+        base_url=BASE, limits=limits, timeout=30
+    ) as client:
+        deadline = time.perf_counter() + DURATION
+        await asyncio.gather(
+            *(
+                worker(client, headers, deadline, latencies, errors)
+                for _ in range(CONCURRENCY)
+            )
+        )
+    return np.array(latencies), len(errors)
+
+
+def run(mode, folder):
+    server = start_server(mode, folder)
+    try:
+        httpx.post(f"{BASE}/user/sign_up", json=USER)
+        response = httpx.post(
+            f"{BASE}/auth/login",
+            json={"username": USER["username"], "password": USER["password"]},
+        )
+        response.raise_for_status()
+        latencies, errors = asyncio.run(load(response.json()["access_token"]))
+    finally:
+        server.terminate()
+        server.wait()
+    return latencies, errors
+
+
+def main():
+    print(
+        f"GET /user/me, {CONCURRENCY} concurrent clients, {DURATION}s,"
+        " sqlite"
+    )
+    print(
+        f"{'mode':<6} {'requests':>9} {'req/s':>8} {'p50 ms':>8}"
+        f" {'p99 ms':>8} {'errors':>7}"
+    )
+    with tempfile.TemporaryDirectory() as folder:
+        for mode in ("sync", "async"):
+            latencies, errors = run(mode, folder)
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            print(
+                f"{mode:<6} {len(latencies):>9} {len(latencies) / DURATION:>8.0f}"
+                f" {p50:>8.1f} {p99:>8.1f} {errors:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# usage: python -m benchmarks.chat_streaming
+import time
+
+from utils.chat_callback_handler import ChatCallbackHandler
+
+TOKENS = 1000
+TOKEN_INTERVAL = 0.002  # 모델이 token을 내보내는 간격 (500 tokens/s)
+
+
+class RecordingBox:
+    # st.empty() 대신 사용: write 횟수와 websocket으로 보냈을 글자 수를 셈
+    def __init__(self):
+        self.writes = 0
+        self.chars = 0
+
+    def write(self, text):
+        self.writes += 1
+        self.chars += len(text)
+
+
+class RecordingSession:
+    def __init__(self):
+        self.messages = []
+        self.metrics = []
+
+    def save_message(self, message, role):
+        self.messages.append(message)
+
+    def save_metrics(self, metrics):
+        self.metrics.append(metrics)
+
+
+class PerTokenHandler(ChatCallbackHandler):
+    # 기존 방식: token마다 전체 답변을 다시 그림
+    def on_llm_new_token(self, token, *args, **kwargs):
+        self.ai_message += token
+        self.message_box.write(self.ai_message)
+
+
+def run(handler_class):
+    session = RecordingSession()
+    handler = handler_class(session)
+    box = RecordingBox()
+    handler.on_llm_start()
+    handler.message_box = box
+
+    start = time.perf_counter()
+    for i in range(TOKENS):
+        time.sleep(TOKEN_INTERVAL)
+        handler.on_llm_new_token(f" word{i}")
+    handler.on_llm_end()
+    return box, session, time.perf_counter() - start
+
+
+def main():
+    print(f"{TOKENS} tokens, one every {TOKEN_INTERVAL * 1000:.0f}ms")
+    print(f"{'handler':<10} {'writes':>7} {'sent KB':>9} {'seconds':>8}")
+    for name, handler_class in (
+        ("per-token", PerTokenHandler),
+        ("batched", ChatCallbackHandler),
+    ):
+        box, session, elapsed = run(handler_class)
+        print(
+            f"{name:<10} {box.writes:>7} {box.chars / 1024:>9.1f}"
+            f" {elapsed:>8.2f}"
+        )
+    metrics = session.metrics[-1]
+    print(
+        f"metrics: ttft {metrics['ttft'] * 1000:.1f}ms,"
+        f" {metrics['tokens_per_second']:.0f} tokens/s,"
+        f" {metrics['tokens']} tokens"
+    )
+
+
+if __name__ == "__main__":
+    main()
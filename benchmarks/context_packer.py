@@ -0,0 +1,50 @@
+# usage: python -m benchmarks.context_packer
+import time
+
+from langchain.schema import Document
+
+from utils.context_packer import ContextPacker
+from utils.jobs import site_splitter
+
+PARAGRAPHS = 300
+RUNS = 200
+
+
+def make_chunks():
+    text = "\n\n".join(
+        f"Section {i}. "
+        + " ".join(f"detail {i}-{j} of the topic." for j in range(30))
+        for i in range(PARAGRAPHS)
+    )
+    return site_splitter().split_documents([Document(page_content=text)])
+
+
+def main():
+    chunks = make_chunks()
+    packer = ContextPacker()
+
+    # 검색 결과처럼 이웃한 chunk(overlap으로 겹침)와 중복 chunk가 섞인 경우
+    cases = {
+        "k=4 neighbours": chunks[10:14],
+        "k=8 with duplicates": chunks[10:14] + chunks[12:16],
+        "all chunks": chunks,
+    }
+    print(f"budget {packer.max_tokens} tokens, {len(chunks)} chunks")
+    print(f"{'case':<22} {'joined':>8} {'deduped':>8} {'packed':>8} {'ms':>8}")
+    for name, docs in cases.items():
+        joined = len(packer._encode("\n\n".join(d.page_content for d in docs)))
+        start = time.perf_counter()
+        for _ in range(RUNS):
+            context = packer.format(docs)
+        elapsed = (time.perf_counter() - start) / RUNS * 1000
+        packed = len(packer._encode(context))
+        # 예산 제한 없이 겹침/중복만 제거한 경우
+        deduped = len(packer._encode(packer.format(docs, max_tokens=10**9)))
+        print(
+            f"{name:<22} {joined:>8} {deduped:>8} {packed:>8}"
+            f" {elapsed:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# usage: python -m benchmarks.conversation_memory
+import time
+
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+from utils.conversation_memory import (
+    SummaryBufferMemory,
+    TokenWindowMemory,
+    VectorHistoryMemory,
+    count_tokens,
+)
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+TURNS = 60
+CHECKPOINTS = (5, 20, 40, 60)
+THINK_TIME = 0.05  # 사용자가 다음 질문을 입력하기까지의 시간 (흉내)
+
+
+class BufferMemory:
+    # 기존 방식 (ConversationBufferMemory): 전체 대화를 그대로 넣음
+    def __init__(self):
+        self.messages = []
+
+    def save_context(self, input_message, output_message):
+        self.messages += [
+            HumanMessage(content=input_message),
+            AIMessage(content=output_message),
+        ]
+
+    def load(self, question=None):
+        return self.messages
+
+
+def conversation(turn):
+    question = (
+        f"Question {turn}: what did the meeting decide about item {turn}?"
+    )
+    answer = f"Answer {turn}: " + " ".join(
+        f"the team agreed on point {turn}.{i} and assigned an owner."
+        for i in range(12)
+    )
+    return question, answer
+
+
+def run(memory):
+    # 반환값: {turn: prompt에 들어간 history token 수}, turn당 save+load 시간(ms)
+    tokens, elapsed = {}, 0
+    for turn in range(1, TURNS + 1):
+        question, answer = conversation(turn)
+        start = time.perf_counter()
+        history = memory.load(question)
+        memory.save_context(question, answer)
+        elapsed += time.perf_counter() - start
+        if turn in CHECKPOINTS:
+            tokens[turn] = count_tokens(history)
+        time.sleep(THINK_TIME)
+    return tokens, elapsed / TURNS * 1000
+
+
+def main():
+    summary_llm = FakeChatModel(latency=0.3, respond=lambda p: p[-600:])
+    memories = {
+        "buffer": BufferMemory(),
+        "window": TokenWindowMemory(),
+        "summary": SummaryBufferMemory(llm=summary_llm),
+        "vector": VectorHistoryMemory(embeddings=FakeEmbeddings(latency=0.05)),
+    }
+
+    header = " ".join(f"{'turn ' + str(turn):>9}" for turn in CHECKPOINTS)
+    print(f"history tokens per prompt ({TURNS} turns)")
+    print(f"{'memory':<8} {header} {'ms/turn':>8}")
+    for name, memory in memories.items():
+        tokens, latency = run(memory)
+        row = " ".join(f"{tokens[turn]:>9}" for turn in CHECKPOINTS)
+        print(f"{name:<8} {row} {latency:>8.2f}")
+    print(f"summary LLM calls (background): {summary_llm.calls}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# usage: python -m benchmarks.embedding_pipeline
+import time
+import itertools
+
+from langchain_core.documents import Document
+
+from benchmarks.fakes import FakeEmbeddings
+from utils.embedding_pipeline import EmbeddingPipeline
+
+CHUNK_COUNT = 2000
+CHUNK_WORDS = 150
+BATCH_TOKENS = [2000, 8000, 32000]
+CONCURRENCY = [1, 4, 8, 16]
+
+
+def make_docs():
+    return [
+        Document(
+            page_content=" ".join(
+                f"word{(i * CHUNK_WORDS + j) % 997}"
+                for j in range(CHUNK_WORDS)
+            ),
+            metadata={"chunk": i},
+        )
+        for i in range(CHUNK_COUNT)
+    ]
+
+
+def run(docs, max_batch_tokens, max_concurrency):
+    # 동시 요청이 8개를 넘으면 429가 나도록 해서 backoff 동작까지 같이 측정
+    embeddings = FakeEmbeddings(max_in_flight=8)
+    pipeline = EmbeddingPipeline(
+        embeddings,
+        max_batch_tokens=max_batch_tokens,
+        max_concurrency=max_concurrency,
+        retry_delay=0.05,
+    )
+
+    start = time.perf_counter()
+    vector_store = pipeline.add_documents(None, docs)
+    elapsed = time.perf_counter() - start
+
+    assert vector_store.index.ntotal == len(docs)
+    return elapsed, embeddings.calls, embeddings.rate_limited
+
+
+def main():
+    docs = make_docs()
+
+    print(
+        f"{'batch tokens':>12} {'concurrency':>11} {'seconds':>8}"
+        f" {'chunks/s':>9} {'calls':>6} {'429s':>5}"
+    )
+    for max_batch_tokens, max_concurrency in itertools.product(
+        BATCH_TOKENS, CONCURRENCY
+    ):
+        elapsed, calls, rate_limited = run(
+            docs, max_batch_tokens, max_concurrency
+        )
+        print(
+            f"{max_batch_tokens:>12} {max_concurrency:>11} {elapsed:>8.2f}"
+            f" {len(docs) / elapsed:>9.0f} {calls:>6} {rate_limited:>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
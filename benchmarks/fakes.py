@@ -0,0 +1,126 @@
+import os
+import time
+import asyncio
+import threading
+import hashlib
+
+import numpy as np
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+
+class FakeEmbeddings(Embeddings):
+    # 실제 API 대신 사용하는 embedding backend
+    # 요청 한 번마다 latency + (text 수 * per_text_latency) 만큼 기다리고,
+    # 동시에 max_in_flight개 이상의 요청이 들어오면 429 에러를 냄
+    def __init__(
+        self,
+        size: int = 256,
+        latency: float = 0.05,
+        per_text_latency: float = 0.0005,
+        max_in_flight: int = None,
+    ):
+        self.size = size
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.calls = 0
+        self.rate_limited = 0
+
+    def _vector(self, text: str):
+        seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+        vector = np.random.default_rng(seed).standard_normal(self.size)
+        return (vector / np.linalg.norm(vector)).astype("float32").tolist()
+
+    def _enter(self):
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            self.rate_limited += 1
+            raise FakeRateLimitError("Too many requests")
+        self.in_flight += 1
+        self.calls += 1
+
+    def embed_documents(self, texts):
+        self._enter()
+        try:
+            time.sleep(self.latency + self.per_text_latency * len(texts))
+            return [self._vector(text) for text in texts]
+        finally:
+            self.in_flight -= 1
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+    async def aembed_documents(self, texts):
+        self._enter()
+        try:
+            await asyncio.sleep(
+                self.latency + self.per_text_latency * len(texts)
+            )
+            return [self._vector(text) for text in texts]
+        finally:
+            self.in_flight -= 1
+
+    async def aembed_query(self, text):
+        return self._vector(text)
+
+
+class FakeChatModel(BaseChatModel):
+    # 실제 LLM 대신 사용하는 chat model
+    # 호출마다 latency초 기다린 뒤, respond(prompt)의 결과를 반환함
+    latency: float = 0.5
+    respond: object = None
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "fake-chat-model"
+
+    def _result(self, messages):
+        self.calls += 1
+        prompt = "\n".join(str(message.content) for message in messages)
+        content = self.respond(prompt) if self.respond else prompt[-200:]
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=content))]
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return self._result(messages)
+
+    async def _agenerate(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ):
+        await asyncio.sleep(self.latency)
+        return self._result(messages)
+
+
+class StubTranscriptionClient:
+    # openai.OpenAI() 대신 사용하는 client (client.audio.transcriptions.create)
+    # fail_after번 호출된 이후로는 에러를 내서 중간에 멈춘 상황을 재현할 수 있음
+    def __init__(self, latency=0.1, fail_after=None, flaky_every=None):
+        self.latency = latency
+        self.fail_after = fail_after
+        self.flaky_every = flaky_every
+        self.calls = 0
+        self.audio = self
+        self.transcriptions = self
+        self._lock = threading.Lock()
+
+    def create(self, model, file, response_format="text"):
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        time.sleep(self.latency)
+        if self.fail_after is not None and calls > self.fail_after:
+            raise RuntimeError("Transcription server crashed")
+        if self.flaky_every and calls % self.flaky_every == 0:
+            raise FakeRateLimitError("Too many requests")
+        return f"[{os.path.basename(file.name)}]"
@@ -0,0 +1,157 @@
+# usage: python -m benchmarks.hybrid_retrieval
+import os
+import time
+import tempfile
+
+import numpy as np
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+from utils.hybrid_retriever import hybrid_search_by_vector
+from utils.sparse_index import SparseIndex, tokenize
+
+DOC_COUNT = 5000
+TOPICS = 50
+TOPIC_WORDS = 40
+WORDS_PER_DOC = 60
+QUERY_COUNT = 300
+DIMENSION = 64
+K = 4
+MRR_K = 10
+FILLER = "the a of to and in is for on with this that it as be".split()
+
+
+class ConceptEmbeddings(Embeddings):
+    # 동의어를 같은 벡터로 보내는 가짜 embedding (단어 vector들의 합을 정규화)
+    # 실제 embedding처럼 표현이 달라도 의미가 같으면 가깝지만,
+    # 문서 안의 식별자 하나는 다른 단어들에 묻혀서 잘 드러나지 않음
+    def __init__(self, synonyms):
+        self.synonyms = synonyms
+        self._cache = {}
+
+    def _word_vector(self, word):
+        if word not in self._cache:
+            seed = int.from_bytes(word.encode("utf-8")[:16].ljust(16, b"\0"))
+            rng = np.random.default_rng(seed % 2**63)
+            self._cache[word] = rng.normal(size=DIMENSION)
+        return self._cache[word]
+
+    def embed_query(self, text):
+        words = [self.synonyms.get(word, word) for word in tokenize(text)]
+        vector = np.sum([self._word_vector(word) for word in words], axis=0)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def make_corpus(rng):
+    # 주제별 단어와 그 동의어, 문서마다 하나씩 있는 식별자(에러 코드, 서비스 이름)
+    topic_words = [
+        [f"topic{t}word{w}" for w in range(TOPIC_WORDS)] for t in range(TOPICS)
+    ]
+    synonyms = {
+        f"topic{t}alt{w}": f"topic{t}word{w}"
+        for t in range(TOPICS)
+        for w in range(TOPIC_WORDS)
+    }
+
+    texts, identifiers, doc_words = [], [], []
+    for i in range(DOC_COUNT):
+        topic = rng.integers(TOPICS)
+        words = list(rng.choice(topic_words[topic], WORDS_PER_DOC // 2))
+        words += list(rng.choice(FILLER, WORDS_PER_DOC // 2))
+        identifier = (
+            f"ERR_{i:05d}" if i % 2 else f"billing-svc-{i:05d}.handler"
+        )
+        words.insert(rng.integers(len(words)), identifier)
+        texts.append(" ".join(words))
+        identifiers.append(identifier)
+        doc_words.append([word for word in words if word.startswith("topic")])
+    return texts, identifiers, doc_words, synonyms
+
+
+def make_queries(rng, identifiers, doc_words):
+    # exact: 식별자로 찾는 질문, paraphrase: 문서의 단어를 동의어로 바꾼 질문
+    queries = []
+    for doc_id in rng.choice(DOC_COUNT, QUERY_COUNT, replace=False):
+        queries.append(
+            ("exact", f"what does {identifiers[doc_id]} mean", doc_id)
+        )
+        words = rng.choice(doc_words[doc_id], 8, replace=False)
+        paraphrase = " ".join(word.replace("word", "alt") for word in words)
+        queries.append(("paraphrase", f"how to {paraphrase}", doc_id))
+    return queries
+
+
+def evaluate(search, queries, ids):
+    # 반환값: {query 종류: (recall@K, MRR@MRR_K)}, query당 ms
+    ranks = {}
+    start = time.perf_counter()
+    for kind, query, doc_id in queries:
+        found = search(query)
+        rank = found.index(ids[doc_id]) + 1 if ids[doc_id] in found else None
+        ranks.setdefault(kind, []).append(rank)
+    elapsed = (time.perf_counter() - start) / len(queries) * 1000
+
+    metrics = {}
+    for kind, values in ranks.items():
+        recall = np.mean([rank is not None and rank <= K for rank in values])
+        mrr = np.mean([1 / rank if rank else 0 for rank in values])
+        metrics[kind] = (recall, mrr)
+    return metrics, elapsed
+
+
+def main():
+    rng = np.random.default_rng(0)
+    texts, identifiers, doc_words, synonyms = make_corpus(rng)
+    queries = make_queries(rng, identifiers, doc_words)
+    embeddings = ConceptEmbeddings(synonyms)
+
+    ids = [f"doc-{i}" for i in range(DOC_COUNT)]
+    vector_store = FAISS.from_texts(texts, embeddings, ids=ids)
+
+    start = time.perf_counter()
+    sparse = SparseIndex.from_vector_store(vector_store)
+    build_seconds = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as folder:
+        sparse.save(folder)
+        size_mb = os.path.getsize(f"{folder}/sparse.npz") / 1024 / 1024
+    print(
+        f"{DOC_COUNT} chunks, sparse index build {build_seconds:.2f}s,"
+        f" {size_mb:.1f}MB, {len(sparse.terms)} terms"
+    )
+
+    def dense(query):
+        return [
+            doc.id for doc in vector_store.similarity_search(query, k=MRR_K)
+        ]
+
+    def bm25(query):
+        return [id_ for id_, _ in sparse.search(query, MRR_K)]
+
+    def hybrid(query):
+        vector = embeddings.embed_query(query)
+        return [
+            doc.id
+            for doc, _ in hybrid_search_by_vector(
+                vector_store, sparse, vector, query, k=MRR_K
+            )
+        ]
+
+    print(
+        f"{'retriever':<9} {'exact R@4':>10} {'exact MRR':>10}"
+        f" {'para R@4':>9} {'para MRR':>9} {'ms/query':>9}"
+    )
+    for name, search in (("dense", dense), ("bm25", bm25), ("hybrid", hybrid)):
+        metrics, latency = evaluate(search, queries, ids)
+        exact, paraphrase = metrics["exact"], metrics["paraphrase"]
+        print(
+            f"{name:<9} {exact[0]:>10.3f} {exact[1]:>10.3f}"
+            f" {paraphrase[0]:>9.3f} {paraphrase[1]:>9.3f} {latency:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# usage: python -m benchmarks.job_queue
+import os
+import time
+import hashlib
+import tempfile
+
+from utils.job_queue import JobQueue
+
+JOB_COUNT = 8  # 동시에 올라온 업로드 수
+WORK_ROUNDS = 200_000  # job 하나의 CPU 작업량 (sha256 반복)
+STEPS = 20
+
+
+def cpu_job(progress, name, rounds):
+    # 영상 분할/embedding 전처리처럼 CPU를 오래 쓰는 작업 대신 사용
+    digest = name.encode("utf-8")
+    for step in range(STEPS):
+        for _ in range(rounds // STEPS):
+            digest = hashlib.sha256(digest).digest()
+        progress.update((step + 1) / STEPS, f"step {step + 1}/{STEPS}")
+    return digest.hex()
+
+
+def failing_job(progress):
+    raise RuntimeError("boom")
+
+
+def run_sequential():
+    class Progress:
+        def update(self, progress=None, message=None):
+            pass
+
+    start = time.perf_counter()
+    for i in range(JOB_COUNT):
+        cpu_job(Progress(), f"job-{i}", WORK_ROUNDS)
+    return time.perf_counter() - start
+
+
+def run_queue(folder):
+    queue = JobQueue(max_workers=os.cpu_count(), folder=folder)
+
+    # 첫 job을 실행하기 전에 worker process를 미리 띄워둠 (spawn 시간 제외)
+    warmup_id = queue.submit("warmup", "warmup", cpu_job, "warmup", 0)
+    while queue.get(warmup_id)["status"] != "done":
+        time.sleep(0.05)
+
+    start = time.perf_counter()
+    # submit은 job 파일만 쓰고 바로 반환되어야 함 (streamlit script가 기다리지 않도록)
+    job_ids = [
+        queue.submit("cpu", f"job-{i}", cpu_job, f"job-{i}", WORK_ROUNDS)
+        for i in range(JOB_COUNT)
+    ]
+    submit_ms = (time.perf_counter() - start) * 1000
+
+    # rerun마다 submit해도 같은 job이 다시 실행되지 않음
+    assert job_ids == [
+        queue.submit("cpu", f"job-{i}", cpu_job, f"job-{i}", WORK_ROUNDS)
+        for i in range(JOB_COUNT)
+    ]
+
+    polls = 0
+    while any(
+        queue.get(job_id)["status"] in ("queued", "running")
+        for job_id in job_ids
+    ):
+        polls += 1
+        time.sleep(0.02)
+    elapsed = time.perf_counter() - start
+
+    assert all(queue.get(job_id)["status"] == "done" for job_id in job_ids)
+
+    # 실패한 job은 상태에 에러가 남고, reset 후 다시 submit할 수 있음
+    failed_id = queue.submit("fail", "fail", failing_job)
+    while queue.get(failed_id)["status"] != "failed":
+        time.sleep(0.02)
+    assert "boom" in queue.get(failed_id)["error"]
+    queue.reset(failed_id)
+    assert queue.get(failed_id) is None
+
+    return elapsed, submit_ms, polls
+
+
+def main():
+    print(f"{JOB_COUNT} jobs, {os.cpu_count()} cpus")
+    sequential = run_sequential()
+    print(f"{'sequential (in script)':<24} {sequential:>7.2f}s")
+
+    with tempfile.TemporaryDirectory() as folder:
+        elapsed, submit_ms, polls = run_queue(folder)
+    print(
+        f"{'job queue':<24} {elapsed:>7.2f}s"
+        f"  (submit {submit_ms:.1f}ms, {polls} polls)"
+    )
+
+
+if __name__ == "__main__":
+    main()
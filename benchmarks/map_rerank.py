@@ -0,0 +1,91 @@
+# usage: python -m benchmarks.map_rerank
+import time
+
+from langchain.prompts import ChatPromptTemplate
+from langchain.schema import Document, StrOutputParser
+
+from benchmarks.fakes import FakeChatModel
+from utils.map_rerank import map_rerank
+
+LATENCY = 0.5
+DOC_COUNTS = [4, 8]
+
+
+def respond(prompt):
+    # context에 "relevant"가 있으면 score 5, 아니면 score 1
+    score = 5 if "relevant" in prompt else 1
+    return f"Answer: something\nScore: {score}"
+
+
+def make_docs(count, relevant_index=None):
+    return [
+        Document(
+            page_content="relevant" if i == relevant_index else f"doc {i}",
+            metadata={"source": f"https://example.com/{i}"},
+        )
+        for i in range(count)
+    ]
+
+
+def sequential(chain, docs, question):
+    # 기존 get_answers 방식 (문서마다 순서대로 invoke)
+    return [
+        {
+            "answer": chain.invoke(
+                {"context": doc.page_content, "question": question}
+            ),
+            "source": doc.metadata["source"],
+        }
+        for doc in docs
+    ]
+
+
+def measure(function):
+    start = time.perf_counter()
+    answers = function()
+    return time.perf_counter() - start, len(answers)
+
+
+def main():
+    prompt = ChatPromptTemplate.from_template("{context}\n{question}")
+
+    print(
+        f"{'docs':>4} {'mode':<30} {'seconds':>8} {'answers':>8} {'calls':>6}"
+    )
+    for count in DOC_COUNTS:
+        for relevant_index in [None, 1]:
+            docs = make_docs(count, relevant_index)
+            cases = [
+                ("sequential", sequential, {}),
+                (
+                    "concurrent (4)",
+                    map_rerank,
+                    {"max_concurrency": 4, "stop_score": None},
+                ),
+                (
+                    "concurrent (4) + early stop",
+                    map_rerank,
+                    {"max_concurrency": 4},
+                ),
+                (
+                    "concurrent (8) + early stop",
+                    map_rerank,
+                    {"max_concurrency": 8},
+                ),
+            ]
+            suffix = "" if relevant_index is None else " *"
+            for name, function, kwargs in cases:
+                llm = FakeChatModel(latency=LATENCY, respond=respond)
+                chain = prompt | llm | StrOutputParser()
+                elapsed, answers = measure(
+                    lambda: function(chain, docs, "question", **kwargs)
+                )
+                print(
+                    f"{count:>4} {name + suffix:<30} {elapsed:>8.2f}"
+                    f" {answers:>8} {llm.calls:>6}"
+                )
+    print(f"\nLLM latency: {LATENCY}s, * = one document scores 5")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# usage: python -m benchmarks.password_pool
+# 로그인(bcrypt)이 몰릴 때 bcrypt를 요청 thread에서 바로 실행하는 경우(PASSWORD_WORKERS=0)와
+# process pool에서 실행하는 경우의 로그인 처리량, 다른 API(/user/me)의 응답 시간을 비교
+import time
+import asyncio
+import tempfile
+
+import httpx
+import numpy as np
+
+from benchmarks.backend_load import BASE, USER, start_server
+
+LOGIN_CONCURRENCY = 32
+ME_CONCURRENCY = 4
+DURATION = 10  # seconds
+LOGIN = {"username": USER["username"], "password": USER["password"]}
+CONFIGS = {
+    "inline": {"PASSWORD_WORKERS": "0"},
+    "pool": {"PASSWORD_WORKERS": "2", "PASSWORD_QUEUE_LIMIT": "8"},
+}
+
+
+async def worker(client, method, path, deadline, results, **kwargs):
+    # results: {"latencies": [...], "busy": 503 응답 수, "errors": 그 외 에러 수}
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            results["errors"] += 1
+            continue
+        if response.status_code == 503:
+            results["busy"] += 1
+            # Retry-After를 그대로 따르면 측정 시간이 줄어드므로 짧게만 쉼
+            await asyncio.sleep(0.05)
+        elif response.is_success:
+            results["latencies"].append(time.perf_counter() - start)
+        else:
+            results["errors"] += 1
+
+
+async def load(access_token):
+    logins = {"latencies": [], "busy": 0, "errors": 0}
+    mes = {"latencies": [], "busy": 0, "errors": 0}
+    headers = {"Authorization": f"Bearer {access_token}"}
+    limits = httpx.Limits(max_connections=LOGIN_CONCURRENCY + ME_CONCURRENCY)
+    async with httpx.AsyncClient(
+        base_url=BASE, limits=limits, timeout=60
+    ) as client:
+        deadline = time.perf_counter() + DURATION
+        await asyncio.gather(
+            *(
+                worker(
+                    client, "POST", "/auth/login", deadline, logins, json=LOGIN
+                )
+                for _ in range(LOGIN_CONCURRENCY)
+            ),
+            *(
+                worker(
+                    client, "GET", "/user/me", deadline, mes, headers=headers
+                )
+                for _ in range(ME_CONCURRENCY)
+            ),
+        )
+    return logins, mes
+
+
+def run(env, folder):
+    server = start_server("sync", folder, **env)
+    try:
+        httpx.post(f"{BASE}/user/sign_up", json=USER, timeout=30)
+        response = httpx.post(f"{BASE}/auth/login", json=LOGIN, timeout=30)
+        response.raise_for_status()
+        return asyncio.run(load(response.json()["access_token"]))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def percentiles(latencies):
+    if not latencies:
+        return float("nan"), float("nan")
+    return tuple(np.percentile(latencies, [50, 99]) * 1000)
+
+
+def main():
+    print(
+        f"{LOGIN_CONCURRENCY} concurrent logins + {ME_CONCURRENCY} /user/me"
+        f" clients, {DURATION}s"
+    )
+    print(
+        f"{'bcrypt':<7} {'login/s':>8} {'login p50':>10} {'login p99':>10}"
+        f" {'503':>5} {'me/s':>6} {'me p50':>8} {'me p99':>8}"
+    )
+    with tempfile.TemporaryDirectory() as folder:
+        for name, env in CONFIGS.items():
+            logins, mes = run(env, folder)
+            login_p50, login_p99 = percentiles(logins["latencies"])
+            me_p50, me_p99 = percentiles(mes["latencies"])
+            print(
+                f"{name:<7} {len(logins['latencies']) / DURATION:>8.1f}"
+                f" {login_p50:>10.0f} {login_p99:>10.0f} {logins['busy']:>5}"
+                f" {len(mes['latencies']) / DURATION:>6.0f}"
+                f" {me_p50:>8.0f} {me_p99:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# usage: python -m benchmarks.refresh_rotation
+# refresh token이 많이 쌓인 테이블에서 token 조회 시간을 (token_hash, status) index가 있을 때와 없을 때 비교하고
+# token 갱신(검증 + 폐기 + 새 token 저장) 한 번에 실행되는 SQL 수와 commit 수를 셈
+import os
+import time
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, text
+
+TOKENS = 100_000
+RUNS = 500
+
+
+def measure(function, runs=RUNS):
+    start = time.perf_counter()
+    for _ in range(runs):
+        function()
+    return (time.perf_counter() - start) / runs * 1_000_000
+
+
+def main():
+    folder = tempfile.mkdtemp()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{folder}/refresh.db")
+    os.environ.setdefault("PASSWORD_WORKERS", "0")
+
+    from backend.app.core.database import Base, SessionLocal, engine
+    from backend.app.refresh_token import model, repository, service
+    from backend.app.user import schemas
+    from backend.app.user.service import register_user
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user_id = register_user(
+            db,
+            schemas.UserCreate(
+                username="rotate", email="rotate@example.com", password="pw"
+            ),
+        ).id
+        expires_at = datetime.utcnow() + timedelta(days=7)
+        db.execute(
+            model.RefreshToken.__table__.insert(),
+            [
+                {
+                    "user_id": user_id,
+                    "token_hash": service.hash_token(str(i)),
+                    "status": model.StatusEnum.revoked,
+                    "expires_at": expires_at,
+                }
+                for i in range(TOKENS)
+            ],
+        )
+        db.commit()
+        token = service.create_refresh_token(db, user_id, "ua", "127.0.0.1")
+
+    token_hash = service.hash_token(token)
+
+    def lookup():
+        with SessionLocal() as db:
+            return repository.get_active_refresh_token(db, token_hash)
+
+    print(f"{TOKENS} refresh tokens")
+    indexed = measure(lookup)
+    with engine.begin() as connection:
+        connection.execute(
+            text("DROP INDEX ix_refresh_token_token_hash_status")
+        )
+    full_scan = measure(lookup, runs=RUNS // 10)
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE INDEX ix_refresh_token_token_hash_status"
+                " ON refresh_token (token_hash, status)"
+            )
+        )
+    print(f"{'lookup (no index)':<20} {full_scan:>10.1f} us")
+    print(f"{'lookup (index)':<20} {indexed:>10.1f} us")
+
+    statements = []
+    commits = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2].split()[0]),
+    )
+    event.listen(engine, "commit", lambda *args: commits.append(1))
+
+    def rotate():
+        nonlocal token
+        with SessionLocal() as db:
+            refresh_token = service.verify_refresh_token(
+                db, token, "ua", "127.0.0.1"
+            )
+            token = service.regenerate_refresh_token(db, refresh_token)
+
+    rotate()
+    print(f"{'rotate':<20} {' '.join(statements)} ({len(commits)} commit)")
+    print(f"{'rotate':<20} {measure(rotate):>10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
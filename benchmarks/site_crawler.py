@@ -0,0 +1,91 @@
+# usage: python -m benchmarks.site_crawler
+import time
+import asyncio
+
+from benchmarks.site_server import make_app, start_server
+from utils.site_crawler import SiteCrawler
+
+PAGE_COUNT = 400
+LATENCY = 0.05
+PER_HOST_CONCURRENCY = [1, 2, 8, 32]
+
+
+def parse_page(soup):
+    for tag in soup.find_all(["header", "footer"]):
+        tag.decompose()
+    return str(soup.get_text()).replace("\n", " ")
+
+
+async def crawl(crawler, url, validators=None):
+    pages = []
+    first_page_at = None
+    start = time.perf_counter()
+    async for page in crawler.crawl(url, validators=validators):
+        if first_page_at is None:
+            first_page_at = time.perf_counter() - start
+        pages.append(page)
+    return pages, first_page_at, time.perf_counter() - start
+
+
+async def main():
+    app = make_app(page_count=PAGE_COUNT, latency=LATENCY)
+    runner, base = await start_server(app)
+    sitemap_url = f"{base}/sitemap.xml"
+
+    try:
+        print(
+            f"{'per host':>8} {'first page':>10} {'seconds':>8}"
+            f" {'pages/s':>8} {'ok':>5}"
+        )
+        for per_host in PER_HOST_CONCURRENCY:
+            crawler = SiteCrawler(
+                parsing_function=parse_page,
+                max_connections=max(per_host, 1),
+                per_host_concurrency=per_host,
+            )
+            pages, first_page_at, elapsed = await crawl(crawler, sitemap_url)
+            ok = sum(page["status"] == "ok" for page in pages)
+            print(
+                f"{per_host:>8} {first_page_at:>10.3f} {elapsed:>8.2f}"
+                f" {len(pages) / elapsed:>8.0f} {ok:>5}"
+            )
+
+        # 두 번째 crawl은 ETag로 conditional GET -> 모두 304여야 함
+        validators = {
+            page["url"]: {"etag": page["etag"]}
+            for page in pages
+            if page["status"] == "ok"
+        }
+        pages, _, elapsed = await crawl(crawler, sitemap_url, validators)
+        not_modified = sum(page["status"] == "not_modified" for page in pages)
+        print(
+            f"\nrecrawl with ETag: {not_modified}/{len(pages)} not modified"
+            f" in {elapsed:.2f}s"
+        )
+
+        # robots.txt의 crawl-delay / disallow 확인
+        app_with_robots = make_app(
+            page_count=6,
+            latency=0,
+            robots="User-agent: *\nCrawl-delay: 1\nDisallow: /page/5\n",
+        )
+        robots_runner, robots_base = await start_server(app_with_robots)
+        try:
+            crawler = SiteCrawler(parsing_function=parse_page)
+            pages, _, elapsed = await crawl(
+                crawler, f"{robots_base}/sitemap.xml"
+            )
+            disallowed = sum(page["status"] == "disallowed" for page in pages)
+            print(
+                f"robots.txt: {disallowed} disallowed,"
+                f" {len(pages) - disallowed} fetched in {elapsed:.2f}s"
+                " (crawl-delay 1s)"
+            )
+        finally:
+            await robots_runner.cleanup()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
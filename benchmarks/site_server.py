@@ -0,0 +1,72 @@
+import asyncio
+import hashlib
+
+from aiohttp import web
+
+# 로컬에서 sitemap crawling을 테스트하기 위한 HTTP 서버
+# 페이지마다 latency만큼 늦게 응답하고, ETag를 붙여서 conditional GET(304)도 확인할 수 있음
+
+
+def make_app(page_count=200, latency=0.05, robots="", lastmods=None):
+    pages = {
+        f"/page/{i}": f"<html><head><title>Page {i}</title></head><body>"
+        f"<header>menu</header><p>Content of page {i}. "
+        + " ".join(f"token{i}_{j}" for j in range(200))
+        + "</p><footer>footer</footer></body></html>"
+        for i in range(page_count)
+    }
+    lastmods = lastmods or {}
+    stats = {"requests": 0, "not_modified": 0}
+
+    async def sitemap(request):
+        base = f"http://{request.host}"
+        urls = "".join(
+            f"<url><loc>{base}{path}</loc>"
+            + (
+                f"<lastmod>{lastmods[path]}</lastmod>"
+                if path in lastmods
+                else ""
+            )
+            + "</url>"
+            for path in pages
+        )
+        return web.Response(
+            text='<?xml version="1.0" encoding="UTF-8"?>'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            f"{urls}</urlset>",
+            content_type="application/xml",
+        )
+
+    async def robots_txt(request):
+        return web.Response(text=robots)
+
+    async def page(request):
+        stats["requests"] += 1
+        await asyncio.sleep(latency)
+        body = pages.get(request.path)
+        if body is None:
+            raise web.HTTPNotFound()
+        etag = f'"{hashlib.sha256(body.encode()).hexdigest()[:16]}"'
+        if request.headers.get("If-None-Match") == etag:
+            stats["not_modified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(
+            text=body, content_type="text/html", headers={"ETag": etag}
+        )
+
+    app = web.Application()
+    app.router.add_get("/sitemap.xml", sitemap)
+    app.router.add_get("/robots.txt", robots_txt)
+    app.router.add_get("/page/{id}", page)
+    app["pages"] = pages
+    app["stats"] = stats
+    return app
+
+
+async def start_server(app, port=0):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
@@ -0,0 +1,54 @@
+# usage: python -m benchmarks.summarizer
+import time
+
+from langchain.schema import Document
+
+from benchmarks.fakes import FakeChatModel
+from utils.summarizer import map_reduce_summary, refine_summary
+
+LATENCY = 0.2
+CHUNK_COUNTS = [10, 60]
+CONCURRENCY = [4, 8, 16]
+
+
+def respond(prompt):
+    # 요약 결과는 입력과 상관없이 약 100 단어
+    return " ".join(["summary"] * 100)
+
+
+def make_docs(count):
+    return [
+        Document(page_content=" ".join([f"chunk{i}"] * 600))
+        for i in range(count)
+    ]
+
+
+def measure(function, docs, **kwargs):
+    llm = FakeChatModel(latency=LATENCY, respond=respond)
+    start = time.perf_counter()
+    function(llm, docs, **kwargs)
+    return time.perf_counter() - start, llm.calls
+
+
+def main():
+    print(f"{'chunks':>6} {'mode':<22} {'seconds':>8} {'calls':>6}")
+    for count in CHUNK_COUNTS:
+        docs = make_docs(count)
+
+        elapsed, calls = measure(refine_summary, docs)
+        print(f"{count:>6} {'refine':<22} {elapsed:>8.2f} {calls:>6}")
+
+        for max_concurrency in CONCURRENCY:
+            elapsed, calls = measure(
+                map_reduce_summary,
+                docs,
+                max_concurrency=max_concurrency,
+                token_budget=1000,
+            )
+            mode = f"map-reduce ({max_concurrency})"
+            print(f"{count:>6} {mode:<22} {elapsed:>8.2f} {calls:>6}")
+    print(f"\nLLM latency: {LATENCY}s")
+
+
+if __name__ == "__main__":
+    main()
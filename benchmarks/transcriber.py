@@ -0,0 +1,70 @@
+# usage: python -m benchmarks.transcriber
+import os
+import time
+import tempfile
+
+from benchmarks.fakes import StubTranscriptionClient
+from utils.transcriber import transcribe_segments
+
+SEGMENT_COUNT = 120  # 1시간 영상 (30초 segment)
+LATENCY = 0.05
+WORKERS = [1, 4, 8, 16]
+
+
+def make_segments(folder):
+    paths = []
+    for i in range(SEGMENT_COUNT):
+        path = f"{folder}/segment_{i:05d}.mp3"
+        with open(path, "wb") as f:
+            f.write(b"\0")
+        paths.append(path)
+    return paths
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        segments = make_segments(folder)
+        expected = " ".join(f"[{os.path.basename(path)}]" for path in segments)
+
+        print(f"{'workers':>7} {'seconds':>8} {'calls':>6}")
+        for workers in WORKERS:
+            # 429를 섞어서 재시도 후에도 순서대로 이어붙는지 확인
+            client = StubTranscriptionClient(latency=LATENCY, flaky_every=10)
+            checkpoint_dir = f"{folder}/checkpoints-{workers}"
+            start = time.perf_counter()
+            text_path = transcribe_segments(
+                client,
+                segments,
+                f"{folder}/transcript-{workers}.txt",
+                checkpoint_dir,
+                max_workers=workers,
+                retry_delay=0.01,
+            )
+            elapsed = time.perf_counter() - start
+            assert open(text_path).read() == expected
+            print(f"{workers:>7} {elapsed:>8.2f} {client.calls:>6}")
+
+        # 중간에 멈춘 뒤 다시 실행하면 남은 segment만 transcribe
+        checkpoint_dir = f"{folder}/checkpoints-resume"
+        text_path = f"{folder}/transcript-resume.txt"
+        crashed = StubTranscriptionClient(latency=LATENCY, fail_after=50)
+        try:
+            transcribe_segments(
+                crashed, segments, text_path, checkpoint_dir, max_workers=4
+            )
+        except RuntimeError:
+            pass
+        resumed = StubTranscriptionClient(latency=LATENCY)
+        transcribe_segments(
+            resumed, segments, text_path, checkpoint_dir, max_workers=4
+        )
+        assert open(text_path).read() == expected
+        print(
+            f"\nresume: crashed after {crashed.calls} calls,"
+            f" resumed with {resumed.calls} calls"
+            f" ({len(os.listdir(checkpoint_dir))} checkpoints)"
+        )
+
+
+if __name__ == "__main__":
+    main()
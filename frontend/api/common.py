@@ -3,8 +3,8 @@ import requests
 API_BASE = "http://localhost:8000"
 
 
-def api_request(method, endpoint, **kwargs):
-    url = f"{API_BASE}{endpoint}"
+def api_request(method, endpoint, base=API_BASE, **kwargs):
+    url = f"{base}{endpoint}"
     response = requests.request(method, url, **kwargs)
     response.raise_for_status()
     return response.json()
@@ -0,0 +1,65 @@
+import os
+
+import requests
+
+from .common import api_request
+
+INDEX_API_BASE = os.getenv("INDEX_API_BASE", "http://localhost:8001")
+TIMEOUT = 30  # seconds
+
+
+class IndexClient:
+    # index service(backend/app/index_main.py) client
+    # 로그인한 사용자의 token으로 요청하므로 해당 사용자의 index에만 접근함
+    def __init__(self, access_token: str):
+        self.headers = {"Authorization": f"Bearer {access_token}"}
+
+    def _request(self, method, endpoint, **kwargs):
+        return api_request(
+            method,
+            endpoint,
+            base=INDEX_API_BASE,
+            headers=self.headers,
+            timeout=TIMEOUT,
+            **kwargs,
+        )
+
+    def info(self, name):
+        # index가 없으면 None
+        try:
+            return self._request("GET", f"/index/{name}")
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return None
+            raise
+
+    def add(
+        self, name, ids, texts, metadatas, vectors, version=None, total=None
+    ):
+        return self._request(
+            "POST",
+            f"/index/{name}/documents",
+            json={
+                "ids": ids,
+                "texts": texts,
+                "metadatas": metadatas,
+                "vectors": vectors,
+                "version": version,
+                "total": total,
+            },
+        )
+
+    def delete(self, name, ids):
+        return self._request(
+            "POST", f"/index/{name}/delete", json={"ids": ids}
+        )
+
+    def query(self, name, vector, k=4, text=None):
+        return self._request(
+            "POST",
+            f"/index/{name}/query",
+            json={"vector": vector, "k": k, "text": text},
+        )
+
+    def drop(self, name):
+        return self._request("DELETE", f"/index/{name}")
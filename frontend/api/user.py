@@ -1,3 +1,6 @@
+import json
+import base64
+
 from .common import api_request
 
 
@@ -20,3 +23,13 @@ def login(username, password):
         "/auth/login",
         json={"username": username, "password": password},
     )
+
+
+def token_user_id(access_token):
+    # access token(JWT) payload의 user_id (로그인하지 않았으면 None)
+    # 서명은 backend가 요청마다 확인하므로 여기서는 읽기만 함 (로컬 파일, job을 사용자별로 나눌 때 사용)
+    if not access_token:
+        return None
+    payload = access_token.split(".")[1]
+    payload += "=" * (-len(payload) % 4)
+    return json.loads(base64.urlsafe_b64decode(payload))["user_id"]
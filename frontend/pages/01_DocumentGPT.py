@@ -1,9 +1,15 @@
 import streamlit as st
 
+# api
+from api.index import IndexClient
+from api.user import token_user_id
+
 # utils
+from utils import jobs, remote_index
 from utils.chat_callback_handler import ChatCallbackHandler
 from utils.chatbot_session import ChatBotSession
 from utils.docs_handler import DocsHandler
+from utils.job_queue import get_job_queue, paint_job
 
 # LangChain - Chain
 from langchain_openai.chat_models import ChatOpenAI
@@ -12,8 +18,7 @@ from langchain.schema import StrOutputParser
 from langchain.schema.runnable import RunnablePassthrough, RunnableLambda
 
 # LangChain - Document
-from langchain.text_splitter import CharacterTextSplitter
-from langchain.memory import ConversationBufferMemory
+from langchain_openai.embeddings import OpenAIEmbeddings
 
 ### Settings
 # a. Set the page configuration
@@ -25,31 +30,75 @@ st.set_page_config(
 # b. Initialization
 # b-1. docs
 docs_handler = DocsHandler()
-docs_handler.splitter = CharacterTextSplitter.from_tiktoken_encoder(
-    separator="\n",
-    chunk_size=600,
-    chunk_overlap=100,
-)
+docs_handler.splitter = jobs.document_splitter()
 
 # b-2. chat
 chatbot_session = ChatBotSession("document")
 chat_handler = ChatCallbackHandler(chatbot_session)
 
 # b-3. memory
-if chatbot_session.memory is None:
-    chatbot_session.set_memory(
-        ConversationBufferMemory(
-            return_messages=True,
-            memory_key="history",
-        )
-    )
+chatbot_session.init_memory()
 
 
 ### Functions
-def respond_to_question(question, file_path):
+def document_key(file_name):
+    # 파일 이름은 다른 사용자와 겹칠 수 있으므로 로그인한 사용자 id를 붙여서 문서를 구분
+    # (같은 사용자가 같은 이름의 파일을 고쳐서 다시 올리면 바뀐 chunk만 다시 embedding함)
+    user_id = token_user_id(st.session_state.get("access_token"))
+    if user_id is None:
+        return None
+    return f"{user_id}/{file_name}"
+
+
+def embed_file(file_path, file_name):
+    # split/embedding은 job_queue의 worker process에서 실행
+    # 여러 파일을 올려도 각각 다른 process에서 동시에 처리됨
+    doc_key = document_key(file_name)
+    job_id = get_job_queue().submit(
+        "document",
+        f"{file_path}-{doc_key}",
+        jobs.index_document,
+        file_path,
+        doc_key,
+        env={"OPENAI_API_KEY": st.session_state["api_key"]},
+        scope=token_user_id(st.session_state.get("access_token")),
+        index_client=IndexClient(st.session_state["access_token"]),
+    )
+    return paint_job(job_id)
+
+
+@st.cache_resource(show_spinner=False)
+def get_remote_retriever(access_token, index_name, _fallback):
+    # 질문할 때마다 새로 연결하지 않도록 index별로 한 번만 만듦
+    return remote_index.RemoteRetriever(
+        client=IndexClient(access_token),
+        index_name=index_name,
+        embeddings=OpenAIEmbeddings(),
+        fallback=_fallback,
+    )
+
+
+def get_retriever(file_path, file_name, result):
+    # job에서 index service에 올려둔 index로 검색 (여러 worker가 같은 index를 각자 메모리에 올리지 않도록)
+    # 올리지 못했거나 service에 연결할 수 없으면 로컬 index를 사용
+    doc_key = document_key(file_name)
+
+    def local_retriever():
+        return docs_handler.embedding_n_return_retriever(file_path, doc_key)
+
+    if result["remote_index"] is None:
+        return local_retriever()
+    return get_remote_retriever(
+        st.session_state["access_token"],
+        result["remote_index"],
+        local_retriever,
+    )
+
+
+def respond_to_question(question, file_path, file_name, result):
     llm = ChatOpenAI(temperature=0.1, streaming=True, callbacks=[chat_handler])
 
-    retriever = docs_handler.embedding_n_return_retriever(file_path)
+    retriever = get_retriever(file_path, file_name, result)
 
     prompt = ChatPromptTemplate.from_messages(
         [
@@ -72,9 +121,9 @@ def respond_to_question(question, file_path):
     chain = (
         {
             # retriver는 string(message)을 받아 List of Document를 chain의 두 번째 component(RunnableLambda)에 전달
-            # RunnableLambda는 List of Document를 받아 함수(format_docs)를 실행
+            # RunnableLambda는 List of Document를 받아 함수(pack_docs)를 실행
             # prompt의 context에 들어갈 string을 생성해 반환해줌
-            "context": retriever | RunnableLambda(docs_handler.format_docs),
+            "context": retriever | RunnableLambda(docs_handler.pack_docs),
             "question": RunnablePassthrough(),
             "history": chatbot_session.load_memory,
         }
@@ -89,11 +138,9 @@ def respond_to_question(question, file_path):
 
 ### Main
 if not st.session_state.get("api_key"):
-    st.markdown(
-        """
+    st.markdown("""
             ## Enter your OpenAI API key for using this app.
-        """
-    )
+        """)
     if st.button(
         label="Go to Home",
         help="You can enter your OpenAI API key on the Home page.",
@@ -111,6 +158,11 @@ else:
     if uploaded_file:
         text_path = docs_handler.save_text_file(uploaded_file)
 
+        # embedding이 끝날 때까지는 진행 상황만 보여줌
+        result = embed_file(text_path, uploaded_file.name)
+        if result is None:
+            st.stop()
+
         # 채팅 히스토리
         chatbot_session.paint_messages()
 
@@ -128,7 +180,9 @@ else:
         if question:
             chatbot_session.send_message(question, "human")
             with st.chat_message("ai"):
-                respond_to_question(question, text_path)
+                respond_to_question(
+                    question, text_path, uploaded_file.name, result
+                )
 
     else:
         st.title("DocumentGPT")
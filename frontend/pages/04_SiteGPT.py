@@ -1,8 +1,17 @@
+import time
 import streamlit as st
 
+# api
+from api.index import IndexClient
+from api.user import token_user_id
+
 # utils
+from utils import hybrid_retriever, jobs, remote_index
 from utils.chat_callback_handler import ChatCallbackHandler
 from utils.chatbot_session import ChatBotSession
+from utils.job_queue import get_job_queue, paint_job
+from utils.map_rerank import map_rerank
+from utils.semantic_cache import SemanticCache
 
 # LangChain - Chain
 from langchain_openai.chat_models import ChatOpenAI
@@ -11,11 +20,7 @@ from langchain.schema import StrOutputParser
 from langchain.schema.runnable import RunnableLambda, RunnablePassthrough
 
 # LangChain - Document, Site Load
-from langchain_community.document_loaders import SitemapLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.memory import ConversationBufferMemory
 from langchain_openai.embeddings import OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
 
 ### Settings
 # a. Set the page configuration
@@ -29,80 +34,68 @@ chat_handler = ChatCallbackHandler(chatbot_session)
 
 
 # b-2. memory
-if chatbot_session.memory is None:
-    chatbot_session.set_memory(
-        ConversationBufferMemory(
-            return_messages=True,
-            memory_key="history",
-        )
-    )
+chatbot_session.init_memory()
 
+# b-3. map-rerank
+ANSWER_CONCURRENCY = 4
+ANSWER_TIMEOUT = 30  # seconds
 
-### Functions
-def parse_page(soup):
-    header = soup.find("header")
-    footer = soup.find("footer")
+# b-4. answer cache
+# (사용자, index version)별로 하나씩 만들므로 오래된 것부터 내림
+ANSWER_CACHE_ENTRIES = 32
 
-    if header:
-        header.decompose()
-    if footer:
-        footer.decompose()
 
-    return str(soup.get_text()).replace("\n", " ")
-
-
-@st.cache_resource(show_spinner="Loading site...")
-def load_site(url):
-    splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-        chunk_size=1000, chunk_overlap=200
+### Functions
+def submit_site_job(url, refresh_key=None):
+    # crawling/embedding은 job_queue의 worker process에서 실행
+    # 같은 사용자가 같은 url이면 rerun마다 호출해도 job은 한 번만 실행됨 (refresh는 누를 때마다 새 job)
+    # (job은 사용자의 api key로 실행되므로 다른 사용자와 같이 쓰지 않음)
+    kind = "site-refresh" if refresh_key else "site"
+    return get_job_queue().submit(
+        kind,
+        refresh_key or url,
+        jobs.index_site,
+        url,
+        refresh=bool(refresh_key),
+        env={"OPENAI_API_KEY": st.session_state["api_key"]},
+        scope=token_user_id(st.session_state.get("access_token")),
+        index_client=IndexClient(st.session_state["access_token"]),
     )
-    loader = SitemapLoader(url, parsing_function=parse_page)
-    loader.requests_per_second = 2
-
-    docs = loader.load_and_split(text_splitter=splitter)
-    vector_store = FAISS.from_documents(docs, OpenAIEmbeddings())
 
-    return vector_store.as_retriever()
 
+@st.cache_resource(show_spinner="Loading site...")
+def load_site(index_path, index_version):
+    # index는 job에서 디스크에 저장되므로, 여기서는 불러오기만 함
+    # refresh로 index가 바뀌면 index_version(manifest hash)도 바뀌므로 다시 불러옴
+    # vector 검색 + BM25 검색 결과를 합쳐서 반환하는 retriever
+    return hybrid_retriever.load_retriever(index_path, OpenAIEmbeddings())
 
-def search_history(inputs):
-    llm = ChatOpenAI(temperature=0.1)
 
-    search_history_prompt = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                """
-                    If a similar question exists in the following context('Previous conversation'), return the same answer.
-                    Else, just return a word 'False'
+def refresh_site(url):
+    # 바뀌거나 새로 생긴 페이지만 다시 받아오고, sitemap에서 사라진 페이지는 삭제
+    # refresh하는 동안에도 기존 index로 계속 질문할 수 있음
+    refresh_key = st.session_state.get("site_refresh")
+    if refresh_key is None:
+        return
 
-                    Previous conversation:\n{history}\n\n
-                """,
-            ),
-            ("human", "{question}"),
-        ]
-    )
+    if paint_job(submit_site_job(url, refresh_key)) is None:
+        return
 
-    search_history_chain = (
-        {
-            "history": chatbot_session.load_memory,
-            "question": RunnablePassthrough(),
-        }
-        | search_history_prompt
-        | llm
-        | StrOutputParser()
-    )
+    del st.session_state["site_refresh"]
 
-    inputs["answer"] = search_history_chain.invoke(inputs["question"])
 
-    return inputs
+@st.cache_resource(max_entries=ANSWER_CACHE_ENTRIES)
+def get_answer_cache(user_id, index_version):
+    # 질문 embedding -> 답변을 저장해두는 cache
+    # cache_resource는 모든 session이 같이 쓰므로 사용자별로 나눔
+    # index version별로 나누므로 refresh하면 (다른 process에서도) 새 cache를 사용함
+    return SemanticCache(OpenAIEmbeddings())
 
 
 def get_answers(inputs):
     llm = ChatOpenAI(temperature=0.1)
 
-    answers_prompt = ChatPromptTemplate.from_template(
-        """
+    answers_prompt = ChatPromptTemplate.from_template("""
             Using ONLY the following context answer the user's question. If you can't, just say you don't know. Don't make anything up.
             Then, give a score to the answer between 0 and 5.
             If the answer answers the user's question, the score should be high. Else it should be low.
@@ -123,25 +116,23 @@ def get_answers(inputs):
             Your turn!
 
             Question: {question}
-        """
-    )
+        """)
 
     answers_chain = answers_prompt | llm | StrOutputParser()
 
     docs = inputs["docs"]
     question = inputs["question"]
 
+    # 문서별 answer를 동시에 요청하고, score 5인 답변이 오면 나머지는 기다리지 않음
     return {
         "question": question,
-        "answers": [
-            {
-                "answer": answers_chain.invoke(
-                    {"context": doc.page_content, "question": question}
-                ),
-                "source": doc.metadata["source"],
-            }
-            for doc in docs
-        ],
+        "answers": map_rerank(
+            answers_chain,
+            docs,
+            question,
+            max_concurrency=ANSWER_CONCURRENCY,
+            timeout=ANSWER_TIMEOUT,
+        ),
     }
 
 
@@ -185,44 +176,82 @@ def choose_answer(inputs):
         )
         chatbot_session.save_memory(question, response)
 
+    return response
+
 
 def get_answer(inputs):
-    # history에 없을 경우 get new answers
-    if inputs["answer"] == "False":
-        retriever = inputs["retriever"]
-        question = inputs["question"]
-
-        get_answer_chain = (
-            {
-                "docs": retriever,
-                "question": RunnablePassthrough(),
-            }
-            | RunnableLambda(get_answers)
-            | RunnableLambda(choose_answer)
-        )
+    question = inputs["question"]
+    answer_cache = inputs["answer_cache"]
 
-        get_answer_chain.invoke(question)
+    # 비슷한 질문에 답한 적이 있으면 LLM 호출 없이 저장된 답변을 사용
+    cached_answer, question_vector = answer_cache.lookup(question)
+    if cached_answer:
+        chatbot_session.send_message(cached_answer, "ai")
+        chatbot_session.save_memory(question, cached_answer)
+        return
 
-    # history에 있을 경우, history에서 답변을 불러옴
-    else:
-        chatbot_session.send_message(inputs["answer"], "ai")
+    # cache에 없을 경우 get new answers
+    get_answer_chain = (
+        {
+            "docs": inputs["retriever"],
+            "question": RunnablePassthrough(),
+        }
+        | RunnableLambda(get_answers)
+        | RunnableLambda(choose_answer)
+    )
 
+    response = get_answer_chain.invoke(question)
+    answer_cache.store(question, response, question_vector)
 
-def respond_to_question(question, url):
-    retriever = load_site(url)
 
-    chain = search_history | RunnableLambda(get_answer)
+@st.cache_resource(show_spinner=False)
+def get_remote_retriever(access_token, index_name, _fallback):
+    # 질문할 때마다 새로 연결하지 않도록 index별로 한 번만 만듦
+    return remote_index.RemoteRetriever(
+        client=IndexClient(access_token),
+        index_name=index_name,
+        embeddings=OpenAIEmbeddings(),
+        fallback=_fallback,
+    )
+
+
+def get_retriever(result):
+    # job에서 index service에 올려둔 index로 검색 (여러 worker가 같은 index를 각자 메모리에 올리지 않도록)
+    # 올리지 못했거나 service에 연결할 수 없으면 로컬 index를 사용
+    index_path = result["index_path"]
+
+    def local_retriever():
+        return load_site(index_path, remote_index.index_version(index_path))
+
+    if result["remote_index"] is None:
+        return local_retriever()
+    return get_remote_retriever(
+        st.session_state["access_token"],
+        result["remote_index"],
+        local_retriever,
+    )
 
-    chain.invoke({"question": question, "retriever": retriever})
+
+def respond_to_question(question, result):
+    retriever = get_retriever(result)
+
+    get_answer(
+        {
+            "question": question,
+            "retriever": retriever,
+            "answer_cache": get_answer_cache(
+                token_user_id(st.session_state.get("access_token")),
+                remote_index.index_version(result["index_path"]),
+            ),
+        }
+    )
 
 
 ### Main
 if not st.session_state.get("api_key"):
-    st.markdown(
-        """
+    st.markdown("""
         ## Enter your OpenAI API key for using this app.
-        """
-    )
+        """)
     if st.button(
         label="Go to Home",
         help="You can enter your OpenAI API key on the Home page.",
@@ -242,6 +271,17 @@ else:
                 st.error("Please write down a valid sitemap URL.")
 
         else:
+            with st.sidebar:
+                if st.button("Refresh site"):
+                    st.session_state["site_refresh"] = f"{url}-{time.time()}"
+                refresh_site(url)
+
+            result = paint_job(submit_site_job(url))
+
+            # 처음 불러오는 사이트는 끝날 때까지 진행 상황만 보여줌
+            if result is None:
+                st.stop()
+
             # 채팅 히스토리
             chatbot_session.paint_messages()
 
@@ -257,12 +297,10 @@ else:
             if question:
                 chatbot_session.send_message(question, "human")
                 with st.chat_message("ai"):
-                    respond_to_question(question, url)
+                    respond_to_question(question, result)
 
     else:
         st.title("SiteGPT")
-        st.markdown(
-            """
+        st.markdown("""
                 ## Write down an URL to ask questions about its content.
-            """
-        )
+            """)
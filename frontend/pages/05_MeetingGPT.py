@@ -1,31 +1,25 @@
 import streamlit as st
 from streamlit_float import *
-import os
-import math
+
+# api
+from api.index import IndexClient
+from api.user import token_user_id
 
 # utils
-from utils import common
+from utils import jobs, remote_index, summarizer, upload_store
 from utils.chat_callback_handler import ChatCallbackHandler
 from utils.chatbot_session import ChatBotSession
 from utils.docs_handler import DocsHandler
-
-# File
-from pydub import AudioSegment
-import subprocess
-import glob
-
-# OpenAI
-from openai import OpenAI
+from utils.job_queue import get_job_queue, paint_job
 
 # LangChain - Chain
 from langchain_openai.chat_models import ChatOpenAI
-from langchain.prompts import PromptTemplate, ChatPromptTemplate
+from langchain.prompts import ChatPromptTemplate
 from langchain.schema import StrOutputParser
 from langchain.schema.runnable import RunnablePassthrough, RunnableLambda
 
 # LangChain - Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.memory import ConversationBufferMemory
+from langchain_openai.embeddings import OpenAIEmbeddings
 
 ### Settings
 # a. Set the page configuration
@@ -36,170 +30,85 @@ st.set_page_config(
 float_init(theme=True)
 
 # b. Initialization
-# b-1. OpenAI
-openai = OpenAI()
-
-# b-2. docs
+# b-1. docs
 docs_handler = DocsHandler()
-docs_handler.splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-    chunk_size=800, chunk_overlap=100
-)
+docs_handler.splitter = jobs.meeting_splitter()
 
-# b-3. chat
+# b-2. chat
 chatbot_session = ChatBotSession("meeting")
 chat_handler = ChatCallbackHandler(chatbot_session)
 
-# b-4. memory
-if chatbot_session.memory is None:
-    chatbot_session.set_memory(
-        ConversationBufferMemory(
-            return_messages=True,
-            memory_key="history",
-        )
-    )
+# b-3. memory
+chatbot_session.init_memory()
 
 
 ### Functions
 @st.cache_resource(show_spinner="Saving video...")
 def save_video(video):
-    # setting path
-    video_folder = "./.cache/videos"
-    common.check_dir(video_folder)
-
-    # save uploaded video
-    video_content = video.read()
-    with open(f"{video_folder}/{video.name}", "wb") as f:
-        f.write(video_content)
-
-    return f"{video_folder}/{video.name}"
-
-
-@st.cache_resource(show_spinner="Extracting audio...")
-def extract_audio(video_path):
-    audio_path = video_path.replace("videos", "audios").replace(".mp4", ".mp3")
-    common.check_dir(os.path.dirname(audio_path))
-
-    # -y: overwrite output files without asking
-    # -i: input file
-    # -vn: 비디오 인코딩 비활성화
-    command = ["ffmpeg", "-y", "-i", video_path, "-vn", audio_path]
-
-    # subprocess: 파이썬에서 명령어를 실행할 수 있게 해주는 모듈
-    subprocess.run(command)
-
-    return audio_path
-
-
-@st.cache_resource(show_spinner="Splitting audio...")
-def split_audio(audio_path, segment_size):
-    # extracting file name
-    audio_name = os.path.splitext(os.path.basename(audio_path))[0]
-
-    # setting path
-    segment_folder = "./.cache/audios/segments"
-    common.check_dir(segment_folder)
-
-    specific_segment_folder = f"{segment_folder}/{audio_name}"
-    common.check_dir(specific_segment_folder)
-
-    audio = AudioSegment.from_file(audio_path)
-    segment_count = math.ceil(len(audio) / (segment_size * 1000))
-
-    max_digits = math.ceil(segment_count / 10)
-    for i in range(segment_count):
-        index_digits = math.ceil(i / 10)
-        if i % 10 == 0:
-            index_digits += 1
-        num = "0"
-        for n in range(max_digits - index_digits):
-            num += "0"
-        num += str(i)
-
-        start_time = i * segment_size * 1000
-        end_time = start_time + (segment_size * 1000)
-        segment = audio[start_time:end_time]
-
-        segment.export(
-            f"{specific_segment_folder}/segment_{num}.mp3",
-            format="mp3",
-        )
-
-    return specific_segment_folder
-
-
-@st.cache_resource(show_spinner="Transcribing audio...")
-def transcribe_audio(audio_segments_folder, filename):
-    text_folder = "./.cache/texts"
-    common.check_dir(text_folder)
-
-    text_path = f"{text_folder}/{filename}.txt"
-
-    audio_files = glob.glob(f"{audio_segments_folder}/*.mp3")
-    audio_files.sort()
-
-    for audio_file in audio_files:
-        with open(audio_file, "rb") as audio_file, open(
-            text_path, "a"
-        ) as text_file:
-            transcription = openai.audio.transcriptions.create(
-                model="gpt-4o-transcribe",
-                file=audio_file,
-                response_format="text",
-            )
-            text_file.write(transcription + " ")
-
-    return text_path
+    return upload_store.save_upload(video, "./.cache/videos")
+
+
+def process_video(video_path, segment_mode):
+    # 영상 처리(segment -> transcript -> index)는 job_queue의 worker process에서 실행
+    # 같은 사용자가 같은 영상/설정이면 rerun마다 호출해도 job은 한 번만 실행됨
+    job_id = get_job_queue().submit(
+        "meeting",
+        f"{video_path}-{segment_mode}",
+        jobs.process_meeting,
+        video_path,
+        segment_mode,
+        env={"OPENAI_API_KEY": st.session_state["api_key"]},
+        scope=token_user_id(st.session_state.get("access_token")),
+        index_client=IndexClient(st.session_state["access_token"]),
+    )
+    return paint_job(job_id)
 
 
 @st.cache_resource(show_spinner="Creating summary...")
-def generate_summary(text_path):
+def generate_summary(text_path, mode="Refine"):
     llm = ChatOpenAI(temperature=0.1)
 
     docs = docs_handler.split_n_return_docs(text_path)
 
-    initial_prompt = PromptTemplate.from_template(
-        """
-            Write a concise summary of the following.
-            The summary should be in the language of the text.
-            ------------
-            {context}
-            ------------
-            Use the language of the text.
-        """
+    # Refine: chunk를 순서대로 하나씩 반영 (chunk 수만큼 순차 호출)
+    # Map-Reduce: chunk별 요약을 동시에 만든 뒤 합침 (긴 영상일수록 빠름)
+    if mode == "Map-Reduce":
+        return summarizer.map_reduce_summary(llm, docs)
+    return summarizer.refine_summary(llm, docs)
+
+
+@st.cache_resource(show_spinner=False)
+def get_remote_retriever(access_token, index_name, _fallback):
+    # 질문할 때마다 새로 연결하지 않도록 index별로 한 번만 만듦
+    return remote_index.RemoteRetriever(
+        client=IndexClient(access_token),
+        index_name=index_name,
+        embeddings=OpenAIEmbeddings(),
+        fallback=_fallback,
     )
-    initial_chain = initial_prompt | llm | StrOutputParser()
-    summary = initial_chain.invoke({"context": docs[0].page_content})
 
-    summary_prompt = PromptTemplate.from_template(
-        """
-            Product a final summary.
-            The summary should be in the language of the text.
 
-            Existing summary up to this point:
-            {previous_summary}
+def get_retriever(result):
+    # job에서 index service에 올려둔 index로 검색 (여러 worker가 같은 index를 각자 메모리에 올리지 않도록)
+    # 올리지 못했거나 service에 연결할 수 없으면 로컬 index를 사용
+    text_path = result["text_path"]
 
-            New context:
-            ------------
-            {context}
-            ------------
+    def local_retriever():
+        return docs_handler.embedding_n_return_retriever(text_path)
 
-            Given the new context, refine the original summary.
-        """
+    if result["remote_index"] is None:
+        return local_retriever()
+    return get_remote_retriever(
+        st.session_state["access_token"],
+        result["remote_index"],
+        local_retriever,
     )
-    summary_chain = summary_prompt | llm | StrOutputParser()
-
-    for doc in docs[1:]:
-        summary = summary_chain.invoke(
-            {"previous_summary": summary, "context": doc.page_content}
-        )
-
-    return summary
 
 
-def respond_to_question(question, file_path):
+def respond_to_question(question, result):
     llm = ChatOpenAI(temperature=0.1, streaming=True, callbacks=[chat_handler])
 
-    retriever = docs_handler.embedding_n_return_retriever(file_path)
+    retriever = get_retriever(result)
 
     qna_prompt = ChatPromptTemplate.from_messages(
         [
@@ -225,7 +134,7 @@ def respond_to_question(question, file_path):
         (
             {
                 "context": (
-                    retriever | RunnableLambda(docs_handler.format_docs)
+                    retriever | RunnableLambda(docs_handler.pack_docs)
                 ),
                 "question": RunnablePassthrough(),
                 "history": chatbot_session.load_memory,
@@ -242,11 +151,9 @@ def respond_to_question(question, file_path):
 
 ### Main
 if not st.session_state.get("api_key"):
-    st.markdown(
-        """
+    st.markdown("""
             ## Enter your OpenAI API key for using this app.
-        """
-    )
+        """)
     if st.button(
         label="Go to Home",
         help="You can enter your OpenAI API key on the Home page.",
@@ -264,24 +171,33 @@ else:
             "Upload a video file (MP4 format)",
             type=["mp4"],
         )
+        segment_mode = st.radio(
+            "Audio segmentation", options=["Fixed", "Silence-aware"]
+        )
 
     if uploaded_video:
         video_path = save_video(uploaded_video)
-        audio_path = extract_audio(video_path)
-        specific_segment_folder = split_audio(
-            audio_path, segment_size=30
-        )  # 30 seconds
-        text_path = transcribe_audio(
-            specific_segment_folder, os.path.splitext(uploaded_video.name)[0]
-        )
 
         with transcription_tab:
+            result = process_video(video_path, segment_mode)
+
+            # 처리가 끝날 때까지는 진행 상황만 보여줌
+            if result is None:
+                st.stop()
+
+            text_path = result["text_path"]
+
             transcription = open(text_path, "r").read()
             st.write(transcription)
 
         with summary_tab:
+            summary_mode = st.radio(
+                "Summary mode",
+                options=["Refine", "Map-Reduce"],
+                horizontal=True,
+            )
             if st.button("Generate Summary"):
-                summary_text = generate_summary(text_path)
+                summary_text = generate_summary(text_path, summary_mode)
                 st.write(summary_text)
 
         with qna_tab:
@@ -312,4 +228,4 @@ else:
             if question:
                 chatbot_session.send_message(question, "human")
                 with st.chat_message("ai"):
-                    respond_to_question(question, text_path)
+                    respond_to_question(question, result)
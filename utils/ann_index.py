@@ -0,0 +1,250 @@
+import os
+import math
+
+import numpy as np
+
+from langchain_community.vectorstores.faiss import dependable_faiss_import
+
+# flat: 모든 vector와 비교 (정확하지만 chunk 수에 비례해서 느려짐)
+# hnsw: graph 탐색, 빠르고 recall이 높지만 vector를 그대로 저장하고 graph까지 들고 있음
+# ivf: vector들을 nlist개의 cluster로 나눠두고, query와 가까운 nprobe개의 cluster만 비교
+# ivfpq: ivf + product quantization, vector를 압축해서 저장 (메모리 사용량이 가장 적음)
+INDEX_TYPES = ("flat", "hnsw", "ivf", "ivfpq")
+INDEX_TYPE = os.getenv("INDEX_TYPE", "auto")
+
+# auto일 때 chunk 수에 따라 선택 (benchmarks/ann_index.py 결과 참고)
+FLAT_MAX_COUNT = 20_000
+HNSW_MAX_COUNT = 200_000
+IVF_MAX_COUNT = 1_000_000
+
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+IVF_NPROBE = 16
+IVF_TRAIN_PER_LIST = 64  # cluster 하나당 학습에 사용할 vector 수
+MIN_POINTS_PER_LIST = 39  # faiss가 k-means 학습에 요구하는 최소 vector 수
+IVF_MIN_COUNT = (
+    10_000  # 이보다 적으면 cluster/PQ 학습이 제대로 되지 않으므로 flat 사용
+)
+PQ_BITS = 8
+PQ_SUBVECTOR_DIMENSION = 4  # sub-quantizer 하나가 담당할 차원 수
+# 마지막으로 새로 만든 뒤 추가/삭제된 vector 수가 이 비율을 넘으면 새로 만듦
+# (IVF cluster가 데이터와 맞지 않게 되거나, HNSW에 삭제 표시된 vector가 쌓이므로)
+REBUILD_RATIO = float(os.getenv("ANN_REBUILD_RATIO", "0.2"))
+BUILD_BATCH = 65_536  # flat index에서 한 번에 꺼내서 추가할 vector 수
+
+
+def choose_index_type(count: int):
+    if count <= FLAT_MAX_COUNT:
+        return "flat"
+    if count <= HNSW_MAX_COUNT:
+        return "hnsw"
+    if count <= IVF_MAX_COUNT:
+        return "ivf"
+    return "ivfpq"
+
+
+def ivf_nlist(count: int):
+    # 보통 sqrt(N)의 몇 배 정도로 잡음
+    nlist = int(4 * math.sqrt(count))
+    return max(1, min(nlist, count // MIN_POINTS_PER_LIST))
+
+
+def pq_m(dimension: int):
+    # sub-quantizer 수는 dimension의 약수여야 함
+    m = max(1, dimension // PQ_SUBVECTOR_DIMENSION)
+    while dimension % m:
+        m -= 1
+    return m
+
+
+def default_params(index_type: str, count: int, dimension: int):
+    if index_type == "hnsw":
+        return {
+            "m": HNSW_M,
+            "ef_construction": HNSW_EF_CONSTRUCTION,
+            "ef_search": HNSW_EF_SEARCH,
+        }
+    if index_type == "ivf":
+        return {"nlist": ivf_nlist(count), "nprobe": IVF_NPROBE}
+    if index_type == "ivfpq":
+        return {
+            "nlist": ivf_nlist(count),
+            "nprobe": IVF_NPROBE,
+            "m": pq_m(dimension),
+            "bits": PQ_BITS,
+        }
+    return {}
+
+
+def configure(index, index_type: str, params: dict):
+    # 검색할 때만 쓰이는 설정 (index를 다시 만들지 않고 바꿀 수 있음)
+    # downcast_index는 같은 index를 가리키기만 하므로, 원래 객체를 반환해야 함
+    faiss = dependable_faiss_import()
+    target = faiss.downcast_index(index)
+    if index_type == "hnsw" and "ef_search" in params:
+        target.hnsw.efSearch = params["ef_search"]
+    if index_type in ("ivf", "ivfpq") and "nprobe" in params:
+        target.nprobe = params["nprobe"]
+    return index
+
+
+def training_sample(count: int, size: int, seed: int = 0):
+    # 학습에 사용할 vector 위치 (전체 중 size개)
+    if count <= size:
+        return np.arange(count, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(count, size, replace=False)).astype(np.int64)
+
+
+def resolve_type(index_type: str, count: int):
+    if index_type == "auto":
+        index_type = choose_index_type(count)
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {index_type}")
+    if index_type in ("ivf", "ivfpq") and count < IVF_MIN_COUNT:
+        index_type = "flat"
+    return index_type
+
+
+def is_hnsw(index):
+    faiss = dependable_faiss_import()
+    return isinstance(faiss.downcast_index(index), faiss.IndexHNSW)
+
+
+def add_vectors(index, flat_index, positions, labels):
+    # flat index의 positions 위치에 있는 vector를 BUILD_BATCH개씩 꺼내서 labels로 추가
+    # (전체 vector를 한 번에 복사하지 않음)
+    # HNSW는 label을 지정할 수 없으므로 labels는 index.ntotal부터 차례대로여야 함
+    hnsw = is_hnsw(index)
+    for start in range(0, len(positions), BUILD_BATCH):
+        end = start + BUILD_BATCH
+        vectors = flat_index.reconstruct_batch(positions[start:end])
+        if hnsw:
+            index.add(vectors)
+        else:
+            index.add_with_ids(vectors, labels[start:end])
+
+
+def build(flat_index, index_type: str = INDEX_TYPE, **params):
+    # flat index에 저장된 vector로 ANN index를 만들어 반환 (flat이면 None)
+    # label은 flat index의 위치와 같으므로 docstore id 매핑은 그대로 사용할 수 있음
+    # 반환값: (index, {"type", "params", "built_count", "changes", "next_label"})
+    faiss = dependable_faiss_import()
+    count, dimension = flat_index.ntotal, flat_index.d
+
+    index_type = resolve_type(index_type, count)
+    if index_type == "flat" or count == 0:
+        return None, {"type": "flat", "params": {}}
+
+    params = {**default_params(index_type, count, dimension), **params}
+    metric = flat_index.metric_type
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, params["m"], metric)
+        index.hnsw.efConstruction = params["ef_construction"]
+    else:
+        quantizer = faiss.IndexFlat(dimension, metric)
+        if index_type == "ivf":
+            index = faiss.IndexIVFFlat(
+                quantizer, dimension, params["nlist"], metric
+            )
+        else:
+            index = faiss.IndexIVFPQ(
+                quantizer,
+                dimension,
+                params["nlist"],
+                params["m"],
+                params["bits"],
+                metric,
+            )
+        # 전체가 아닌 일부 vector로만 cluster를 학습
+        index.train(
+            flat_index.reconstruct_batch(
+                training_sample(count, params["nlist"] * IVF_TRAIN_PER_LIST)
+            )
+        )
+
+    positions = np.arange(count, dtype=np.int64)
+    add_vectors(index, flat_index, positions, positions)
+    return configure(index, index_type, params), {
+        "type": index_type,
+        "params": params,
+        "built_count": count,
+        "changes": 0,
+        "next_label": count,
+    }
+
+
+def update(
+    index,
+    settings: dict,
+    ids: dict,
+    deleted: set,
+    flat_index,
+    flat_ids: dict,
+    index_type: str = INDEX_TYPE,
+):
+    # 이전에 만든 ANN index에 flat index와 달라진 vector만 추가/삭제
+    # ids: {ANN label: docstore id}, flat_ids: {flat index 위치: docstore id}
+    # deleted: 검색에서 제외할 label (HNSW는 vector를 지울 수 없으므로 삭제 표시만 함)
+    # 반환값: (index, settings, ids, deleted), 새로 만들어야 하면 None
+    faiss = dependable_faiss_import()
+    if resolve_type(index_type, flat_index.ntotal) != settings.get("type"):
+        return None
+    if "next_label" not in settings:
+        return None
+
+    positions = {id_: position for position, id_ in flat_ids.items()}
+    stored = set(ids.values())
+    removed = [label for label, id_ in ids.items() if id_ not in positions]
+    added = [
+        position for id_, position in positions.items() if id_ not in stored
+    ]
+    changes = settings["changes"] + len(added) + len(removed)
+    if changes > REBUILD_RATIO * settings["built_count"]:
+        return None
+
+    ids = {label: id_ for label, id_ in ids.items() if id_ in positions}
+    deleted = set(deleted)
+    if removed:
+        if is_hnsw(index):
+            deleted.update(removed)
+        else:
+            index.remove_ids(
+                faiss.IDSelectorBatch(np.array(removed, dtype=np.int64))
+            )
+
+    next_label = settings["next_label"]
+    if added:
+        labels = np.arange(next_label, next_label + len(added), dtype=np.int64)
+        add_vectors(index, flat_index, np.array(added, dtype=np.int64), labels)
+        ids.update(zip(labels.tolist(), (flat_ids[p] for p in added)))
+        next_label += len(added)
+
+    settings = {**settings, "changes": changes, "next_label": next_label}
+    return index, settings, ids, deleted
+
+
+class FilteredIndex:
+    # 삭제 표시된 label을 빼고 검색하는 HNSW index wrapper
+    # FAISS vector store는 index의 search, d, ntotal만 사용함
+    def __init__(self, index, deleted: set, ef_search: int = HNSW_EF_SEARCH):
+        faiss = dependable_faiss_import()
+        self.index = index
+        self.d = index.d
+        self.ntotal = index.ntotal - len(deleted)
+        # selector는 params가 참조만 하므로 같이 들고 있어야 함
+        self._deleted = faiss.IDSelectorBatch(
+            np.array(sorted(deleted), dtype=np.int64)
+        )
+        self._selector = faiss.IDSelectorNot(self._deleted)
+        self._params = faiss.SearchParametersHNSW(
+            sel=self._selector, efSearch=ef_search
+        )
+
+    def search(self, vectors, k: int):
+        return self.index.search(vectors, k, params=self._params)
+
+    def __getattr__(self, name):
+        return getattr(self.index, name)
@@ -0,0 +1,198 @@
+import os
+import glob
+import subprocess
+
+import numpy as np
+
+from utils import common
+
+SEGMENT_PATTERN = "segment_%05d.mp3"
+
+
+def segment_paths(segment_folder: str):
+    # segment_00000.mp3, segment_00001.mp3 ... 이름 순서 = 시간 순서
+    return sorted(glob.glob(f"{segment_folder}/segment_*.mp3"))
+
+
+def split_audio(video_path: str, segment_folder: str, segment_size: int = 30):
+    # 영상에서 오디오를 뽑아 segment_size초 단위 mp3로 바로 잘라서 저장
+    # ffmpeg가 스트림을 읽으면서 segment 파일을 차례로 쓰기 때문에,
+    # 전체 오디오를 파일이나 메모리(PCM)로 한 번에 만들지 않아 영상 길이와 상관없이 메모리 사용량이 일정함
+    common.check_dir(segment_folder)
+
+    # 이전에 중간에 멈춘 결과가 남아있으면 지우고 다시 만듦
+    for path in segment_paths(segment_folder):
+        os.remove(path)
+
+    # -vn: 비디오 인코딩 비활성화
+    # -map 0:a:0: 첫 번째 오디오 스트림만 사용
+    # -f segment -segment_time: segment_size초 단위로 잘라서 저장
+    # -reset_timestamps 1: segment마다 timestamp를 0부터 시작
+    command = [
+        "ffmpeg",
+        "-y",
+        "-loglevel",
+        "error",
+        "-i",
+        video_path,
+        "-vn",
+        "-map",
+        "0:a:0",
+        "-c:a",
+        "libmp3lame",
+        "-f",
+        "segment",
+        "-segment_time",
+        str(segment_size),
+        "-reset_timestamps",
+        "1",
+        f"{segment_folder}/{SEGMENT_PATTERN}",
+    ]
+    subprocess.run(command, check=True)
+
+    return segment_folder
+
+
+# silence 기준 segment 분할 설정
+SAMPLE_RATE = 16000  # ffmpeg로 16kHz mono PCM으로 변환해서 분석
+FRAME_MS = 30
+SILENCE_DB = -40  # 이 값보다 작은 frame은 무음으로 판단
+MIN_SILENCE_MS = 300
+READ_FRAMES = 2000  # 한 번에 읽을 frame 수 (2000 * 30ms = 60초)
+
+
+def frame_energies(samples, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS):
+    # int16 PCM -> frame별 음량(dBFS)
+    # (frame 수, frame 길이) 행렬로 바꿔서 한 번에 계산 (마지막 남는 sample은 버림)
+    frame_length = sample_rate * frame_ms // 1000
+    frame_count = len(samples) // frame_length
+    frames = samples[: frame_count * frame_length].reshape(
+        frame_count, frame_length
+    )
+    rms = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1))
+    return 20 * np.log10(rms / 32768 + 1e-10)
+
+
+def find_silences(
+    energies,
+    silence_db=SILENCE_DB,
+    frame_ms=FRAME_MS,
+    min_silence_ms=MIN_SILENCE_MS,
+):
+    # 무음 frame이 min_silence_ms 이상 이어지는 구간의 (시작, 끝) frame 목록
+    silent = np.concatenate(([False], energies < silence_db, [False]))
+    edges = np.flatnonzero(np.diff(silent.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    keep = (ends - starts) * frame_ms >= min_silence_ms
+    return np.stack([starts[keep], ends[keep]], axis=1)
+
+
+def plan_cuts(
+    silences,
+    duration,
+    target_seconds,
+    max_seconds,
+    frame_ms=FRAME_MS,
+):
+    # 무음 구간의 가운데를 자를 후보로 두고, segment가 target_seconds를 넘지 않는 선에서 최대한 길게 묶음
+    # target 안에 후보가 없으면 max_seconds까지의 첫 후보에서, 그것도 없으면 max_seconds에서 자름
+    candidates = (silences.sum(axis=1) / 2) * frame_ms / 1000
+    cuts = []
+    start = 0.0
+    while duration - start > target_seconds:
+        left = np.searchsorted(candidates, start, side="right")
+        right = np.searchsorted(
+            candidates, start + target_seconds, side="right"
+        )
+        if right > left:
+            cut = candidates[right - 1]
+        elif (
+            right < len(candidates)
+            and candidates[right] <= start + max_seconds
+        ):
+            cut = candidates[right]
+        else:
+            cut = start + max_seconds
+        cuts.append(float(cut))
+        start = cut
+    return cuts
+
+
+def detect_cuts(video_path: str, target_seconds: float, max_seconds: float):
+    # ffmpeg가 16kHz mono PCM을 stdout으로 흘려보내면, READ_FRAMES 단위로 읽어서 음량만 계산
+    # 오디오 전체를 메모리에 올리지 않고 frame별 음량(30ms당 float 하나)만 저장함
+    command = [
+        "ffmpeg",
+        "-loglevel",
+        "error",
+        "-i",
+        video_path,
+        "-vn",
+        "-ac",
+        "1",
+        "-ar",
+        str(SAMPLE_RATE),
+        "-f",
+        "s16le",
+        "-",
+    ]
+    frame_bytes = SAMPLE_RATE * FRAME_MS // 1000 * 2
+    energies = []
+    with subprocess.Popen(command, stdout=subprocess.PIPE) as process:
+        while block := process.stdout.read(frame_bytes * READ_FRAMES):
+            energies.append(
+                frame_energies(np.frombuffer(block, dtype=np.int16))
+            )
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+    energies = np.concatenate(energies) if energies else np.array([])
+    duration = len(energies) * FRAME_MS / 1000
+    return plan_cuts(
+        find_silences(energies), duration, target_seconds, max_seconds
+    )
+
+
+def split_audio_on_silence(
+    video_path: str,
+    segment_folder: str,
+    target_seconds: float = 300,
+    max_seconds: float = 600,
+):
+    # 고정 길이 대신 말이 끊기는 지점(무음)에서 잘라서, 더 적고 긴 segment를 만듦
+    common.check_dir(segment_folder)
+    for path in segment_paths(segment_folder):
+        os.remove(path)
+
+    cuts = detect_cuts(video_path, target_seconds, max_seconds)
+
+    command = [
+        "ffmpeg",
+        "-y",
+        "-loglevel",
+        "error",
+        "-i",
+        video_path,
+        "-vn",
+        "-map",
+        "0:a:0",
+        "-c:a",
+        "libmp3lame",
+    ]
+    # -segment_times: 지정한 시간(초)마다 잘라서 저장
+    # 자를 곳이 없으면(전체 길이가 target보다 짧으면) segment 하나로 저장
+    if cuts:
+        command += [
+            "-f",
+            "segment",
+            "-segment_times",
+            ",".join(f"{cut:.3f}" for cut in cuts),
+            "-reset_timestamps",
+            "1",
+            f"{segment_folder}/{SEGMENT_PATTERN}",
+        ]
+    else:
+        command.append(f"{segment_folder}/{SEGMENT_PATTERN % 0}")
+    subprocess.run(command, check=True)
+
+    return segment_folder
@@ -1,3 +1,5 @@
+import time
+
 import streamlit as st
 
 # utils
@@ -6,20 +8,83 @@ from utils.chatbot_session import ChatBotSession
 # LangChain
 from langchain.callbacks.base import BaseCallbackHandler
 
+# token마다 화면을 다시 그리지 않고, 모아서 FLUSH_INTERVAL초 또는 FLUSH_TOKENS개마다 그림
+FLUSH_INTERVAL = 0.05  # seconds
+FLUSH_TOKENS = 20
+
 
 class ChatCallbackHandler(BaseCallbackHandler):
-    def __init__(self, session: ChatBotSession):
+    def __init__(
+        self,
+        session: ChatBotSession,
+        flush_interval: float = FLUSH_INTERVAL,
+        flush_tokens: int = FLUSH_TOKENS,
+    ):
         self.session = session
+        self.flush_interval = flush_interval
+        self.flush_tokens = flush_tokens
         self.ai_message = ""
         self.message_box = None
+        # 화면에 그린 token들 (ai_message는 응답이 끝날 때 한 번만 합침)
+        self._chunks = []
+        self._tokens = []  # 아직 그리지 않은 token들
+        self._token_count = 0
+        self._start = None
+        self._first_token = None
+        self._last_flush = None
 
     def on_llm_start(self, *args, **kwargs):
+        # 응답마다 새로 시작 (이전 응답이 이어붙지 않도록)
         self.message_box = st.empty()
+        self.ai_message = ""
+        self._chunks = []
+        self._tokens = []
+        self._token_count = 0
+        self._start = self._last_flush = time.perf_counter()
+        self._first_token = None
 
     def on_llm_new_token(self, token, *args, **kwargs):
-        self.ai_message += token
-        self.message_box.write(self.ai_message)
+        now = time.perf_counter()
+        if self._first_token is None:
+            self._first_token = now
+        self._tokens.append(token)
+        self._token_count += 1
+        if (
+            len(self._tokens) >= self.flush_tokens
+            or now - self._last_flush >= self.flush_interval
+        ):
+            self._flush(now)
+
+    def _flush(self, now):
+        # 지금까지의 답변 문자열은 그릴 때만 합치고 ai_message에 매번 이어붙이지 않음
+        # (긴 답변에서 flush마다 전체 문자열을 새로 만들지 않도록)
+        if self._tokens:
+            self._chunks.extend(self._tokens)
+            self._tokens = []
+            self.message_box.write("".join(self._chunks))
+        self._last_flush = now
 
     def on_llm_end(self, *args, **kwargs):
+        end = time.perf_counter()
+        self._flush(end)
+        self.ai_message = "".join(self._chunks)
         if self.ai_message:
             self.session.save_message(self.ai_message, "ai")
+        if self._first_token is not None:
+            # ttft: 요청부터 첫 token까지, tokens_per_second: 첫 token 이후 생성 속도
+            generation = end - self._first_token
+            self.session.save_metrics(
+                {
+                    "ttft": self._first_token - self._start,
+                    "tokens": self._token_count,
+                    "tokens_per_second": (
+                        self._token_count / generation if generation else None
+                    ),
+                    "total": end - self._start,
+                }
+            )
+
+    def on_llm_error(self, *args, **kwargs):
+        # 에러가 나도 받은 부분까지는 보여줌
+        self._flush(time.perf_counter())
+        self.ai_message = "".join(self._chunks)
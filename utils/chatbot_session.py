@@ -1,5 +1,9 @@
 import streamlit as st
 
+from utils.conversation_memory import MEMORY_STRATEGY, make_memory
+
+MAX_METRICS = 100
+
 
 class ChatBotSession:
     def __init__(self, session_key: str):
@@ -26,18 +30,32 @@ class ChatBotSession:
         for message in st.session_state[self.key]["messages"]:
             self.send_message(message["message"], message["role"], save=False)
 
+    def save_metrics(self, metrics: dict):
+        # 응답별 streaming 지표 (ttft, tokens_per_second 등), 최근 MAX_METRICS개만 보관
+        metrics_list = st.session_state[self.key].setdefault("metrics", [])
+        metrics_list.append(metrics)
+        del metrics_list[:-MAX_METRICS]
+
+    @property
+    def metrics(self):
+        return st.session_state[self.key].get("metrics", [])
+
     def set_memory(self, memory_object):
         st.session_state[self.key]["memory"] = memory_object
 
+    def init_memory(self, strategy: str = MEMORY_STRATEGY, **kwargs):
+        # strategy: "window", "summary", "vector" (utils/conversation_memory.py)
+        if self.memory is None:
+            self.set_memory(make_memory(strategy, **kwargs))
+
     def save_memory(self, input_message, output_message):
         if self.memory:
-            self.memory.save_context(
-                {"input": input_message}, {"output": output_message}
-            )
+            self.memory.save_context(input_message, output_message)
 
-    def load_memory(self, _):
+    # chain에서 호출되면 질문을 받음 ("vector" memory는 질문과 관련 있는 예전 대화를 찾음)
+    def load_memory(self, question):
         if self.memory:
-            return self.memory.load_memory_variables({})["history"]
+            return self.memory.load(question)
         return []
 
     @property
@@ -1,6 +1,14 @@
 import os
+from itertools import islice
 
 
 def check_dir(directory_path):
     if not os.path.exists(directory_path):
         os.makedirs(directory_path)
+
+
+def batched(iterable, size):
+    # iterable을 size개씩 list로 묶어서 넘겨줌 (generator도 한 번에 다 펼치지 않음)
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
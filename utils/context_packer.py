@@ -0,0 +1,95 @@
+import os
+
+import tiktoken
+
+# prompt에 넣을 context의 최대 token 수
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))
+# 예산이 이보다 적게 남으면 긴 문서를 잘라서 넣지 않음 (너무 짧은 조각은 도움이 안 됨)
+MIN_PARTIAL_TOKENS = 100
+# chunk_overlap으로 생긴 겹침으로 판단할 최소 길이 (글자 수)
+MIN_OVERLAP_CHARS = 20
+SEPARATOR = "\n\n"
+# context를 넣을 chat model (page의 ChatOpenAI 기본 model)
+# token 수는 이 model의 tokenizer로 셈 (splitter도 같은 tokenizer를 사용)
+CHAT_MODEL = "gpt-3.5-turbo"
+
+
+def model_encoding(model_name: str = CHAT_MODEL):
+    # model이 사용하는 tiktoken encoding 이름 (모르는 model이면 cl100k_base)
+    try:
+        return tiktoken.model.encoding_name_for_model(model_name)
+    except KeyError:
+        return "cl100k_base"
+
+
+def overlap_length(left: str, right: str, min_length: int = MIN_OVERLAP_CHARS):
+    # left의 끝부분과 right의 앞부분이 겹치는 길이 (min_length보다 짧으면 0)
+    # right 앞부분(min_length 글자)이 나오는 위치 중 가장 앞쪽부터 확인해서 가장 긴 겹침을 찾음
+    if len(left) < min_length or len(right) < min_length:
+        return 0
+    head = right[:min_length]
+    start = max(0, len(left) - len(right))
+    position = left.find(head, start)
+    while position != -1:
+        if right.startswith(left[position:]):
+            return len(left) - position
+        position = left.find(head, position + 1)
+    return 0
+
+
+class ContextPacker:
+    # 검색된 문서(관련도 높은 순)를 max_tokens 안에 들어가는 만큼 context로 묶음
+    # - 다른 chunk에 포함된 chunk는 버리고, chunk_overlap으로 겹치는 부분은 한 번만 넣음
+    # - 예산을 넘는 문서는 건너뛰고 다음 문서를 확인 (남은 예산이 충분하면 앞부분만 잘라서 넣음)
+    def __init__(
+        self,
+        max_tokens: int = CONTEXT_MAX_TOKENS,
+        model_name: str = CHAT_MODEL,
+    ):
+        self.max_tokens = max_tokens
+        self._encoding = tiktoken.get_encoding(model_encoding(model_name))
+
+    def _encode(self, text: str):
+        return self._encoding.encode(text, disallowed_special=())
+
+    def _trim_overlaps(self, text: str, selected):
+        # 이미 넣은 chunk와 겹치는 앞/뒷부분을 잘라냄, 전부 겹치면 None
+        for other in selected:
+            if text in other:
+                return None
+            text = text[overlap_length(other, text) :]
+            cut = overlap_length(text, other)
+            if cut:
+                text = text[:-cut]
+            if not text.strip():
+                return None
+        return text
+
+    def pack(self, docs, max_tokens: int = None):
+        # 반환값: context에 넣을 text 목록 (관련도 순서 유지)
+        budget = self.max_tokens if max_tokens is None else max_tokens
+        separator_tokens = len(self._encode(SEPARATOR))
+        selected, texts = [], []
+        for doc in docs:
+            text = self._trim_overlaps(doc.page_content, selected)
+            if text is None:
+                continue
+
+            tokens = self._encode(text)
+            needed = len(tokens) + (separator_tokens if texts else 0)
+            if needed <= budget:
+                texts.append(text)
+                budget -= needed
+            elif budget - separator_tokens >= MIN_PARTIAL_TOKENS:
+                limit = budget - (separator_tokens if texts else 0)
+                texts.append(self._encoding.decode(tokens[:limit]))
+                break
+            else:
+                continue
+            # 겹침 비교는 잘라내기 전의 원문과 함
+            selected.append(doc.page_content)
+
+        return texts
+
+    def format(self, docs, max_tokens: int = None):
+        return SEPARATOR.join(self.pack(docs, max_tokens))
@@ -0,0 +1,228 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import tiktoken
+
+from langchain.prompts import PromptTemplate
+from langchain.schema import StrOutputParser
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_community.vectorstores import FAISS
+from langchain_openai.chat_models import ChatOpenAI
+from langchain_openai.embeddings import OpenAIEmbeddings
+
+# token-window: 최근 대화만, summary: 오래된 대화는 요약 + 최근 대화,
+# vector: 질문과 관련 있는 예전 대화 + 최근 대화
+MEMORY_STRATEGIES = ("window", "summary", "vector")
+MEMORY_STRATEGY = os.getenv("MEMORY_STRATEGY", "summary")
+# prompt에 넣을 대화 기록의 최대 token 수 (대화가 길어져도 prompt 크기가 일정하도록)
+MEMORY_MAX_TOKENS = int(os.getenv("MEMORY_MAX_TOKENS", "1000"))
+MESSAGE_OVERHEAD_TOKENS = 4  # message마다 role 등으로 추가되는 token
+
+# 요약은 답변을 기다리지 않도록 background thread에서 실행
+summary_executor = ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix="memory-summary"
+)
+
+summary_prompt = PromptTemplate.from_template("""
+        Progressively summarize the lines of conversation provided,
+        adding onto the previous summary and returning a new summary.
+        Keep names, numbers and decisions. Use the language of the conversation.
+
+        Current summary:
+        {summary}
+
+        New lines of conversation:
+        {conversation}
+
+        New summary:
+    """)
+
+encoding = tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(messages):
+    return sum(
+        len(encoding.encode(message.content, disallowed_special=()))
+        + MESSAGE_OVERHEAD_TOKENS
+        for message in messages
+    )
+
+
+def trim_messages(messages, max_tokens: int):
+    # 최근 message부터 max_tokens 안에 들어가는 만큼만 남김 (순서 유지)
+    kept, tokens = [], 0
+    for message in reversed(messages):
+        tokens += count_tokens([message])
+        if tokens > max_tokens:
+            break
+        kept.append(message)
+    return kept[::-1]
+
+
+def format_conversation(messages):
+    return "\n".join(
+        f"{'Human' if isinstance(m, HumanMessage) else 'AI'}: {m.content}"
+        for m in messages
+    )
+
+
+class TokenWindowMemory:
+    # 최근 대화만 max_tokens만큼 기억 (넘는 대화는 버림)
+    def __init__(self, max_tokens: int = MEMORY_MAX_TOKENS):
+        self.max_tokens = max_tokens
+        self.messages = []
+
+    def save_context(self, input_message: str, output_message: str):
+        self.messages += [
+            HumanMessage(content=input_message),
+            AIMessage(content=output_message),
+        ]
+        self.messages = trim_messages(self.messages, self.max_tokens)
+
+    def load(self, question: str = None):
+        return list(self.messages)
+
+
+class SummaryBufferMemory:
+    # 최근 대화는 그대로 두고, max_tokens를 넘으면 오래된 대화를 요약에 합침
+    # 요약은 background thread에서 하므로 답변이 늦어지지 않음
+    # 요약이 끝나기 전에는 요약할 대화(pending)도 최근 대화와 함께 max_tokens 안에서 넣어줌
+    def __init__(self, llm=None, max_tokens: int = MEMORY_MAX_TOKENS):
+        self.llm = llm
+        self.max_tokens = max_tokens
+        self.summary = ""
+        self.pending = []
+        self.buffer = []
+        self._future = None
+        self._lock = threading.Lock()
+
+    def save_context(self, input_message: str, output_message: str):
+        with self._lock:
+            self.buffer += [
+                HumanMessage(content=input_message),
+                AIMessage(content=output_message),
+            ]
+        self._prune()
+
+    def _prune(self):
+        with self._lock:
+            # 요약 중이면 끝난 뒤에 다시 확인
+            if self._future is not None:
+                return
+            if count_tokens(self.buffer) <= self.max_tokens:
+                return
+            # 최근 대화가 max_tokens의 절반이 될 때까지 오래된 대화를 요약으로 넘김
+            while (
+                len(self.buffer) > 2
+                and count_tokens(self.buffer) > self.max_tokens // 2
+            ):
+                self.pending.append(self.buffer.pop(0))
+            if not self.pending:
+                return
+            self._future = summary_executor.submit(
+                self._summarize, self.summary, list(self.pending)
+            )
+
+    def _summarize(self, summary, messages):
+        try:
+            if self.llm is None:
+                # memory는 page에서 api key를 입력받기 전에 만들어지므로 처음 요약할 때 만듦
+                self.llm = ChatOpenAI(temperature=0)
+            chain = summary_prompt | self.llm | StrOutputParser()
+            summary = chain.invoke(
+                {
+                    "summary": summary,
+                    "conversation": format_conversation(messages),
+                }
+            )
+            with self._lock:
+                self.summary = summary
+                self.pending = self.pending[len(messages) :]
+        finally:
+            # 실패하면 pending은 그대로 두고 다음 대화를 저장할 때 다시 요약
+            with self._lock:
+                self._future = None
+        self._prune()
+
+    def load(self, question: str = None):
+        with self._lock:
+            summary, messages = self.summary, self.pending + self.buffer
+        budget = self.max_tokens
+        history = []
+        if summary:
+            history.append(
+                SystemMessage(
+                    content=f"Summary of earlier conversation:\n{summary}"
+                )
+            )
+            budget -= count_tokens(history)
+        return history + trim_messages(messages, budget)
+
+
+class VectorHistoryMemory:
+    # 대화(질문 + 답변)를 embedding해서 저장하고,
+    # 새 질문과 관련 있는 예전 대화 k개와 최근 대화 recent_turns개를 max_tokens 안에서 넣어줌
+    def __init__(
+        self,
+        embeddings=None,
+        k: int = 3,
+        recent_turns: int = 2,
+        max_tokens: int = MEMORY_MAX_TOKENS,
+    ):
+        self.embeddings = embeddings
+        self.k = k
+        self.recent_turns = recent_turns
+        self.max_tokens = max_tokens
+        self.turns = []
+        self.vector_store = None
+
+    def save_context(self, input_message: str, output_message: str):
+        if self.embeddings is None:
+            self.embeddings = OpenAIEmbeddings()
+
+        turn = len(self.turns)
+        self.turns.append((input_message, output_message))
+        text = f"Human: {input_message}\nAI: {output_message}"
+        if self.vector_store is None:
+            self.vector_store = FAISS.from_texts(
+                [text], self.embeddings, metadatas=[{"turn": turn}]
+            )
+        else:
+            self.vector_store.add_texts([text], metadatas=[{"turn": turn}])
+
+    def load(self, question: str = None):
+        recent = list(
+            range(max(0, len(self.turns) - self.recent_turns), len(self.turns))
+        )
+        related = []
+        if question and self.vector_store and len(self.turns) > len(recent):
+            docs = self.vector_store.similarity_search(
+                question, k=self.k + len(recent)
+            )
+            related = [
+                doc.metadata["turn"]
+                for doc in docs
+                if doc.metadata["turn"] not in recent
+            ][: self.k]
+
+        messages = []
+        for turn in sorted(related) + recent:
+            input_message, output_message = self.turns[turn]
+            messages += [
+                HumanMessage(content=input_message),
+                AIMessage(content=output_message),
+            ]
+        return trim_messages(messages, self.max_tokens)
+
+
+def make_memory(strategy: str = MEMORY_STRATEGY, **kwargs):
+    if strategy == "window":
+        return TokenWindowMemory(**kwargs)
+    if strategy == "summary":
+        return SummaryBufferMemory(**kwargs)
+    if strategy == "vector":
+        return VectorHistoryMemory(**kwargs)
+    raise ValueError(
+        f"Unknown memory strategy: {strategy} (use one of {MEMORY_STRATEGIES})"
+    )
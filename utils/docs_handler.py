@@ -1,16 +1,52 @@
 import os
+import zipfile
+from xml.etree import ElementTree
+
 import streamlit as st
 
-from utils import common
+from utils import common, hybrid_retriever, index_store, upload_store
+from utils.context_packer import ContextPacker
 
 from langchain.storage import LocalFileStore
 from langchain_community.document_loaders import (
+    PyPDFLoader,
     UnstructuredFileLoader,
     TextLoader,
 )
 from langchain_openai.embeddings import OpenAIEmbeddings
 from langchain.embeddings.cache import CacheBackedEmbeddings
-from langchain_community.vectorstores import FAISS
+from langchain.schema import Document
+
+TEXT_EXTENSIONS = (".txt", ".md")
+TEXT_BLOCK_SIZE = 64 * 1024  # 64K characters
+# doc_key별로 마지막에 만든 index 경로를 기록하는 폴더
+DOCUMENT_FOLDER = "./.cache/documents"
+WORD_NAMESPACE = (
+    "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+)
+
+
+def iter_docx_paragraphs(file_path: str):
+    # docx(zip) 안의 word/document.xml을 읽으면서 paragraph가 끝날 때마다 text를 넘겨줌
+    # 읽은 부분은 body에서 떼어내서 XML 전체가 메모리에 쌓이지 않도록 함
+    # (표 안의 paragraph처럼 아직 닫히지 않은 element는 떼어내도 계속 채워짐)
+    body = None
+    with zipfile.ZipFile(file_path) as docx:
+        with docx.open("word/document.xml") as xml:
+            for event, element in ElementTree.iterparse(
+                xml, events=("start", "end")
+            ):
+                if event == "start":
+                    if element.tag == f"{WORD_NAMESPACE}body":
+                        body = element
+                elif element.tag == f"{WORD_NAMESPACE}p":
+                    yield "".join(
+                        text.text or ""
+                        for text in element.iter(f"{WORD_NAMESPACE}t")
+                    )
+                    element.clear()
+                    if body is not None:
+                        body.clear()
 
 
 class DocsHandler:
@@ -35,16 +71,7 @@ class DocsHandler:
     # 업로드한 파일이 이미 존재하는 경우 해당 함수를 실행하지 않음
     @st.cache_resource(show_spinner="Saving file...")
     def save_text_file(self, file):
-        # setting path
-        file_folder = "./.cache/files"
-        common.check_dir(file_folder)
-
-        # save uploaded file
-        file_content = file.read()
-        with open(f"{file_folder}/{file.name}", "wb") as f:
-            f.write(file_content)
-
-        return f"{file_folder}/{file.name}"
+        return upload_store.save_upload(file, "./.cache/files")
 
     @st.cache_resource(show_spinner="Loading file...")
     def load_file(self, file_path: str):
@@ -57,25 +84,145 @@ class DocsHandler:
 
         return loader.load_and_split(text_splitter=self._splitter)
 
-    @st.cache_resource(show_spinner="Embedding file...")
-    def embedding_n_return_retriever(self, file_path: str):
-        cache_dir = "./.cache/embeddings"
-        common.check_dir(cache_dir)
-
-        cache_path = LocalFileStore(
-            f"{cache_dir}/{os.path.basename(file_path)}"
+    def load_n_yield_docs(self, file_path: str):
+        # text 파일은 전체를 읽지 않고 TEXT_BLOCK_SIZE 단위로 끊어서 넘겨줌
+        # 블록 경계에서 단어가 잘리지 않도록 마지막 줄바꿈(없으면 공백) 이후는 다음 블록으로 넘김
+        if file_path.lower().endswith(TEXT_EXTENSIONS):
+            with open(file_path, "r", encoding="utf-8") as f:
+                rest = ""
+                for block in iter(lambda: f.read(TEXT_BLOCK_SIZE), ""):
+                    text = rest + block
+                    cut = text.rfind("\n")
+                    if cut == -1:
+                        cut = text.rfind(" ")
+                    if cut == -1:
+                        rest = text
+                        continue
+                    rest = text[cut + 1 :]
+                    yield Document(
+                        page_content=text[: cut + 1],
+                        metadata={"source": file_path},
+                    )
+                if rest:
+                    yield Document(
+                        page_content=rest, metadata={"source": file_path}
+                    )
+
+        # pdf는 page 단위로 읽어서 넘겨줌
+        elif file_path.lower().endswith(".pdf"):
+            yield from PyPDFLoader(file_path).lazy_load()
+
+        # docx는 paragraph들을 TEXT_BLOCK_SIZE 정도씩 묶어서 넘겨줌
+        elif file_path.lower().endswith(".docx"):
+            paragraphs, size = [], 0
+            for paragraph in iter_docx_paragraphs(file_path):
+                paragraphs.append(paragraph)
+                size += len(paragraph) + 1
+                if size >= TEXT_BLOCK_SIZE:
+                    yield Document(
+                        page_content="\n".join(paragraphs),
+                        metadata={"source": file_path},
+                    )
+                    paragraphs, size = [], 0
+            if paragraphs:
+                yield Document(
+                    page_content="\n".join(paragraphs),
+                    metadata={"source": file_path},
+                )
+
+        # 그 외 형식은 unstructured가 파일 전체를 읽은 뒤 page 단위로 넘겨줌
+        else:
+            loader = UnstructuredFileLoader(file_path, mode="paged")
+            yield from loader.lazy_load()
+
+    def split_n_yield_docs(self, file_path: str):
+        # page(또는 block) 하나씩 split해서 chunk를 넘겨줌
+        # 문서 전체나 chunk 전체를 list로 만들지 않기 때문에 큰 파일도 메모리 사용량이 일정함
+        for doc in self.load_n_yield_docs(file_path):
+            yield from self.splitter.split_documents([doc])
+
+    # index는 항상 파일 내용의 hash로 저장하므로, 같은 파일은 session/사용자와 상관없이 다시 embedding하지 않음
+    # doc_key: 같은 문서를 구분하는 key (ex. 로그인한 사용자 id + 업로드한 파일 이름)
+    # 같은 doc_key로 내용이 바뀐 파일이 들어오면, 이전 내용의 index에서 바뀐 chunk만 다시 embedding함
+    # 반환값: index가 저장된 경로
+    def build_index(self, file_path: str, doc_key: str = None):
+        embeddings = OpenAIEmbeddings()
+        settings = index_store.splitter_settings(self.splitter, embeddings)
+
+        content_hash = index_store.file_hash(file_path, extra=settings)
+        index_path = index_store.index_path(content_hash)
+        document_path = (
+            f"{DOCUMENT_FOLDER}/{index_store.text_hash(doc_key + settings)}"
+            if doc_key
+            else None
         )
 
-        embeddings = OpenAIEmbeddings()
+        # 프로세스가 재시작되어도 같은 파일이면 split/embedding 없이 디스크의 index를 그대로 사용
+        if not index_store.index_exists(index_path):
+            # embedding cache는 chunk 내용의 hash가 key이므로 모든 문서가 같이 사용 (모델/splitter 설정별로 나눔)
+            cache_dir = "./.cache/embeddings"
+            common.check_dir(cache_dir)
+
+            cache_path = LocalFileStore(
+                f"{cache_dir}/{index_store.text_hash(settings)}"
+            )
+            cached_embeddings = CacheBackedEmbeddings.from_bytes_store(
+                embeddings, cache_path
+            )
+
+            # 같은 문서의 이전 내용으로 만든 index가 있으면, 그것과 비교해서 바뀐 부분만 반영
+            base_path = self.read_document(document_path)
+            if base_path and index_store.index_exists(base_path):
+                vector_store = index_store.load_index(
+                    base_path, cached_embeddings, mmap=False
+                )
+                vector_store = index_store.sync_index(
+                    vector_store, self.split_n_yield_docs(file_path)
+                )
+            else:
+                vector_store = index_store.build_index(
+                    self.split_n_yield_docs(file_path), cached_embeddings
+                )
+
+            index_store.save_index(
+                vector_store, index_path, {"content_hash": content_hash}
+            )
+
+        self.write_document(document_path, index_path)
+        return index_path
+
+    def read_document(self, document_path: str):
+        # doc_key의 마지막 index 경로 (없으면 None)
+        if not document_path or not os.path.exists(document_path):
+            return None
+        with open(document_path, "r") as f:
+            return f.read().strip()
+
+    def write_document(self, document_path: str, index_path: str):
+        # doc_key마다 마지막 index 경로만 기록 (index는 내용별로 하나씩만 있으므로 따로 지울 것이 없음)
+        if not document_path:
+            return
+        common.check_dir(DOCUMENT_FOLDER)
+        tmp_path = f"{document_path}.{os.getpid()}.part"
+        with open(tmp_path, "w") as f:
+            f.write(index_path)
+        os.replace(tmp_path, document_path)
 
-        docs = self.split_n_return_docs(file_path)
-        cached_embeddings = CacheBackedEmbeddings.from_bytes_store(
-            embeddings, cache_path
-        )
-        vector_store = FAISS.from_documents(docs, cached_embeddings)
+    @st.cache_resource(show_spinner="Embedding file...")
+    def embedding_n_return_retriever(
+        self, file_path: str, doc_key: str = None
+    ):
+        index_path = self.build_index(file_path, doc_key)
 
-        return vector_store.as_retriever()
+        # vector 검색 + BM25 검색 결과를 합쳐서 반환하는 retriever
+        return hybrid_retriever.load_retriever(index_path, OpenAIEmbeddings())
 
     # document list -> string
     def format_docs(self, docs):
         return "\n\n".join(doc.page_content for doc in docs)
+
+    # 검색 결과(document list) -> string (DocumentGPT, MeetingGPT 채팅용)
+    # 관련도 순서대로 token 예산(max_tokens, 기본값 CONTEXT_MAX_TOKENS)만큼만 넣고, 겹치는 chunk는 한 번만 넣음
+    # (QuizGPT는 문서 전체로 문제를 만들어야 하므로 format_docs를 사용)
+    def pack_docs(self, docs, max_tokens: int = None):
+        return ContextPacker().format(docs, max_tokens)
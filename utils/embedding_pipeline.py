@@ -0,0 +1,113 @@
+import random
+import asyncio
+
+import tiktoken
+
+from langchain_community.vectorstores import FAISS
+
+
+def is_rate_limited(error: Exception):
+    # openai.RateLimitError, httpx 응답 에러 등은 status_code를 갖고 있음
+    status_code = getattr(error, "status_code", None)
+    if status_code is None and getattr(error, "response", None) is not None:
+        status_code = getattr(error.response, "status_code", None)
+    return status_code == 429 or type(error).__name__ == "RateLimitError"
+
+
+class EmbeddingPipeline:
+    def __init__(
+        self,
+        embeddings,
+        max_batch_tokens: int = 8000,
+        max_batch_size: int = 256,
+        max_concurrency: int = 4,
+        max_retries: int = 6,
+        retry_delay: float = 1.0,
+        encoding_name: str = "cl100k_base",
+    ):
+        self.embeddings = embeddings
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._encoding = tiktoken.get_encoding(encoding_name)
+
+    def make_batches(self, texts):
+        # token 수 기준으로 batch를 나눔 (batch 하나가 max_batch_tokens를 넘지 않도록)
+        # 반환값은 texts의 index 목록들
+        batches = []
+        batch, batch_tokens = [], 0
+        for i, text in enumerate(texts):
+            tokens = len(self._encoding.encode(text, disallowed_special=()))
+            if batch and (
+                batch_tokens + tokens > self.max_batch_tokens
+                or len(batch) >= self.max_batch_size
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(i)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _embed_batch(self, texts, semaphore):
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    return await self.embeddings.aembed_documents(texts)
+                except Exception as e:
+                    if not is_rate_limited(e) or attempt == self.max_retries:
+                        raise
+                    # 429: exponential backoff + jitter
+                    delay = self.retry_delay * (2**attempt)
+                    await asyncio.sleep(delay + random.uniform(0, delay))
+
+    async def astream(self, texts):
+        # batch들을 동시에 보내고, 끝나는 순서대로 (index 목록, vector 목록)을 넘겨줌
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(batch):
+            vectors = await self._embed_batch(
+                [texts[i] for i in batch], semaphore
+            )
+            return batch, vectors
+
+        tasks = [
+            asyncio.create_task(run(batch))
+            for batch in self.make_batches(texts)
+        ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def aadd_documents(self, vector_store: FAISS, docs, ids=None):
+        # vector_store가 None이면 처음 도착한 batch로 새로 생성
+        texts = [doc.page_content for doc in docs]
+        async for batch, vectors in self.astream(texts):
+            text_embeddings = [
+                (texts[i], vector) for i, vector in zip(batch, vectors)
+            ]
+            metadatas = [docs[i].metadata for i in batch]
+            batch_ids = [ids[i] for i in batch] if ids else None
+
+            if vector_store is None:
+                vector_store = FAISS.from_embeddings(
+                    text_embeddings,
+                    self.embeddings,
+                    metadatas=metadatas,
+                    ids=batch_ids,
+                )
+            else:
+                vector_store.add_embeddings(
+                    text_embeddings, metadatas=metadatas, ids=batch_ids
+                )
+        return vector_store
+
+    def add_documents(self, vector_store: FAISS, docs, ids=None):
+        # streamlit script는 event loop 밖에서 실행되므로 asyncio.run으로 감싸서 사용
+        return asyncio.run(self.aadd_documents(vector_store, docs, ids))
@@ -0,0 +1,82 @@
+from typing import Any
+
+from utils import index_store
+from utils.sparse_index import SparseIndex
+
+from langchain_core.retrievers import BaseRetriever
+
+RRF_K = 60
+FETCH_K = 20  # dense/sparse 각각에서 가져올 후보 수
+# BM25 점수가 1위 점수의 이 비율보다 낮은 후보는 버림
+# (RRF는 순위만 보므로, "ERR_17" 검색에서 "err"만 일치한 문서도 순위 점수를 받아 dense 결과를 밀어내지 않도록)
+SPARSE_MIN_RATIO = 0.1
+
+
+def reciprocal_rank_fusion(rankings, rrf_k: int = RRF_K):
+    # rankings: id 목록들 (각각 관련도 높은 순)
+    # 점수 크기가 다른 두 검색 결과를 순위만으로 합침: score = sum(1 / (rrf_k + rank))
+    # 반환값: [(id, score)] (score 높은 순)
+    scores = {}
+    for ranking in rankings:
+        for rank, id_ in enumerate(ranking, start=1):
+            scores[id_] = scores.get(id_, 0) + 1 / (rrf_k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def hybrid_search_by_vector(
+    vector_store,
+    sparse: SparseIndex,
+    vector,
+    query: str,
+    k: int = 4,
+    fetch_k: int = FETCH_K,
+):
+    # dense(vector) 검색과 sparse(BM25) 검색 결과를 RRF로 합쳐서 상위 k개를 반환
+    # 반환값: [(Document, RRF score)]
+    dense = vector_store.similarity_search_with_score_by_vector(
+        vector, k=fetch_k
+    )
+    docs = {doc.id: doc for doc, _ in dense}
+    rankings = [[doc.id for doc, _ in dense]]
+    if sparse is not None:
+        matches = sparse.search(query, fetch_k)
+        min_score = matches[0][1] * SPARSE_MIN_RATIO if matches else 0
+        rankings.append([id_ for id_, score in matches if score >= min_score])
+
+    results = []
+    for id_, score in reciprocal_rank_fusion(rankings)[:k]:
+        doc = docs.get(id_) or vector_store.docstore.search(id_)
+        # docstore의 Document에는 id가 없을 수 있으므로 채워줌
+        doc.id = id_
+        results.append((doc, score))
+    return results
+
+
+class HybridRetriever(BaseRetriever):
+    # 식별자, 에러 코드, 이름처럼 정확히 일치해야 하는 단어는 BM25가,
+    # 표현이 다른 같은 의미는 vector 검색이 찾아줌
+    vector_store: Any
+    sparse: Any = None
+    k: int = 4
+    fetch_k: int = FETCH_K
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None):
+        vector = self.vector_store.embeddings.embed_query(query)
+        results = hybrid_search_by_vector(
+            self.vector_store,
+            self.sparse,
+            vector,
+            query,
+            k=self.k,
+            fetch_k=self.fetch_k,
+        )
+        return [doc for doc, _ in results]
+
+
+def load_retriever(path: str, embeddings, k: int = 4):
+    # 저장된 index를 검색용(ANN index + sparse index)으로 불러와서 retriever로 반환
+    path = index_store.resolve_index(path)
+    vector_store = index_store.load_index(path, embeddings, ann=True)
+    return HybridRetriever(
+        vector_store=vector_store, sparse=SparseIndex.load(path), k=k
+    )
@@ -0,0 +1,297 @@
+import os
+import json
+import time
+import pickle
+import shutil
+import hashlib
+
+from utils import ann_index, common
+from utils.embedding_pipeline import EmbeddingPipeline
+from utils.sparse_index import SparseIndex
+
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.faiss import dependable_faiss_import
+
+INDEX_FOLDER = "./.cache/indexes"
+INDEX_NAME = "index"
+ANN_NAME = "ann"
+MANIFEST_NAME = "manifest.json"
+# 실제 index 파일은 {폴더}/@versions/{index 이름}/{version}에 저장하고,
+# index 경로는 현재 version을 가리키는 symlink로 둠 ("@"는 index 이름에 쓰지 않는 문자)
+VERSIONS_FOLDER = "@versions"
+VERSION_GRACE = (
+    60  # seconds, 다른 version으로 바뀐 뒤에도 지우지 않고 두는 시간
+)
+INCOMPLETE_VERSION_TTL = (
+    60 * 60
+)  # seconds, 저장 도중 멈춘 version 폴더를 지우기까지의 시간
+READ_CHUNK_SIZE = 1024 * 1024  # 1MB
+STREAM_WINDOW = 256  # 한 번에 embedding할 chunk 수
+
+
+def file_hash(file_path: str, extra: str = ""):
+    # 파일 전체를 메모리에 올리지 않고 1MB 단위로 읽으며 hash를 계산
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            sha256.update(block)
+    sha256.update(extra.encode("utf-8"))
+    return sha256.hexdigest()
+
+
+def text_hash(text: str):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(doc):
+    # chunk 내용의 hash를 docstore id로 사용해서, 내용이 같은 chunk는 다시 embedding하지 않음
+    return text_hash(doc.page_content)
+
+
+def splitter_settings(splitter, embeddings=None):
+    # splitter 설정이나 embedding 모델이 바뀌면 기존 index는 재사용할 수 없으므로 key에 포함
+    settings = {
+        "splitter": type(splitter).__name__,
+        "chunk_size": getattr(splitter, "_chunk_size", None),
+        "chunk_overlap": getattr(splitter, "_chunk_overlap", None),
+        "separator": getattr(splitter, "_separator", None),
+        "separators": getattr(splitter, "_separators", None),
+        "encoding": getattr(splitter, "encoding_name", None),
+        "model": getattr(embeddings, "model", None),
+    }
+    return json.dumps(settings, sort_keys=True)
+
+
+def index_path(key: str):
+    return f"{INDEX_FOLDER}/{key}"
+
+
+def versions_path(path: str):
+    return (
+        f"{os.path.dirname(path)}/{VERSIONS_FOLDER}/{os.path.basename(path)}"
+    )
+
+
+def resolve_index(path: str):
+    # index의 파일 여러 개를 읽는 동안 다른 version으로 바뀌지 않도록 version 폴더 경로를 한 번만 구해서 사용
+    return os.path.realpath(path)
+
+
+def _version_time(version: str):
+    # version 폴더 이름: "{time_ns}-{pid}"
+    try:
+        return int(version.split("-")[0])
+    except ValueError:
+        return 0
+
+
+def _cleanup_versions(versions: str, current: str):
+    # 다른 version으로 바뀐 지 VERSION_GRACE초가 지난 version만 지움 (그 전에 열어서 아직 읽고 있을 수 있으므로)
+    # 저장이 끝나지 않은(manifest가 없는) version은 다른 process가 저장 중일 수 있으므로 오래된 것만 지움
+    now = time.time()
+    names = sorted(os.listdir(versions), key=_version_time)
+    replaced_at = None
+    for name in reversed(names):
+        version_path = f"{versions}/{name}"
+        manifest_path = f"{version_path}/{MANIFEST_NAME}"
+        try:
+            if not os.path.exists(manifest_path):
+                if (
+                    name != current
+                    and now - os.path.getmtime(version_path)
+                    > INCOMPLETE_VERSION_TTL
+                ):
+                    shutil.rmtree(version_path, ignore_errors=True)
+                continue
+            if (
+                name != current
+                and replaced_at is not None
+                and now - replaced_at > VERSION_GRACE
+            ):
+                shutil.rmtree(version_path, ignore_errors=True)
+            # manifest는 symlink를 바꾸기 직전에 쓰므로, 그 시각을 바로 이전 version이 바뀐 시각으로 봄
+            replaced_at = os.path.getmtime(manifest_path)
+        except FileNotFoundError:
+            # 다른 process가 먼저 정리한 version
+            continue
+
+
+def _swap_version(path: str, new_version: str):
+    # symlink를 새 version으로 바꿈 (os.replace는 atomic하므로 읽는 쪽은 항상 완전한 이전/새 version 중 하나를 봄)
+    versions = versions_path(path)
+    if os.path.isdir(path) and not os.path.islink(path):
+        # symlink를 쓰기 전에 만든 index 폴더는 version 폴더로 옮김 (이 순간에만 잠깐 비어 있음)
+        legacy_path = f"{versions}/0-{os.getpid()}"
+        os.replace(path, legacy_path)
+        os.utime(legacy_path)
+
+    link_path = f"{path}.link-{os.getpid()}"
+    if os.path.lexists(link_path):
+        # 예전에 교체 도중 죽은 process가 남긴 symlink
+        os.remove(link_path)
+    os.symlink(
+        os.path.relpath(f"{versions}/{new_version}", os.path.dirname(path)),
+        link_path,
+    )
+    os.replace(link_path, path)
+    _cleanup_versions(versions, new_version)
+
+
+def remove_index(path: str):
+    if os.path.islink(path):
+        os.remove(path)
+    elif os.path.isdir(path):
+        shutil.rmtree(path)
+    shutil.rmtree(versions_path(path), ignore_errors=True)
+
+
+def index_exists(path: str):
+    return os.path.exists(f"{path}/{INDEX_NAME}.faiss") and os.path.exists(
+        f"{path}/{INDEX_NAME}.pkl"
+    )
+
+
+def read_manifest(path: str):
+    manifest_path = f"{path}/{MANIFEST_NAME}"
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+
+def load_ann(path: str):
+    # 저장된 ANN index를 수정할 수 있도록 불러옴 (없으면 None)
+    # 반환값: (index, manifest["ann"], {ANN label: docstore id}, 삭제 표시된 label)
+    path = resolve_index(path)
+    ann_path = f"{path}/{ANN_NAME}.faiss"
+    ids_path = f"{path}/{ANN_NAME}.pkl"
+    if not (os.path.exists(ann_path) and os.path.exists(ids_path)):
+        return None
+    faiss = dependable_faiss_import()
+    with open(ids_path, "rb") as f:
+        ids, deleted = pickle.load(f)
+    settings = read_manifest(path).get("ann", {})
+    return faiss.read_index(ann_path), settings, ids, deleted
+
+
+def save_index(
+    vector_store: FAISS,
+    path: str,
+    manifest: dict = None,
+    index_type: str = ann_index.INDEX_TYPE,
+):
+    # 새 version 폴더에 전부 저장한 뒤 symlink만 교체해서,
+    # 저장 도중 프로세스가 죽거나 다른 process가 읽고 있어도 깨진(또는 없는) index를 보지 않도록 함
+    version = f"{time.time_ns()}-{os.getpid()}"
+    tmp_path = f"{versions_path(path)}/{version}"
+    common.check_dir(tmp_path)
+    vector_store.save_local(tmp_path, index_name=INDEX_NAME)
+
+    # flat index는 chunk 추가/삭제와 vector export에 사용하고,
+    # 검색용 ANN index(hnsw, ivf, ivfpq)는 chunk 수에 따라 따로 만들어서 같이 저장
+    # 이전에 저장한 ANN index가 있으면 바뀐 vector만 반영하고, 많이 바뀌었으면 새로 만듦
+    previous = load_ann(path) if os.path.exists(path) else None
+    updated = previous and ann_index.update(
+        *previous,
+        vector_store.index,
+        vector_store.index_to_docstore_id,
+        index_type,
+    )
+    if updated:
+        ann, ann_settings, ann_ids, deleted = updated
+    else:
+        ann, ann_settings = ann_index.build(vector_store.index, index_type)
+        ann_ids, deleted = dict(vector_store.index_to_docstore_id), set()
+    if ann is not None:
+        faiss = dependable_faiss_import()
+        faiss.write_index(ann, f"{tmp_path}/{ANN_NAME}.faiss")
+        with open(f"{tmp_path}/{ANN_NAME}.pkl", "wb") as f:
+            pickle.dump((ann_ids, deleted), f)
+
+    # hybrid 검색에 사용할 BM25 index도 저장할 때 한 번만 만들어둠
+    SparseIndex.from_vector_store(vector_store).save(tmp_path)
+
+    with open(f"{tmp_path}/{MANIFEST_NAME}", "w") as f:
+        json.dump({**(manifest or {}), "ann": ann_settings}, f)
+
+    _swap_version(path, version)
+
+
+def load_index(path: str, embeddings, mmap: bool = True, ann: bool = False):
+    # ann=True: 검색용 ANN index가 있으면 그것을 불러옴 (검색만 하는 경우)
+    # chunk를 추가/삭제하거나 vector를 꺼내야 하는 경우는 flat index를 사용해야 함
+    faiss = dependable_faiss_import()
+    path = resolve_index(path)
+
+    # IO_FLAG_MMAP: index 파일을 통째로 읽어오지 않고 memory-map으로 열어줌
+    flags = faiss.IO_FLAG_MMAP if mmap else 0
+    ann_path = f"{path}/{ANN_NAME}.faiss"
+    ann_ids = None
+    if ann and os.path.exists(ann_path):
+        settings = read_manifest(path).get("ann", {})
+        params = settings.get("params", {})
+        index = ann_index.configure(
+            faiss.read_index(ann_path, flags), settings.get("type"), params
+        )
+        # ANN index의 label은 vector를 추가/삭제하면서 flat index의 위치와 달라지므로 따로 저장한 매핑을 사용
+        # (매핑이 없는 예전 ANN index는 flat index와 같은 순서)
+        if os.path.exists(f"{path}/{ANN_NAME}.pkl"):
+            with open(f"{path}/{ANN_NAME}.pkl", "rb") as f:
+                ann_ids, deleted = pickle.load(f)
+            if deleted:
+                index = ann_index.FilteredIndex(
+                    index,
+                    deleted,
+                    params.get("ef_search", ann_index.HNSW_EF_SEARCH),
+                )
+    else:
+        index = faiss.read_index(f"{path}/{INDEX_NAME}.faiss", flags)
+
+    # pickle은 우리가 직접 저장한 .cache 안의 파일만 읽음
+    with open(f"{path}/{INDEX_NAME}.pkl", "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+
+    return FAISS(embeddings, index, docstore, ann_ids or index_to_docstore_id)
+
+
+def build_index(docs, embeddings):
+    return sync_index(None, docs, embeddings)
+
+
+def sync_index(vector_store: FAISS, docs, embeddings=None):
+    # docs는 generator여도 됨 (STREAM_WINDOW개씩 받아서 바로 embedding 후 index에 추가)
+    # 새 chunk 목록과 저장된 index를 chunk hash로 비교해서
+    # 사라진 chunk는 삭제하고, 새로 생긴 chunk만 embedding해서 추가함
+    pipeline = EmbeddingPipeline(embeddings or vector_store.embeddings)
+    stored_ids = (
+        set(vector_store.index_to_docstore_id.values())
+        if vector_store is not None
+        else set()
+    )
+    seen_ids = set()
+
+    for window in common.batched(docs, STREAM_WINDOW):
+        new_chunks = {}
+        for doc in window:
+            id_ = chunk_id(doc)
+            if id_ in seen_ids:
+                continue
+            seen_ids.add(id_)
+            if id_ not in stored_ids:
+                new_chunks[id_] = doc
+
+        if new_chunks:
+            vector_store = pipeline.add_documents(
+                vector_store,
+                list(new_chunks.values()),
+                ids=list(new_chunks.keys()),
+            )
+
+    if vector_store is None:
+        raise ValueError("No documents to index.")
+
+    removed_ids = [id_ for id_ in stored_ids if id_ not in seen_ids]
+    if removed_ids:
+        vector_store.delete(removed_ids)
+
+    return vector_store
@@ -0,0 +1,338 @@
+import os
+import json
+import time
+import socket
+import itertools
+import threading
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import streamlit as st
+
+from utils import common, index_store
+
+JOB_FOLDER = "./.cache/jobs"
+POLL_INTERVAL = 1  # seconds, 진행 상황을 다시 그리는 간격
+PROGRESS_INTERVAL = 0.5  # seconds, progress를 파일에 쓰는 최소 간격
+ACTIVE_STATUSES = ("queued", "running")
+HEARTBEAT_INTERVAL = 10  # seconds, 실행 중인 job이 updated_at을 갱신하는 간격
+HEARTBEAT_TIMEOUT = 60  # seconds, 이 시간 동안 갱신이 없으면 멈춘 job으로 봄
+FAILED_RETRY_AFTER = 60  # seconds, 실패한 job을 다시 실행하는 간격
+HOST = socket.gethostname()
+
+
+def job_path(job_id: str, folder: str = JOB_FOLDER):
+    return f"{folder}/{job_id}.json"
+
+
+def read_job(job_id: str, folder: str = JOB_FOLDER):
+    path = job_path(job_id, folder)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def write_job(job: dict, folder: str = JOB_FOLDER):
+    # 다른 process가 읽는 도중에 반쯤 쓰인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+    path = job_path(job["id"], folder)
+    tmp_path = f"{path}.{os.getpid()}.part"
+    with open(tmp_path, "w") as f:
+        json.dump(job, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def process_alive(pid: int):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # 다른 사용자의 process (살아 있음)
+        return True
+    return True
+
+
+def job_alive(job: dict):
+    # 다른 process(다른 streamlit server 포함)에서 아직 실행 중이거나 실행될 job인지 확인
+    # queued: job을 넣은 server process(owner_pid)가 살아 있으면 그 process의 pool에서 실행될 예정
+    # running: worker process(pid)가 살아 있고 heartbeat(updated_at)가 HEARTBEAT_TIMEOUT 안에 갱신됨
+    # 다른 host의 job은 process를 확인할 수 없으므로 heartbeat만 봄
+    pid = (
+        job.get("pid") if job["status"] == "running" else job.get("owner_pid")
+    )
+    if job.get("host") == HOST:
+        if pid is None or not process_alive(pid):
+            return False
+        if job["status"] == "queued":
+            return True
+    updated_at = datetime.fromisoformat(job["updated_at"])
+    return (datetime.now() - updated_at).total_seconds() < HEARTBEAT_TIMEOUT
+
+
+def retry_due(job: dict):
+    # 일시적인 오류(ex. rate limit)로 실패한 job이 계속 막혀 있지 않도록 일정 시간이 지나면 다시 실행
+    failed_at = datetime.fromisoformat(
+        job.get("finished_at") or job["updated_at"]
+    )
+    return (datetime.now() - failed_at).total_seconds() >= FAILED_RETRY_AFTER
+
+
+def result_exists(result):
+    # job 결과에 들어있는 파일 경로가 모두 남아 있는지 확인
+    # (문자열 결과, dict 결과에서는 이름이 "_path"로 끝나는 값이 파일 경로)
+    if isinstance(result, str):
+        return os.path.exists(result)
+    if isinstance(result, dict):
+        result = [
+            value for key, value in result.items() if key.endswith("_path")
+        ]
+    if isinstance(result, list):
+        return all(result_exists(value) for value in result)
+    return True
+
+
+class JobProgress:
+    # worker process 안에서 job 함수가 진행 상황을 기록할 때 사용
+    # job 함수 안에서 여러 thread가 동시에 호출해도 되도록 lock을 걸어줌
+    def __init__(self, job: dict, folder: str = JOB_FOLDER):
+        self.job = job
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._last_write = 0
+
+    def update(self, progress: float = None, message: str = None):
+        with self._lock:
+            if progress is not None:
+                self.job["progress"] = min(max(progress, 0.0), 1.0)
+            if message is not None:
+                self.job["message"] = message
+
+            # progress만 바뀐 경우는 PROGRESS_INTERVAL마다 한 번씩만 씀
+            now = time.monotonic()
+            if (
+                message is not None
+                or now - self._last_write >= PROGRESS_INTERVAL
+            ):
+                self.save()
+                self._last_write = now
+
+    def counter(self, total: int, start: float = 0.0, end: float = 1.0):
+        # total개의 작업이 하나씩 끝날 때마다 호출할 callback
+        # 호출될 때마다 progress를 start에서 end까지 조금씩 올림
+        done = itertools.count(1)
+
+        def callback():
+            self.update(start + (end - start) * next(done) / max(total, 1))
+
+        return callback
+
+    def save(self, **fields):
+        self.job.update(fields, updated_at=datetime.now().isoformat())
+        write_job(self.job, self.folder)
+
+
+def _run_job(function, job: dict, folder: str, env: dict, args, kwargs):
+    # worker process에서 실행됨
+    # api key 등은 job 파일에 남기지 않도록 env로 따로 받아서 설정
+    os.environ.update(env or {})
+    progress = JobProgress(job, folder)
+    progress.save(
+        status="running",
+        pid=os.getpid(),
+        started_at=datetime.now().isoformat(),
+    )
+
+    # 진행 상황이 한동안 바뀌지 않아도(ex. 긴 segment transcribe) 살아 있다는 것을 알리도록
+    # HEARTBEAT_INTERVAL마다 updated_at을 갱신
+    stopped = threading.Event()
+
+    def heartbeat():
+        while not stopped.wait(HEARTBEAT_INTERVAL):
+            progress.update()
+
+    heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+    heartbeat_thread.start()
+
+    try:
+        result = function(progress, *args, **kwargs)
+    except Exception as e:
+        stopped.set()
+        heartbeat_thread.join()
+        progress.save(
+            status="failed",
+            error=f"{type(e).__name__}: {e}",
+            finished_at=datetime.now().isoformat(),
+        )
+        return
+
+    stopped.set()
+    heartbeat_thread.join()
+    progress.save(
+        status="done",
+        progress=1.0,
+        result=result,
+        error=None,
+        finished_at=datetime.now().isoformat(),
+    )
+
+
+class JobQueue:
+    # 무거운 작업(영상 처리, 사이트 crawling, 문서 embedding)을 별도의 process에서 실행
+    # job 상태는 JOB_FOLDER에 파일로 저장되므로 어느 session에서든 id로 진행 상황을 조회할 수 있음
+    # job 함수는 (progress, *args, **kwargs)를 받는 module 최상단의 함수여야 하고 (pickle 가능)
+    # 반환값은 json으로 저장할 수 있어야 하고, 반환값이 문자열이면 결과 파일의 경로여야 함
+    # (dict를 반환하는 경우 결과 파일의 경로는 이름이 "_path"로 끝나는 key에 넣음)
+    def __init__(self, max_workers: int = None, folder: str = JOB_FOLDER):
+        common.check_dir(folder)
+        self.folder = folder
+        self.max_workers = max_workers or os.cpu_count()
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._executor = self._new_executor()
+
+    def _new_executor(self):
+        # streamlit server는 여러 thread를 사용하므로 fork 대신 spawn으로 worker process를 만듦
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def submit(
+        self,
+        kind: str,
+        key: str,
+        function,
+        *args,
+        env: dict = None,
+        scope: str = None,
+        **kwargs,
+    ):
+        # 같은 kind/key의 job은 한 번만 실행되므로, streamlit rerun마다 submit해도 됨
+        # scope: job을 같이 사용할 범위 (ex. 사용자 id)
+        # env의 api key로 실행되므로, 다른 사용자의 key로 실행된 job을 같이 쓰지 않도록 scope를 나눠야 함
+        # 실패한 job은 reset하거나 FAILED_RETRY_AFTER초가 지나기 전까지 다시 실행하지 않음
+        # 여러 server process가 같은 JOB_FOLDER를 사용해도 다른 process에서 실행 중인 job은 다시 실행하지 않음
+        # (여러 process가 같은 순간에 submit하는 경우의 중복 실행은 막지 못함)
+        if scope is not None:
+            key = f"{scope}:{key}"
+        job_id = f"{kind}-{index_store.text_hash(key)[:16]}"
+
+        with self._lock:
+            job = read_job(job_id, self.folder)
+            future = self._futures.get(job_id)
+
+            if job and job["status"] == "failed" and not retry_due(job):
+                return job_id
+            if (
+                job
+                and job["status"] == "done"
+                and result_exists(job["result"])
+            ):
+                return job_id
+            if job and future is not None and not future.done():
+                return job_id
+            if job and job["status"] in ACTIVE_STATUSES and job_alive(job):
+                return job_id
+
+            # 처음 들어온 job, 결과 파일이 지워진 job, 실패한 지 오래된 job, 또는 서버가 재시작되어 멈춰버린 job
+            job = {
+                "id": job_id,
+                "kind": kind,
+                "key": key,
+                "status": "queued",
+                "progress": 0.0,
+                "message": None,
+                "result": None,
+                "error": None,
+                "host": HOST,
+                "owner_pid": os.getpid(),
+                "created_at": datetime.now().isoformat(),
+                "updated_at": datetime.now().isoformat(),
+            }
+            write_job(job, self.folder)
+
+            job_args = (function, job, self.folder, env, args, kwargs)
+            try:
+                future = self._executor.submit(_run_job, *job_args)
+            except BrokenProcessPool:
+                # worker process가 비정상 종료되면 pool 전체를 쓸 수 없으므로 새로 만듦
+                self._executor = self._new_executor()
+                future = self._executor.submit(_run_job, *job_args)
+            self._futures[job_id] = future
+
+        return job_id
+
+    def get(self, job_id: str):
+        job = read_job(job_id, self.folder)
+        future = self._futures.get(job_id)
+
+        # worker process가 job 상태를 남기지 못하고 죽은 경우 (ex. 메모리 부족)
+        if (
+            job
+            and job["status"] in ACTIVE_STATUSES
+            and future is not None
+            and future.done()
+            and future.exception() is not None
+        ):
+            job.update(
+                status="failed",
+                error=str(future.exception()),
+                finished_at=datetime.now().isoformat(),
+            )
+            write_job(job, self.folder)
+
+        return job
+
+    def reset(self, job_id: str):
+        # 실패한 job을 지워서 다음 submit 때 다시 실행되도록 함
+        with self._lock:
+            job = read_job(job_id, self.folder)
+            if job and job["status"] not in ACTIVE_STATUSES:
+                os.remove(job_path(job_id, self.folder))
+                self._futures.pop(job_id, None)
+
+
+@st.cache_resource
+def get_job_queue():
+    # 모든 session이 하나의 queue(process pool)를 같이 사용
+    return JobQueue()
+
+
+def paint_job(job_id: str):
+    # job이 끝났으면 결과를 반환하고, 아니면 진행 상황을 그린 뒤 None을 반환
+    # 진행 상황은 fragment 안에서만 다시 그려지므로 나머지 화면은 그대로 사용할 수 있음
+    job_queue = get_job_queue()
+    job = job_queue.get(job_id)
+
+    # 다른 session에서 reset해서 job 파일이 지워진 경우, page를 다시 실행해서 다시 submit함
+    if job is None:
+        st.rerun()
+
+    if job["status"] == "done":
+        return job["result"]
+
+    if job["status"] == "failed":
+        st.error(f"Failed to process: {job['error']}")
+        if st.button("Retry", key=f"retry-{job_id}"):
+            job_queue.reset(job_id)
+            st.rerun()
+        return None
+
+    @st.fragment(run_every=POLL_INTERVAL)
+    def paint_progress():
+        job = job_queue.get(job_id)
+        # job이 끝나거나, 실행하던 process가 죽거나, job 파일이 지워지면 page 전체를 다시 실행해서
+        # 결과를 사용하거나 job을 다시 submit하도록 함
+        if (
+            job is None
+            or job["status"] not in ACTIVE_STATUSES
+            or not job_alive(job)
+        ):
+            st.rerun()
+        st.progress(job["progress"], text=job["message"] or "Waiting...")
+
+    paint_progress()
+    return None
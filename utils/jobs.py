@@ -0,0 +1,195 @@
+import os
+
+import requests
+
+from utils import audio, common, remote_index, transcriber
+from utils.context_packer import model_encoding
+from utils.docs_handler import DocsHandler
+from utils.pipeline import Pipeline
+from utils.site_index import load_site_index, parse_page, site_index_path
+
+# OpenAI
+from openai import OpenAI
+
+# LangChain
+from langchain.text_splitter import (
+    CharacterTextSplitter,
+    RecursiveCharacterTextSplitter,
+)
+from langchain_openai.embeddings import OpenAIEmbeddings
+
+# job_queue의 worker process에서 실행되는 함수들
+# 모두 (progress, *args)를 받고, json으로 저장할 수 있는 값(주로 결과 파일 경로)을 반환함
+# streamlit에 의존하지 않아야 하므로 st.cache_resource, st.spinner 등은 사용하지 않음
+
+TRANSCRIBE_WORKERS = 4  # 동시에 transcribe할 segment 수
+
+
+def publish(progress, index_path: str, index_client=None):
+    # 저장한 index를 index service에 올리고 service의 index 이름을 반환
+    # (질문할 때마다 page에서 올리지 않도록 job에서 한 번만 올림)
+    # index_client가 없거나 service에 연결할 수 없으면 None (page에서 로컬 index를 사용)
+    if index_client is None:
+        return None
+    progress.update(message="Uploading index...")
+    try:
+        return remote_index.publish_index(
+            index_client, index_path, OpenAIEmbeddings()
+        )
+    except requests.RequestException:
+        return None
+
+
+def tiktoken_splitter(splitter_class, **kwargs):
+    # chunk 크기를 chat model의 tokenizer로 셈 (context_packer와 같은 encoding)
+    # encoding이 바뀌면 chunk도 바뀌므로 index key(splitter_settings)에 포함
+    encoding_name = model_encoding()
+    splitter = splitter_class.from_tiktoken_encoder(
+        encoding_name=encoding_name, **kwargs
+    )
+    splitter.encoding_name = encoding_name
+    return splitter
+
+
+# page와 job에서 같은 splitter 설정을 사용해야 같은 index를 찾을 수 있음
+def document_splitter():
+    return tiktoken_splitter(
+        CharacterTextSplitter,
+        separator="\n",
+        chunk_size=600,
+        chunk_overlap=100,
+    )
+
+
+def meeting_splitter():
+    return tiktoken_splitter(
+        RecursiveCharacterTextSplitter, chunk_size=800, chunk_overlap=100
+    )
+
+
+def site_splitter():
+    return tiktoken_splitter(
+        RecursiveCharacterTextSplitter, chunk_size=1000, chunk_overlap=200
+    )
+
+
+### DocumentGPT
+def index_document(
+    progress, file_path: str, doc_key: str = None, index_client=None
+):
+    progress.update(message="Embedding file...")
+
+    docs_handler = DocsHandler()
+    docs_handler.splitter = document_splitter()
+    index_path = docs_handler.build_index(file_path, doc_key)
+    return {
+        "index_path": index_path,
+        "remote_index": publish(progress, index_path, index_client),
+    }
+
+
+### SiteGPT
+def index_site(progress, url: str, refresh: bool = False, index_client=None):
+    progress.update(
+        message="Refreshing site..." if refresh else "Loading site..."
+    )
+
+    splitter, embeddings = site_splitter(), OpenAIEmbeddings()
+    load_site_index(
+        url,
+        splitter,
+        embeddings,
+        parsing_function=parse_page,
+        refresh=refresh,
+    )
+    index_path = site_index_path(url, splitter, embeddings)
+    return {
+        "index_path": index_path,
+        "remote_index": publish(progress, index_path, index_client),
+    }
+
+
+### MeetingGPT
+def split_audio(video_path: str, segment_size: int, mode: str = "Fixed"):
+    # extracting file name
+    video_name = os.path.splitext(os.path.basename(video_path))[0]
+
+    # Silence-aware: 말이 끊기는 지점에서 잘라서 최대 segment_size초 길이로 묶음
+    if mode == "Silence-aware":
+        return audio.split_audio_on_silence(
+            video_path,
+            f"./.cache/audios/segments/{video_name}-silence",
+            target_seconds=segment_size,
+            max_seconds=segment_size * 2,
+        )
+
+    # Fixed: 영상에서 바로 segment_size초 단위의 mp3 segment들을 만듦
+    return audio.split_audio(
+        video_path,
+        f"./.cache/audios/segments/{video_name}",
+        segment_size,
+    )
+
+
+def transcribe_audio(audio_segments_folder: str, filename: str, on_progress):
+    text_folder = "./.cache/texts"
+    common.check_dir(text_folder)
+
+    text_path = f"{text_folder}/{filename}.txt"
+
+    # filename은 영상 내용의 hash와 segment 방식이므로, 같은 영상을 같은 방식으로 나눈 transcript가 이미 있으면 다시 만들지 않음
+    if os.path.exists(text_path):
+        return text_path
+
+    # segment들을 동시에 transcribe하고, segment별 결과는 checkpoint로 저장
+    # 중간에 멈춰도 다시 실행하면 끝난 segment는 건너뜀
+    return transcriber.transcribe_segments(
+        OpenAI(),
+        audio.segment_paths(audio_segments_folder),
+        text_path,
+        checkpoint_dir=f"{audio_segments_folder}/transcripts",
+        max_workers=TRANSCRIBE_WORKERS,
+        on_progress=on_progress,
+    )
+
+
+def process_meeting(
+    progress, video_path: str, segment_mode: str, index_client=None
+):
+    # video -> segments -> transcript -> index
+    # 단계별 진행 상황을 manifest로 저장해서, 프로세스가 재시작되어도 끝난 단계는 다시 실행하지 않음
+    video_name = os.path.splitext(os.path.basename(video_path))[0]
+    pipeline = Pipeline("meeting", f"{video_name}-{segment_mode}")
+
+    # Silence-aware: 최대 5분 (무음에서 자름), Fixed: 30초
+    segment_size = 300 if segment_mode == "Silence-aware" else 30
+    progress.update(0.0, "Extracting audio...")
+    segment_folder = pipeline.run_stage(
+        "segments", split_audio, video_path, segment_size, segment_mode
+    )
+
+    # 전체 진행률 중 10~90%는 transcribe한 segment 수로 표시
+    # segment 방식이 다르면 transcript도 다르므로 파일 이름에 포함 (다른 방식의 transcript를 재사용하지 않도록)
+    progress.update(0.1, "Transcribing audio...")
+    text_path = pipeline.run_stage(
+        "transcript",
+        transcribe_audio,
+        segment_folder,
+        f"{video_name}-{segment_mode}",
+        progress.counter(
+            len(audio.segment_paths(segment_folder)), start=0.1, end=0.9
+        ),
+    )
+
+    progress.update(0.9, "Embedding transcript...")
+    docs_handler = DocsHandler()
+    docs_handler.splitter = meeting_splitter()
+    index_path = pipeline.run_stage(
+        "index", docs_handler.build_index, text_path
+    )
+
+    return {
+        "text_path": text_path,
+        "index_path": index_path,
+        "remote_index": publish(progress, index_path, index_client),
+    }
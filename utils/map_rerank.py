@@ -0,0 +1,79 @@
+import re
+import asyncio
+import logging
+
+SCORE_PATTERN = re.compile(r"Score:\s*(\d+)", re.IGNORECASE)
+# 모든 요청이 실패했거나 timeout된 경우 choose 단계에 넘겨줄 답변
+NO_ANSWER = (
+    "Could not get an answer from the pages (the requests failed or timed"
+    " out). Please try again."
+)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_score(answer: str):
+    match = SCORE_PATTERN.search(answer)
+    return int(match.group(1)) if match else 0
+
+
+async def amap_rerank(
+    chain,
+    docs,
+    question,
+    max_concurrency: int = 4,
+    timeout: float = 30,
+    stop_score: int = 5,
+):
+    # 문서마다 answer를 동시에 요청하고(최대 max_concurrency개),
+    # timeout을 넘기거나 실패한(ex. rate limit) 요청은 log만 남기고 버림
+    # stop_score 이상의 답변이 오면 남은 요청은 취소하고 바로 반환
+    # 남은 답변이 없으면 NO_ANSWER 하나를 반환
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(i, doc):
+        try:
+            async with semaphore:
+                answer = await asyncio.wait_for(
+                    chain.ainvoke(
+                        {"context": doc.page_content, "question": question}
+                    ),
+                    timeout,
+                )
+        except asyncio.TimeoutError:
+            logger.warning("Answer timed out: %s", doc.metadata["source"])
+            return None
+        except Exception:
+            logger.exception("Answer failed: %s", doc.metadata["source"])
+            return None
+        return {
+            "index": i,
+            "answer": answer,
+            "source": doc.metadata["source"],
+            "score": parse_score(answer),
+        }
+
+    tasks = [asyncio.create_task(run(i, doc)) for i, doc in enumerate(docs)]
+    answers = []
+    try:
+        for task in asyncio.as_completed(tasks):
+            answer = await task
+            if answer is None:
+                continue
+            answers.append(answer)
+            if stop_score is not None and answer["score"] >= stop_score:
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if not answers:
+        return [{"index": 0, "answer": NO_ANSWER, "source": "", "score": 0}]
+
+    # choose_answer에는 retriever가 넘겨준 순서대로 전달
+    answers.sort(key=lambda answer: answer["index"])
+    return answers
+
+
+def map_rerank(chain, docs, question, **kwargs):
+    return asyncio.run(amap_rerank(chain, docs, question, **kwargs))
@@ -0,0 +1,69 @@
+import os
+import json
+from datetime import datetime
+
+from utils import common
+
+PIPELINE_FOLDER = "./.cache/pipelines"
+
+
+class Pipeline:
+    # 여러 단계로 이루어진 작업의 진행 상황을 manifest 파일로 저장
+    # key는 입력 파일의 hash(+설정)이므로, 프로세스가 재시작되어도 같은 입력이면
+    # 이미 끝난 단계는 건너뛰고 끝나지 않은 단계부터 다시 실행함
+    def __init__(self, name: str, key: str):
+        self.name = name
+        self.key = key
+        self.manifest_path = f"{PIPELINE_FOLDER}/{name}/{key}.json"
+        common.check_dir(os.path.dirname(self.manifest_path))
+
+        self.manifest = {"name": name, "key": key, "stages": {}}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r") as f:
+                self.manifest = json.load(f)
+
+    def _save(self):
+        tmp_path = f"{self.manifest_path}.part"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _update(self, stage: str, **fields):
+        record = self.manifest["stages"].setdefault(stage, {})
+        record.update(fields)
+        self._save()
+
+    def is_done(self, stage: str):
+        # 결과 파일이 지워졌다면 끝난 단계로 보지 않음
+        record = self.manifest["stages"].get(stage, {})
+        return record.get("status") == "done" and os.path.exists(
+            record.get("output", "")
+        )
+
+    def output(self, stage: str):
+        return self.manifest["stages"][stage]["output"]
+
+    def run_stage(self, stage: str, function, *args, **kwargs):
+        # function은 결과 파일(또는 폴더)의 경로를 반환해야 함
+        # 중간에 멈춘 단계는 다시 실행되며, 각 단계 함수가 남아있는 중간 결과를 이어서 사용함
+        # (ex. transcript 단계는 segment별 checkpoint)
+        if self.is_done(stage):
+            return self.output(stage)
+
+        self._update(
+            stage, status="running", started_at=datetime.now().isoformat()
+        )
+        try:
+            output = function(*args, **kwargs)
+        except Exception as e:
+            self._update(stage, status="failed", error=str(e))
+            raise
+
+        self._update(
+            stage,
+            status="done",
+            output=output,
+            error=None,
+            finished_at=datetime.now().isoformat(),
+        )
+        return output
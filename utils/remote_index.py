@@ -0,0 +1,92 @@
+import os
+from typing import Any
+
+import requests
+
+from utils import index_store
+
+from langchain.schema import Document
+from langchain_core.retrievers import BaseRetriever
+
+PUBLISH_BATCH_SIZE = 512  # 한 번에 index service로 보낼 chunk 수
+
+
+def index_version(index_path: str):
+    # 로컬 index의 manifest가 바뀌면(파일 내용, 사이트 refresh 등) 다시 올려야 함
+    return index_store.file_hash(f"{index_path}/{index_store.MANIFEST_NAME}")
+
+
+def export_batches(vector_store, batch_size: int = PUBLISH_BATCH_SIZE):
+    # 로컬 FAISS index에서 (ids, texts, metadatas, vectors)를 batch_size개씩 꺼내줌
+    # embedding은 다시 계산하지 않고 index에 저장된 vector를 그대로 사용
+    index = vector_store.index
+    for start in range(0, index.ntotal, batch_size):
+        end = min(start + batch_size, index.ntotal)
+        ids = [vector_store.index_to_docstore_id[i] for i in range(start, end)]
+        docs = [vector_store.docstore.search(id_) for id_ in ids]
+        yield (
+            ids,
+            [doc.page_content for doc in docs],
+            [doc.metadata for doc in docs],
+            index.reconstruct_n(start, end - start).tolist(),
+        )
+
+
+def publish_index(client, index_path: str, embeddings):
+    # 로컬 index를 index service에 올림 (이미 같은 버전이 올라가 있으면 건너뜀)
+    # 반환값: service의 index 이름
+    name = os.path.basename(index_path)
+    version = index_version(index_path)
+
+    info = client.info(name)
+    if info and info["version"] == version:
+        return name
+    if info:
+        client.drop(name)
+
+    # 버전과 전체 chunk 수는 마지막 batch에만 붙여서, 중간에 멈춘 경우 다음에 처음부터 다시 올리도록 함
+    vector_store = index_store.load_index(index_path, embeddings)
+    total = vector_store.index.ntotal
+    last_batch = (total - 1) // PUBLISH_BATCH_SIZE
+    for i, (ids, texts, metadatas, vectors) in enumerate(
+        export_batches(vector_store)
+    ):
+        last = i == last_batch
+        client.add(
+            name,
+            ids,
+            texts,
+            metadatas,
+            vectors,
+            version=version if last else None,
+            total=total if last else None,
+        )
+    return name
+
+
+class RemoteRetriever(BaseRetriever):
+    # query만 여기서 embedding하고, 검색은 index service에서 함
+    # query 원문도 같이 보내서 service에서 vector + BM25 hybrid 검색을 하도록 함
+    # fallback: service에 연결할 수 없을 때(ex. service 재시작 후 index가 없음) 사용할 retriever를 만드는 함수
+    client: Any
+    index_name: str
+    embeddings: Any
+    k: int = 4
+    fallback: Any = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None):
+        vector = self.embeddings.embed_query(query)
+        try:
+            results = self.client.query(
+                self.index_name, vector, self.k, text=query
+            )
+        except requests.RequestException:
+            if self.fallback is None:
+                raise
+            return self.fallback().invoke(query)
+        return [
+            Document(
+                page_content=doc["page_content"], metadata=doc["metadata"]
+            )
+            for doc in results
+        ]
@@ -0,0 +1,97 @@
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SemanticCache:
+    # 질문의 embedding이 threshold 이상으로 비슷한 질문이 있으면 저장해둔 답변을 반환
+    # 오래된 항목은 ttl이 지나면 만료되고, max_entries를 넘으면 가장 오래 안 쓰인 항목부터 삭제(LRU)
+    def __init__(
+        self,
+        embeddings,
+        threshold: float = 0.92,
+        max_entries: int = 256,
+        ttl: float = 60 * 60 * 24,
+    ):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._entries = OrderedDict()
+        self._matrix = None
+        self._keys = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def embed(self, question: str):
+        vector = np.asarray(self.embeddings.embed_query(question), "float32")
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        expired = [
+            key
+            for key, entry in self._entries.items()
+            if entry["expires_at"] < now
+        ]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def _index(self):
+        # 항목이 바뀔 때만 (n, dim) 행렬을 다시 만들어서 한 번의 행렬곱으로 유사도를 계산
+        if self._matrix is None:
+            self._keys = list(self._entries.keys())
+            self._matrix = (
+                np.stack([self._entries[key]["vector"] for key in self._keys])
+                if self._keys
+                else None
+            )
+        return self._keys, self._matrix
+
+    def lookup(self, question: str, vector=None):
+        # 반환값: (답변 또는 None, 질문 embedding)
+        # cache miss일 때 store()에 embedding을 다시 넘겨주면 embedding을 두 번 하지 않아도 됨
+        if vector is None:
+            vector = self.embed(question)
+
+        with self._lock:
+            self._evict_expired()
+            keys, matrix = self._index()
+            if matrix is None:
+                return None, vector
+
+            similarities = matrix @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None, vector
+
+            key = keys[best]
+            self._entries.move_to_end(key)
+            return self._entries[key]["answer"], vector
+
+    def store(self, question: str, answer: str, vector=None):
+        if vector is None:
+            vector = self.embed(question)
+
+        with self._lock:
+            self._entries[question] = {
+                "answer": answer,
+                "vector": vector,
+                "expires_at": time.monotonic() + self.ttl,
+            }
+            self._entries.move_to_end(question)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
@@ -0,0 +1,217 @@
+import time
+import asyncio
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+from xml.etree import ElementTree
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+from langchain.schema import Document
+
+
+def _tag(element):
+    # "{http://www.sitemaps.org/schemas/sitemap/0.9}loc" -> "loc"
+    return element.tag.rsplit("}", 1)[-1]
+
+
+def parse_sitemap(content: bytes):
+    # 반환값: (page 목록, 하위 sitemap url 목록)
+    root = ElementTree.fromstring(content)
+    pages, sitemaps = [], []
+    for entry in root:
+        fields = {_tag(child): (child.text or "").strip() for child in entry}
+        if not fields.get("loc"):
+            continue
+        if _tag(root) == "sitemapindex":
+            sitemaps.append(fields["loc"])
+        else:
+            pages.append(
+                {"url": fields["loc"], "lastmod": fields.get("lastmod")}
+            )
+    return pages, sitemaps
+
+
+class SiteCrawler:
+    def __init__(
+        self,
+        parsing_function=None,
+        max_connections: int = 32,
+        per_host_concurrency: int = 8,
+        user_agent: str = "fullstack-gpt",
+        timeout: float = 30,
+        respect_robots: bool = True,
+    ):
+        self.parsing_function = parsing_function
+        self.max_connections = max_connections
+        self.per_host_concurrency = per_host_concurrency
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.respect_robots = respect_robots
+
+        self._robots = {}
+        self._host_semaphores = {}
+        self._host_locks = {}
+        self._host_last_request = {}
+
+    async def _get(self, session, url, headers=None):
+        async with session.get(url, headers=headers) as response:
+            return response.status, response.headers, await response.read()
+
+    async def fetch_sitemap(self, session, sitemap_url: str):
+        # sitemap index인 경우 하위 sitemap까지 모두 읽어옴
+        status, _, content = await self._get(session, sitemap_url)
+        if status != 200:
+            raise ValueError(
+                f"Failed to load sitemap ({status}): {sitemap_url}"
+            )
+
+        pages, sitemaps = parse_sitemap(content)
+        for child_pages in await asyncio.gather(
+            *(self.fetch_sitemap(session, url) for url in sitemaps)
+        ):
+            pages.extend(child_pages)
+        return pages
+
+    async def _robots_for(self, session, url: str):
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        # 같은 host의 robots.txt를 여러 번 요청하지 않도록 lock을 걸어줌
+        async with self._host_locks.setdefault(
+            f"robots:{host}", asyncio.Lock()
+        ):
+            if host not in self._robots:
+                self._robots[host] = await self._fetch_robots(session, host)
+        return self._robots[host]
+
+    async def _fetch_robots(self, session, host: str):
+        robots = RobotFileParser()
+        try:
+            status, _, content = await self._get(session, f"{host}/robots.txt")
+            # robots.txt가 없으면 모두 허용
+            robots.parse(
+                content.decode("utf-8", "ignore").splitlines()
+                if status == 200
+                else []
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            robots.parse([])
+        return robots
+
+    async def _wait_for_host(self, host: str, delay: float):
+        # robots.txt에 crawl-delay가 있으면 같은 host에 대한 요청 간격을 delay 이상으로 유지
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            elapsed = time.monotonic() - self._host_last_request.get(host, 0)
+            if elapsed < delay:
+                await asyncio.sleep(delay - elapsed)
+            self._host_last_request[host] = time.monotonic()
+
+    async def fetch_page(self, session, page: dict, validators: dict = None):
+        url = page["url"]
+        host = urlsplit(url).netloc
+
+        delay = 0
+        if self.respect_robots:
+            robots = await self._robots_for(session, url)
+            if not robots.can_fetch(self.user_agent, url):
+                return {**page, "status": "disallowed"}
+            delay = robots.crawl_delay(self.user_agent) or 0
+
+        # 이전에 받아온 적이 있는 페이지는 conditional GET으로 요청 (바뀌지 않았으면 304)
+        headers = {}
+        validator = (validators or {}).get(url) or {}
+        if validator.get("etag"):
+            headers["If-None-Match"] = validator["etag"]
+        if validator.get("last_modified"):
+            headers["If-Modified-Since"] = validator["last_modified"]
+
+        semaphore = self._host_semaphores.setdefault(
+            host, asyncio.Semaphore(self.per_host_concurrency)
+        )
+        async with semaphore:
+            if delay:
+                await self._wait_for_host(host, delay)
+            try:
+                status, response_headers, content = await self._get(
+                    session, url, headers=headers
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                return {**page, "status": "error", "error": str(e)}
+
+        if status == 304:
+            return {**page, "status": "not_modified", **validator}
+        if status != 200:
+            return {**page, "status": "error", "error": f"HTTP {status}"}
+
+        soup = BeautifulSoup(content, "html.parser")
+        text = (
+            self.parsing_function(soup)
+            if self.parsing_function
+            else soup.get_text()
+        )
+        return {
+            **page,
+            "status": "ok",
+            "etag": response_headers.get("ETag"),
+            "last_modified": response_headers.get("Last-Modified"),
+            "document": Document(
+                page_content=text,
+                metadata={
+                    "source": url,
+                    "title": soup.title.get_text() if soup.title else "",
+                },
+            ),
+        }
+
+    def _session(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.per_host_concurrency,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            headers={"User-Agent": self.user_agent},
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+
+    async def load_sitemap(self, sitemap_url: str):
+        async with self._session() as session:
+            return await self.fetch_sitemap(session, sitemap_url)
+
+    async def crawl(self, sitemap_url: str, pages=None, validators=None):
+        # 페이지를 받아오는 대로 하나씩 넘겨줌 (전체가 끝날 때까지 기다리지 않음)
+        # pages를 넘기면 sitemap을 다시 읽지 않고 해당 페이지들만 받아옴
+        async with self._session() as session:
+            if pages is None:
+                pages = await self.fetch_sitemap(session, sitemap_url)
+
+            queue = asyncio.Queue()
+            for page in pages:
+                queue.put_nowait(page)
+            results = asyncio.Queue(maxsize=self.max_connections * 2)
+
+            async def worker():
+                while True:
+                    try:
+                        page = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    try:
+                        result = await self.fetch_page(
+                            session, page, validators
+                        )
+                    except Exception as e:
+                        result = {**page, "status": "error", "error": str(e)}
+                    await results.put(result)
+
+            workers = [
+                asyncio.create_task(worker())
+                for _ in range(min(self.max_connections, len(pages)))
+            ]
+            try:
+                for _ in range(len(pages)):
+                    yield await results.get()
+            finally:
+                for task in workers:
+                    task.cancel()
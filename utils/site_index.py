@@ -0,0 +1,143 @@
+import asyncio
+
+from utils import index_store
+from utils.embedding_pipeline import EmbeddingPipeline
+from utils.site_crawler import SiteCrawler
+
+STREAM_WINDOW = 256  # 한 번에 embedding할 chunk 수
+
+
+def site_index_path(url, splitter, embeddings):
+    settings = index_store.splitter_settings(splitter, embeddings)
+    return index_store.index_path(
+        f"site-{index_store.text_hash(url + settings)}"
+    )
+
+
+def parse_page(soup):
+    header = soup.find("header")
+    footer = soup.find("footer")
+
+    if header:
+        header.decompose()
+    if footer:
+        footer.decompose()
+
+    return str(soup.get_text()).replace("\n", " ")
+
+
+def page_chunk_id(url, doc):
+    # 여러 페이지에 같은 문구가 있을 수 있으므로 url까지 포함해서 id 생성
+    return index_store.text_hash(url + doc.page_content)
+
+
+async def aload_site_index(
+    url, splitter, embeddings, parsing_function=None, refresh=False
+):
+    # manifest["pages"]: {page url: {"lastmod", "etag", "last_modified", "chunk_ids"}}
+    path = site_index_path(url, splitter, embeddings)
+    exists = index_store.index_exists(path)
+
+    # 이미 index가 있으면 crawling 없이 디스크에서 바로 불러옴
+    if exists and not refresh:
+        return index_store.load_index(path, embeddings, ann=True)
+
+    vector_store = (
+        index_store.load_index(path, embeddings, mmap=False)
+        if exists
+        else None
+    )
+    stored_pages = index_store.read_manifest(path).get("pages", {})
+
+    crawler = SiteCrawler(parsing_function=parsing_function)
+    sitemap_pages = await crawler.load_sitemap(url)
+    sitemap_urls = {page["url"] for page in sitemap_pages}
+
+    # sitemap에서 사라진 페이지는 삭제
+    removed_ids = [
+        id_
+        for page_url, page in stored_pages.items()
+        if page_url not in sitemap_urls
+        for id_ in page["chunk_ids"]
+    ]
+    pages = {
+        page_url: page
+        for page_url, page in stored_pages.items()
+        if page_url in sitemap_urls
+    }
+
+    # <lastmod>가 그대로인 페이지는 요청조차 하지 않음
+    # lastmod가 없는 페이지는 ETag/Last-Modified로 conditional GET
+    to_fetch = [
+        page
+        for page in sitemap_pages
+        if not (
+            page["lastmod"]
+            and page["url"] in pages
+            and pages[page["url"]]["lastmod"] == page["lastmod"]
+        )
+    ]
+
+    pipeline = EmbeddingPipeline(embeddings)
+    new_chunks = {}
+
+    async def flush(vector_store):
+        vector_store = await pipeline.aadd_documents(
+            vector_store,
+            list(new_chunks.values()),
+            ids=list(new_chunks.keys()),
+        )
+        new_chunks.clear()
+        return vector_store
+
+    async for page in crawler.crawl(url, pages=to_fetch, validators=pages):
+        page_url = page["url"]
+        stored = pages.get(page_url)
+
+        if page["status"] == "not_modified":
+            stored["lastmod"] = page["lastmod"]
+            continue
+
+        # 일시적인 에러일 수 있으므로 기존 내용은 그대로 둠
+        if page["status"] != "ok":
+            continue
+
+        chunks = {
+            page_chunk_id(page_url, doc): doc
+            for doc in splitter.split_documents([page["document"]])
+        }
+        old_ids = set(stored["chunk_ids"]) if stored else set()
+        removed_ids.extend(id_ for id_ in old_ids if id_ not in chunks)
+        new_chunks.update(
+            (id_, doc) for id_, doc in chunks.items() if id_ not in old_ids
+        )
+        pages[page_url] = {
+            "lastmod": page["lastmod"],
+            "etag": page["etag"],
+            "last_modified": page["last_modified"],
+            "chunk_ids": list(chunks.keys()),
+        }
+
+        if len(new_chunks) >= STREAM_WINDOW:
+            vector_store = await flush(vector_store)
+
+    if new_chunks:
+        vector_store = await flush(vector_store)
+
+    if vector_store is None:
+        raise ValueError(f"No pages could be loaded from {url}")
+
+    if removed_ids:
+        vector_store.delete(removed_ids)
+
+    index_store.save_index(vector_store, path, {"url": url, "pages": pages})
+    return vector_store
+
+
+def load_site_index(
+    url, splitter, embeddings, parsing_function=None, refresh=False
+):
+    # refresh=True: sitemap의 <lastmod>를 비교해서 바뀌거나 새로 생긴 페이지만 다시 embedding
+    return asyncio.run(
+        aload_site_index(url, splitter, embeddings, parsing_function, refresh)
+    )
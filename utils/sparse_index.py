@@ -0,0 +1,132 @@
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+SPARSE_NAME = "sparse"
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 단어, 숫자와 함께 "ERR_CONN_RESET", "v1.2.3", "user-service" 같은 식별자를 하나의 token으로 취급
+TOKEN_PATTERN = re.compile(r"\w+(?:[.\-:/]\w+)*")
+SUBTOKEN_PATTERN = re.compile(r"[_.\-:/]")
+
+
+def tokenize(text: str):
+    # 식별자는 전체와 함께 "_"/"."/"-" 등으로 나눈 부분도 token으로 넣어서
+    # "user-service", "parse_config"로도, "service", "config"로도 찾을 수 있도록 함
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        parts = SUBTOKEN_PATTERN.split(token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part)
+    return tokens
+
+
+class SparseIndex:
+    # BM25 inverted index
+    # postings는 term별로 이어붙인 배열(CSR)로 저장: term i의 문서들은 doc_ids[offsets[i]:offsets[i+1]]
+    # 문서 번호는 FAISS index의 위치와 같고, ids[문서 번호]가 docstore id
+    def __init__(self, ids, terms, offsets, doc_ids, term_freqs, doc_lengths):
+        self.ids = ids
+        self.terms = terms
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        count = len(doc_lengths)
+        document_frequency = np.diff(offsets)
+        self.idf = np.log(
+            1 + (count - document_frequency + 0.5) / (document_frequency + 0.5)
+        ).astype(np.float32)
+        # 문서 길이에 따른 BM25 정규화 값은 검색할 때마다 계산하지 않도록 미리 계산
+        average_length = doc_lengths.mean() if count else 0
+        self.length_norm = (
+            BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths / average_length)
+            if count
+            else np.zeros(0, dtype=np.float32)
+        ).astype(np.float32)
+
+    @classmethod
+    def build(cls, ids, texts):
+        postings = {}
+        doc_lengths = np.zeros(len(ids), dtype=np.int32)
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lengths[doc_id] = sum(counts.values())
+            for term, freq in counts.items():
+                postings.setdefault(term, []).append((doc_id, freq))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[term]) for term in terms])
+        doc_ids = np.empty(offsets[-1], dtype=np.int32)
+        term_freqs = np.empty(offsets[-1], dtype=np.float32)
+        for i, term in enumerate(terms):
+            entries = np.array(postings[term])
+            doc_ids[offsets[i] : offsets[i + 1]] = entries[:, 0]
+            term_freqs[offsets[i] : offsets[i + 1]] = entries[:, 1]
+
+        return cls(list(ids), terms, offsets, doc_ids, term_freqs, doc_lengths)
+
+    @classmethod
+    def from_vector_store(cls, vector_store):
+        # FAISS index와 같은 순서로 문서 번호를 매김
+        index_to_id = vector_store.index_to_docstore_id
+        ids = [index_to_id[i] for i in range(len(index_to_id))]
+        texts = (vector_store.docstore.search(id_).page_content for id_ in ids)
+        return cls.build(ids, texts)
+
+    def search(self, query: str, k: int = 20):
+        # 반환값: [(docstore id, score)] (score 높은 순)
+        scores = np.zeros(len(self.doc_lengths), dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            doc_ids = self.doc_ids[start:end]
+            tf = self.term_freqs[start:end]
+            scores[doc_ids] += (
+                self.idf[term_id]
+                * tf
+                * (BM25_K1 + 1)
+                / (tf + self.length_norm[doc_ids])
+            )
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k)[:k]]
+        matched = matched[np.argsort(-scores[matched])]
+        return [(self.ids[i], float(scores[i])) for i in matched]
+
+    def save(self, path: str):
+        np.savez(
+            f"{path}/{SPARSE_NAME}.npz",
+            ids=np.array(self.ids, dtype=str),
+            terms=np.array(self.terms, dtype=str),
+            offsets=self.offsets,
+            doc_ids=self.doc_ids,
+            term_freqs=self.term_freqs,
+            doc_lengths=self.doc_lengths,
+        )
+
+    @classmethod
+    def load(cls, path: str):
+        # sparse index가 없는 예전 index는 None
+        file_path = f"{path}/{SPARSE_NAME}.npz"
+        if not os.path.exists(file_path):
+            return None
+        with np.load(file_path) as data:
+            return cls(
+                data["ids"].tolist(),
+                data["terms"].tolist(),
+                data["offsets"],
+                data["doc_ids"],
+                data["term_freqs"],
+                data["doc_lengths"],
+            )
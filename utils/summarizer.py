@@ -0,0 +1,107 @@
+import asyncio
+
+import tiktoken
+
+from langchain.prompts import PromptTemplate
+from langchain.schema import StrOutputParser
+
+initial_prompt = PromptTemplate.from_template("""
+        Write a concise summary of the following.
+        The summary should be in the language of the text.
+        ------------
+        {context}
+        ------------
+        Use the language of the text.
+    """)
+
+refine_prompt = PromptTemplate.from_template("""
+        Product a final summary.
+        The summary should be in the language of the text.
+
+        Existing summary up to this point:
+        {previous_summary}
+
+        New context:
+        ------------
+        {context}
+        ------------
+
+        Given the new context, refine the original summary.
+    """)
+
+reduce_prompt = PromptTemplate.from_template("""
+        The following is a set of summaries of consecutive parts of one text.
+        Combine them into a single concise summary, keeping the order of events.
+        The summary should be in the language of the text.
+        ------------
+        {context}
+        ------------
+        Use the language of the text.
+    """)
+
+
+def refine_summary(llm, docs):
+    # 첫 chunk를 요약한 뒤, 나머지 chunk를 하나씩 순서대로 반영 (chunk 수만큼 LLM을 순차 호출)
+    initial_chain = initial_prompt | llm | StrOutputParser()
+    summary = initial_chain.invoke({"context": docs[0].page_content})
+
+    refine_chain = refine_prompt | llm | StrOutputParser()
+    for doc in docs[1:]:
+        summary = refine_chain.invoke(
+            {"previous_summary": summary, "context": doc.page_content}
+        )
+
+    return summary
+
+
+def group_by_tokens(texts, token_budget, length_function):
+    # 순서를 유지하면서 합계가 token_budget을 넘지 않도록 묶음
+    # 요약이 줄어들지 않아도 끝나도록 한 묶음에는 최소 2개를 넣음
+    groups, group, group_tokens = [], [], 0
+    for text in texts:
+        tokens = length_function(text)
+        if len(group) >= 2 and group_tokens + tokens > token_budget:
+            groups.append(group)
+            group, group_tokens = [], 0
+        group.append(text)
+        group_tokens += tokens
+    if group:
+        groups.append(group)
+    return groups
+
+
+async def amap_reduce_summary(
+    llm,
+    docs,
+    token_budget: int = 3000,
+    max_concurrency: int = 8,
+    length_function=None,
+):
+    if length_function is None:
+        encoding = tiktoken.get_encoding("cl100k_base")
+
+        def length_function(text):
+            return len(encoding.encode(text, disallowed_special=()))
+
+    config = {"max_concurrency": max_concurrency}
+
+    # map: chunk마다 요약을 동시에 요청
+    map_chain = initial_prompt | llm | StrOutputParser()
+    summaries = await map_chain.abatch(
+        [{"context": doc.page_content} for doc in docs], config=config
+    )
+
+    # reduce: token_budget 안에 들어가는 만큼 묶어서 합치기를 하나가 남을 때까지 반복 (tree reduce)
+    reduce_chain = reduce_prompt | llm | StrOutputParser()
+    while len(summaries) > 1:
+        groups = group_by_tokens(summaries, token_budget, length_function)
+        summaries = await reduce_chain.abatch(
+            [{"context": "\n\n".join(group)} for group in groups],
+            config=config,
+        )
+
+    return summaries[0]
+
+
+def map_reduce_summary(llm, docs, **kwargs):
+    return asyncio.run(amap_reduce_summary(llm, docs, **kwargs))
@@ -0,0 +1,89 @@
+import os
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import common
+
+RETRYABLE_ERRORS = ("APIConnectionError", "APITimeoutError")
+
+
+def is_retryable(error: Exception):
+    # 429(rate limit), 5xx, 연결 에러만 재시도
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in (408, 409, 429) or status_code >= 500
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+def checkpoint_path(checkpoint_dir: str, segment_path: str):
+    return f"{checkpoint_dir}/{os.path.basename(segment_path)}.txt"
+
+
+def write_atomic(path: str, text: str):
+    with open(f"{path}.part", "w") as f:
+        f.write(text)
+    os.replace(f"{path}.part", path)
+
+
+def transcribe_segment(
+    client,
+    segment_path: str,
+    checkpoint_dir: str,
+    model: str = "gpt-4o-transcribe",
+    max_retries: int = 5,
+    retry_delay: float = 1.0,
+):
+    # 이미 받아온 segment는 checkpoint에서 읽어옴 (중간에 멈췄다가 다시 실행해도 이어서 진행)
+    path = checkpoint_path(checkpoint_dir, segment_path)
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return f.read()
+
+    for attempt in range(max_retries + 1):
+        try:
+            with open(segment_path, "rb") as audio_file:
+                transcription = client.audio.transcriptions.create(
+                    model=model,
+                    file=audio_file,
+                    response_format="text",
+                )
+            break
+        except Exception as e:
+            if not is_retryable(e) or attempt == max_retries:
+                raise
+            # exponential backoff + jitter
+            delay = retry_delay * (2**attempt)
+            time.sleep(delay + random.uniform(0, delay))
+
+    write_atomic(path, transcription)
+    return transcription
+
+
+def transcribe_segments(
+    client,
+    segment_paths,
+    text_path: str,
+    checkpoint_dir: str,
+    max_workers: int = 4,
+    on_progress=None,
+    **kwargs,
+):
+    # segment들을 최대 max_workers개씩 동시에 transcribe
+    # executor.map은 입력 순서대로 결과를 돌려주므로 끝난 순서와 상관없이 순서대로 이어붙일 수 있음
+    # on_progress: segment 하나가 끝날 때마다 (여러 thread에서) 호출됨
+    common.check_dir(checkpoint_dir)
+
+    def run(segment_path):
+        transcription = transcribe_segment(
+            client, segment_path, checkpoint_dir, **kwargs
+        )
+        if on_progress:
+            on_progress()
+        return transcription
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        transcriptions = list(executor.map(run, segment_paths))
+
+    write_atomic(text_path, " ".join(transcriptions))
+    return text_path
@@ -0,0 +1,42 @@
+import os
+import hashlib
+import tempfile
+
+from utils import common
+
+READ_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+def save_upload(file, folder: str):
+    common.check_dir(folder)
+
+    # streamlit rerun 시 같은 UploadedFile 객체가 다시 들어올 수 있으므로 처음부터 읽도록 함
+    if hasattr(file, "seek"):
+        file.seek(0)
+
+    # 1MB 단위로 임시 파일에 쓰면서 동시에 hash를 계산
+    # 파일 전체를 메모리에 올리지 않기 때문에 업로드 크기와 상관없이 메모리 사용량이 일정함
+    sha256 = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for block in iter(lambda: file.read(READ_CHUNK_SIZE), b""):
+                sha256.update(block)
+                f.write(block)
+
+        # 파일 이름 대신 내용의 hash로 저장
+        # 다른 사용자가 같은 이름의 다른 파일을 올려도 충돌하지 않고,
+        # 같은 파일을 다시 올리면 같은 경로가 반환되어 이후 단계의 cache를 그대로 사용함
+        extension = os.path.splitext(file.name)[1].lower()
+        file_path = f"{folder}/{sha256.hexdigest()}{extension}"
+
+        if os.path.exists(file_path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return file_path